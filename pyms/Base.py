@@ -41,6 +41,8 @@ class pymsBaseClass:
 	Base class.
 	"""
 
+	__slots__ = ()
+
 	def dump(self, file_name: PathLike, protocol: int = 3):
 		"""
 		Dumps an object to a file through :func:`pickle.dump()`.
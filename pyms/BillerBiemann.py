@@ -25,17 +25,22 @@ Functions to perform Biller and Biemann deconvolution.
 
 # stdlib
 import copy
-from typing import List, Sequence, Tuple, Union
+from concurrent.futures import Executor
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union, overload
 
 # 3rd party
 import numpy  # type: ignore
+from numpy.lib.stride_tricks import as_strided  # type: ignore
+from typing_extensions import Literal
 
 # this package
 from pyms.IntensityMatrix import BaseIntensityMatrix
 from pyms.IonChromatogram import IonChromatogram
+from pyms.Noise.Streaming import StreamingProcessor
 from pyms.Peak.Class import Peak
 from pyms.Peak.List.Function import is_peak_list
-from pyms.Spectrum import MassSpectrum
+from pyms.Peak.List.Table import PeakTable
+from pyms.Spectrum import MassSpectrum, _readonly_array
 from pyms.Utils.Utils import _number_types, is_number, is_sequence_of
 
 __all__ = [
@@ -44,11 +49,20 @@ __all__ = [
 		"get_maxima_list",
 		"get_maxima_list_reduced",
 		"get_maxima_matrix",
+		"get_maxima_mask",
 		"num_ions_threshold",
 		"rel_threshold",
 		"sum_maxima",
+		"StreamingBillerBiemann",
+		"iter_scan_blocks",
 		]
 
+# Number of ions per block when finding apexes in parallel
+_ION_BLOCK_SIZE = 64
+
+# Minimum number of scans per segment when consolidating in parallel
+_SEGMENT_SIZE = 256
+
 #######################
 # structure
 # 1) find local maxima per ion, store intensity and scan index
@@ -57,17 +71,26 @@ __all__ = [
 #######################
 
 
-def BillerBiemann(im: BaseIntensityMatrix, points: int = 3, scans: int = 1) -> List[Peak]:
+def BillerBiemann(
+		im: BaseIntensityMatrix,
+		points: int = 3,
+		scans: int = 1,
+		executor: Optional[Executor] = None,
+		) -> List[Peak]:
 	"""
 	Deconvolution based on the algorithm of Biller and Biemann (1974).
 
 	:param im:
 	:param points: Number of scans over which to consider a maxima to be a peak.
 	:param scans: Number of scans to combine peaks from to compensate for spectra skewing.
+	:param executor: Optional executor to run the deconvolution in parallel.
+		See :func:`~.get_maxima_matrix` for details.
 
 	:return: List of detected peaks
 
 	:authors: Andrew Isaac, Dominic Davis-Foster (type assertions)
+
+	.. versionchanged:: 2.4.0  Added the ``executor`` argument.
 	"""
 
 	if not isinstance(im, BaseIntensityMatrix):
@@ -79,17 +102,38 @@ def BillerBiemann(im: BaseIntensityMatrix, points: int = 3, scans: int = 1) -> L
 	if not isinstance(scans, int):
 		raise TypeError("'scans' must be an integer")
 
-	rt_list = im.time_list
-	mass_list = im.mass_list
+	maxima_im = get_maxima_matrix(im, points, scans, executor=executor)
+
+	return _peaks_from_maxima(maxima_im, im.time_list, im._get_mass_axis())
+
+
+def _peaks_from_maxima(
+		maxima_im: numpy.ndarray,
+		rt_list: Sequence[float],
+		mass_list: Union[Sequence[float], numpy.ndarray],
+		row_offset: int = 0,
+		) -> List[Peak]:
+	"""
+	Constructs peaks from the scans of a maxima matrix with a positive total intensity.
+
+	:param maxima_im: Matrix of ion intensities at their apexes, with rows as scans and columns as ions.
+	:param rt_list: The retention times of the rows of ``maxima_im``.
+	:param mass_list: The masses of the columns of ``maxima_im``.
+	:param row_offset: The index of the first row of ``maxima_im`` in the intensity matrix.
+	"""
+
 	peak_list = []
-	maxima_im = get_maxima_matrix(im, points, scans)
 
-	for row_idx, row in enumerate(maxima_im):
+	# All of the mass spectra share a single read-only mass axis
+	mass_axis = _readonly_array(mass_list)
+
+	for row_idx in numpy.flatnonzero(maxima_im.any(axis=1)).tolist():
+		row = maxima_im[row_idx]
 		if sum(row) > 0:
 			rt = rt_list[row_idx]
-			ms = MassSpectrum(mass_list, row)
+			ms = MassSpectrum(mass_axis, row)
 			peak = Peak(rt, ms)
-			peak.bounds = (0, row_idx, 0)  # store IM index for convenience
+			peak.bounds = (0, row_idx + row_offset, 0)  # store IM index for convenience
 			# TODO: can the bounds be determined from the intensity matrix?
 			peak_list.append(peak)
 
@@ -125,39 +169,145 @@ def get_maxima_indices(ion_intensities: Union[Sequence, numpy.ndarray], points:
 	if not isinstance(points, int):
 		raise TypeError("'points' must be an integer")
 
-	# find peak inflection points
-	# use a 'points' point window
-	# for a plateau after a rise, need to check if it is the left edge of a peak
-	peak_point = []
-	edge = -1
-	points = int(points)
+	maxima_mask = get_maxima_mask(numpy.asarray(ion_intensities)[:, numpy.newaxis], points)
+
+	return numpy.flatnonzero(maxima_mask[:, 0]).tolist()
+
+
+def get_maxima_mask(intensity_array: numpy.ndarray, points: int = 3) -> numpy.ndarray:
+	"""
+	Returns a boolean mask of the apexes of every ion in an intensity matrix.
+
+	The apexes of each column are the same as those found by :func:`~.get_maxima_indices`,
+	but all columns are processed at once.
+
+	:param intensity_array: Two-dimensional array of intensities, with rows as scans and columns as ions.
+	:param points: Number of scans over which to consider a maxima to be a peak.
+
+	:return: A boolean array, the same shape as ``intensity_array``,
+		which is :py:obj:`True` at the apexes of each ion.
+
+	.. versionadded:: 2.4.0
+	"""
+
+	if not isinstance(points, int):
+		raise TypeError("'points' must be an integer")
+
+	intensity_array = numpy.asarray(intensity_array)
+
+	if intensity_array.ndim != 2:
+		raise ValueError("'intensity_array' must be a two-dimensional array")
+
 	half = int(points / 2)
 	points = 2 * half + 1  # ensure odd number of points
 
-	for index in range(len(ion_intensities) - points + 1):
+	if half < 1:
+		raise ValueError("'points' must be at least 2")
+
+	n_rows, n_cols = intensity_array.shape
+	maxima_mask = numpy.zeros((n_rows, n_cols), dtype=bool)
+
+	if n_rows < points:
+		return maxima_mask
+
+	apex_rows, apex_cols, _ = _find_apexes(intensity_array, half, half, numpy.full(n_cols, -1))
+	maxima_mask[apex_rows, apex_cols] = True
+
+	return maxima_mask
+
+
+def _find_apexes(
+		segment: numpy.ndarray,
+		half: int,
+		first_centre: int,
+		edges: numpy.ndarray,
+		) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+	"""
+	Finds the apexes of each ion for the centre points ``segment[half:-half]``.
+
+	:param segment: Two-dimensional array of intensities, with rows as scans and columns as ions.
+	:param half: The number of points either side of the centre point.
+	:param first_centre: The index of the first centre point in the intensity matrix.
+	:param edges: For each ion, the index of the rising edge of a plateau which
+		started before ``first_centre`` and has not yet ended, or ``-1``.
+
+	:return: The row indices and column indices of the apexes, and the updated ``edges``.
+	"""
+
+	n_rows = len(segment)
 
-		left = ion_intensities[index:index + half]
-		mid = ion_intensities[index + half]
-		right = ion_intensities[index + half + 1:index + points]
-		# print(left, mid, right)
+	# Maximum of the ``half`` points either side of each possible centre point.
+	window_max = _sliding_max(segment, half)
+	left = window_max[:-half - 1]
+	right = window_max[half + 1:]
+	mid = segment[half:n_rows - half]
 
-		if mid > max(left) and mid > max(right):
-			# the max value is in the middle
-			peak_point.append(index + half)
-			edge = -1  # ignore previous rising edge
+	# find peak inflection points
+	# for a plateau after a rise, need to check if it is the left edge of a peak
+	peak = (mid > left) & (mid > right)  # the max value is in the middle
+	rise = (mid > left) & (mid == right)  # start of plateau following rise (left of peak?)
+	fall = (mid == left) & (mid > right)  # start of fall from plateau
+
+	peak_rows, peak_cols = numpy.nonzero(peak)
+
+	# A fall only marks a peak (at the mid point of the plateau) if the
+	# previous event for that ion was the rise at the start of the plateau.
+	# Events are ordered by column, then by row.
+	event_cols, event_rows = numpy.nonzero((peak | rise | fall).T)
+	is_rise = rise[event_rows, event_cols]
+	is_fall = fall[event_rows, event_cols]
+	event_rows = event_rows + first_centre
+
+	carried_cols = numpy.flatnonzero(edges >= 0)
+	if len(carried_cols):
+		# The carried rising edges precede every event in the segment.
+		order = numpy.argsort(numpy.concatenate([carried_cols, event_cols]), kind="stable")
+		event_cols = numpy.concatenate([carried_cols, event_cols])[order]
+		event_rows = numpy.concatenate([edges[carried_cols], event_rows])[order]
+		is_rise = numpy.concatenate([numpy.ones(len(carried_cols), dtype=bool), is_rise])[order]
+		is_fall = numpy.concatenate([numpy.zeros(len(carried_cols), dtype=bool), is_fall])[order]
+
+	same_col = event_cols[:-1] == event_cols[1:]
+	after_rise = numpy.zeros_like(is_fall)
+	after_rise[1:] = is_rise[:-1] & same_col
+	plateau = is_fall & after_rise
+
+	edge_rows = event_rows[numpy.flatnonzero(plateau) - 1]
+	centres = (edge_rows + event_rows[plateau]) // 2
+
+	# The plateau (if any) which is still open at the end of the segment.
+	new_edges = edges.copy()
+	if len(event_cols):
+		last_event = numpy.flatnonzero(numpy.append(~same_col, True))
+		new_edges[event_cols[last_event]] = numpy.where(is_rise[last_event], event_rows[last_event], -1)
+
+	apex_rows = numpy.concatenate([peak_rows + first_centre, centres])
+	apex_cols = numpy.concatenate([peak_cols, event_cols[plateau]])
+
+	return apex_rows, apex_cols, new_edges
+
+
+def _sliding_max(intensity_array: numpy.ndarray, width: int) -> numpy.ndarray:
+	"""
+	Returns the maximum of each run of ``width`` consecutive rows of a two-dimensional array.
 
-		elif mid > max(left) and mid == max(right):
-			# start of plateau following rise (left of peak?)
-			edge = index + half  # ignore previous rising edge, update latest
+	:param intensity_array:
+	:param width:
 
-		elif mid == max(left) and mid > max(right):
-			# start of fall from plateau
-			if edge > -1:
-				centre = int((edge + index + half) / 2)  # mid point
-				peak_point.append(centre)
-			edge = -1
+	:return: An array with ``len(intensity_array) - width + 1`` rows.
+	"""
 
-	return peak_point
+	n_rows, n_cols = intensity_array.shape
+	row_stride, col_stride = intensity_array.strides
+
+	windows = as_strided(
+			intensity_array,
+			shape=(n_rows - width + 1, width, n_cols),
+			strides=(row_stride, row_stride, col_stride),
+			writeable=False,
+			)
+
+	return windows.max(axis=1)
 
 
 def get_maxima_list(ic: IonChromatogram, points: int = 3) -> List[List[float]]:
@@ -231,7 +381,12 @@ def get_maxima_list_reduced(
 	return maxima_list
 
 
-def get_maxima_matrix(im: BaseIntensityMatrix, points: int = 3, scans: int = 1) -> numpy.ndarray:
+def get_maxima_matrix(
+		im: BaseIntensityMatrix,
+		points: int = 3,
+		scans: int = 1,
+		executor: Optional[Executor] = None,
+		) -> numpy.ndarray:
 	"""
 	Constructs a matrix containing only data for scans in which particular ions apexed.
 
@@ -242,13 +397,20 @@ def get_maxima_matrix(im: BaseIntensityMatrix, points: int = 3, scans: int = 1)
 	The columns are ion masses and the rows are scans.
 	Get matrix of local maxima for each ion.
 
+	If an ``executor`` is given the apexes are found for blocks of ions in parallel,
+	and the data is then consolidated in parallel for segments of the run separated
+	by at least ``scans`` scans without any apexes. The result is identical to the serial one.
+
 	:param im:
 	:param points: Number of scans over which to consider a maxima to be a peak.
 	:param scans: Number of scans to combine peaks from to compensate for spectra skewing.
+	:param executor: Optional :class:`concurrent.futures.Executor` to run the calculation in parallel.
 
 	:return: A matrix of giving the intensities of ion masses (columns) and for each scan (rows).
 
 	:author: Andrew Isaac, Dominic Davis-Foster (type assertions)
+
+	.. versionchanged:: 2.4.0  Added the ``executor`` argument.
 	"""
 
 	if not isinstance(im, BaseIntensityMatrix):
@@ -266,56 +428,185 @@ def get_maxima_matrix(im: BaseIntensityMatrix, points: int = 3, scans: int = 1)
 	raw_im = im.intensity_array
 
 	# Construct a 2d array which is all zeros apart from the apexing ions
-	for col in range(numcols):  # assume all rows have same width
-		# 1st, find maxima
-		maxima = get_maxima_indices(raw_im[:, col], points)
+	if executor is None:
+		maxima_mask = get_maxima_mask(raw_im, points)
+	else:
+		ion_blocks = [raw_im[:, start:start + _ION_BLOCK_SIZE] for start in range(0, numcols, _ION_BLOCK_SIZE)]
+		maxima_mask = numpy.hstack(list(executor.map(get_maxima_mask, ion_blocks, [points] * len(ion_blocks))))
 
-		# 2nd, fill intensities
-		for row in maxima:
-			maxima_im[row, col] = raw_im[row, col]
+	maxima_im[maxima_mask] = raw_im[maxima_mask]
 
 	# combine spectra within 'scans' scans.
+	# Consolidation can move data into a scan at the end of the matrix if the
+	# total intensity of every scan in a window is not positive, so the run can
+	# only be divided into independent segments if there are no negative intensities.
+	if executor is None or scans < 2 or (maxima_im < 0).any():
+		_consolidate_scans(maxima_im, scans)
+	else:
+		bounds = _segment_bounds(maxima_im.any(axis=1), scans)
+		segments = [maxima_im[start:stop] for start, stop in bounds]
+		maxima_im = numpy.concatenate(list(executor.map(_consolidate_segment, segments, [scans] * len(segments))))
+
+	return maxima_im
+
+
+def _segment_bounds(has_data: numpy.ndarray, scans: int) -> List[Tuple[int, int]]:
+	"""
+	Divides a run into segments which can be consolidated independently.
+
+	Each segment after the first starts with at least ``scans`` scans without data,
+	so no consolidation window contains data from two segments.
+
+	:param has_data: Array indicating whether each scan contains any apexes.
+	:param scans: Number of scans to combine peaks from to compensate for spectra skewing.
+
+	:return: List of ``(start, stop)`` row indices for each segment.
+	"""
+
+	numrows = len(has_data)
+	data_rows = numpy.flatnonzero(has_data)
+
+	# Possible segment starts are the first row of each gap of at least ``scans`` empty rows.
+	gaps = numpy.diff(data_rows) - 1
+	cut_candidates = data_rows[:-1][gaps >= scans] + 1
+
+	bounds = []
+	start = 0
+	for cut in cut_candidates.tolist():
+		if cut - start >= _SEGMENT_SIZE:
+			bounds.append((start, cut))
+			start = cut
+	bounds.append((start, numrows))
+
+	return bounds
+
+
+def _consolidate_segment(segment: numpy.ndarray, scans: int) -> numpy.ndarray:
+	"""
+	Returns a consolidated copy of a segment of a maxima matrix.
+
+	:param segment:
+	:param scans: Number of scans to combine peaks from to compensate for spectra skewing.
+	"""
+
+	segment = segment.copy()
+	_consolidate_scans(segment, scans)
+	return segment
+
+
+def _consolidate_scans(maxima_im: numpy.ndarray, scans: int):
+	"""
+	Consolidates the data within each window of ``scans`` scans into the scan with the highest total intensity.
+
+	Windows are processed in order, so data may be moved more than once.
+	The matrix is modified in place.
+
+	:param maxima_im: Matrix of ion intensities at their apexes, with rows as scans and columns as ions.
+	:param scans: Number of scans to combine peaks from to compensate for spectra skewing.
+	"""
+
+	numrows = len(maxima_im)
 	half = int(scans / 2)
 
-	for row_idx in range(numrows):
-		# print(f"{row_idx=}")
-		# tic = 0
-		best = 0
-		loc = 0
-
-		# find best in scans
-		for ii in range(scans):
-			# print(f"{ii=}")
-
-			# Check the scan window around row_idx is not
-			# out of range on left (0) or right (numrows)
-			if 0 <= row_idx - half + ii < numrows:
-				# print(row_idx - half + ii)
-				tic = maxima_im[row_idx - half + ii].sum()
-
-				# find the index of the scan in the window with the highest TIC intensity
-				if tic > best:
-					best = tic
-					loc = ii
-
-		for ii in range(scans):
-			# Consolidate data in scan with highest TIC
-			source_idx = row_idx - half + ii  # the scan to move data from
-			dest_idx = row_idx - half + loc  # the scan to move data into
-			if 0 <= source_idx < numrows and ii != loc:
-				for col in range(numcols):
-					maxima_im[dest_idx, col] += maxima_im[source_idx, col]
-					maxima_im[source_idx, col] = 0
+	if scans < 2 or not numrows:
+		return
+
+	# The TIC of each scan, updated as data is moved between scans.
+	tic = maxima_im.sum(axis=1)
+
+	# Data is only ever moved into the scan with the highest TIC, which already
+	# contains data, or into the first scan of the window. The latter is always to the
+	# left of any subsequent window, so a window can only contain data if it contains
+	# a scan which contained data to begin with. All other windows can be skipped.
+	# Windows which begin before the first scan use its index relative to the end of
+	# the matrix, so the final windows must always be processed.
+	has_data = maxima_im.any(axis=1).astype(int)
+	window_data = numpy.convolve(has_data, numpy.ones(scans, dtype=int))[scans - 1 - half:scans - 1 - half + numrows]
+	window_data[-scans:] = 1
+
+	for row_idx in numpy.flatnonzero(window_data).tolist():
+		_consolidate_window(maxima_im, tic, row_idx - half, scans)
 
-	return maxima_im
+
+def _consolidate_window(maxima_im: numpy.ndarray, tic: numpy.ndarray, start: int, scans: int):
+	"""
+	Consolidates the data within the window of ``scans`` scans beginning at ``start`` into the scan with the highest total intensity.
+
+	:param maxima_im: Matrix of ion intensities at their apexes, with rows as scans and columns as ions.
+	:param tic: The TIC of each scan, which is updated as data is moved.
+	:param start: The index of the first scan in the window.
+	:param scans: Number of scans to combine peaks from to compensate for spectra skewing.
+	"""
+
+	numrows = len(maxima_im)
+	best = 0
+	loc = 0
+
+	# find the index of the scan in the window with the highest TIC intensity
+	for ii in range(scans):
+		# Check the scan window is not out of range on left (0) or right (numrows)
+		if 0 <= start + ii < numrows:
+			if tic[start + ii] > best:
+				best = tic[start + ii]
+				loc = ii
+
+	# Consolidate data in scan with highest TIC
+	dest_idx = start + loc  # the scan to move data into
+
+	for ii in range(scans):
+		source_idx = start + ii  # the scan to move data from
+		if 0 <= source_idx < numrows and ii != loc:
+			maxima_im[dest_idx] += maxima_im[source_idx]
+			maxima_im[source_idx] = 0
+			tic[source_idx] = 0
+
+	tic[dest_idx] = maxima_im[dest_idx].sum()
+
+
+@overload
+def num_ions_threshold(
+		pl: Union[Sequence[Peak], PeakTable],
+		n: int,
+		cutoff: float,
+		copy_peaks: bool = ...,
+		*,
+		return_mask: Literal[True],
+		) -> numpy.ndarray:
+	...  # pragma: no cover
+
+
+@overload
+def num_ions_threshold(
+		pl: PeakTable,
+		n: int,
+		cutoff: float,
+		copy_peaks: bool = ...,
+		*,
+		return_mask: Literal[False] = ...,
+		) -> PeakTable:
+	...  # pragma: no cover
 
 
+@overload
 def num_ions_threshold(
 		pl: Sequence[Peak],
 		n: int,
 		cutoff: float,
-		copy_peaks: bool = True,
+		copy_peaks: bool = ...,
+		*,
+		return_mask: Literal[False] = ...,
 		) -> List[Peak]:
+	...  # pragma: no cover
+
+
+def num_ions_threshold(
+		pl: Union[Sequence[Peak], PeakTable],
+		n: int,
+		cutoff: float,
+		copy_peaks: bool = True,
+		*,
+		return_mask: bool = False,
+		) -> Union[List[Peak], PeakTable, numpy.ndarray]:
 	"""
 	Remove Peaks where there are fewer than ``n`` ions with intensities above the given threshold.
 
@@ -323,10 +614,19 @@ def num_ions_threshold(
 	:param n: Minimum number of ions that must have intensities above the cutoff.
 	:param cutoff: The minimum intensity threshold.
 	:param copy_peaks: Whether the returned peak list should contain copies of the peaks.
+		The copies share the peaks' read-only mass spectra.
+	:param return_mask: If :py:obj:`True` a boolean array of the peaks which would be kept is
+		returned instead of a new peak list, and nothing is copied.
 
-	:return: A new list of Peak objects.
+	:return: A new list of Peak objects, or a new :class:`~pyms.Peak.List.Table.PeakTable` if ``pl`` is one.
 
 	:author: Andrew Isaac, Dominic Davis-Foster (type assertions)
+
+	.. versionchanged:: 2.4.0
+
+		The number of ions above the threshold is calculated for all peaks at once,
+		and only the peaks which are kept are copied, without copying their mass spectra.
+		Added support for :class:`~pyms.Peak.List.Table.PeakTable`, and the ``return_mask`` argument.
 	"""
 
 	if not is_peak_list(pl):
@@ -338,24 +638,42 @@ def num_ions_threshold(
 	if not is_number(cutoff):
 		raise TypeError("'cutoff' must be a number")
 
+	if isinstance(pl, PeakTable):
+		intensities = pl.intensities
+	else:
+		intensities, _ = _stack_intensities(pl)
+
+	keep = numpy.count_nonzero(intensities >= cutoff, axis=1) >= n
+
+	if return_mask:
+		return keep
+	elif isinstance(pl, PeakTable):
+		return pl[keep]
+
+	new_pl = [peak for peak, keep_peak in zip(pl, keep.tolist()) if keep_peak]
+
 	if copy_peaks:
-		pl = copy.deepcopy(pl)
-
-	new_pl = []
-	for p in pl:
-		ms = p.mass_spectrum
-		ia = ms.mass_spec
-		ions = 0
-		for i in range(len(ia)):
-			if ia[i] >= cutoff:
-				ions += 1
-		if ions >= n:
-			new_pl.append(p)
+		# This filter never changes the peaks, so the copies can share their mass spectra.
+		new_pl = [_copy_peak(peak) for peak in new_pl]
 
 	return new_pl
 
 
-def rel_threshold(pl: Sequence[Peak], percent: float = 2, copy_peaks: bool = True) -> List[Peak]:
+@overload
+def rel_threshold(pl: PeakTable, percent: float = ..., copy_peaks: bool = ...) -> PeakTable:
+	...  # pragma: no cover
+
+
+@overload
+def rel_threshold(pl: Sequence[Peak], percent: float = ..., copy_peaks: bool = ...) -> List[Peak]:
+	...  # pragma: no cover
+
+
+def rel_threshold(
+		pl: Union[Sequence[Peak], PeakTable],
+		percent: float = 2,
+		copy_peaks: bool = True,
+		) -> Union[List[Peak], PeakTable]:
 	"""
 	Remove ions with relative intensities less than the given relative
 	percentage of the maximum intensity.
@@ -365,14 +683,18 @@ def rel_threshold(pl: Sequence[Peak], percent: float = 2, copy_peaks: bool = Tru
 	:default percent: ``2%``
 	:param copy_peaks: Whether the returned peak list should contain copies of the peaks.
 
-	:return: A new list of Peak objects with threshold ions.
+	:return: A new list of Peak objects with threshold ions, or a :class:`~pyms.Peak.List.Table.PeakTable` if ``pl`` is one.
 
 	:author: Andrew Isaac, Dominic Davis-Foster (type assertions)
-	"""  # noqa: D400
 
-	peak_list = pl
+	.. versionchanged:: 2.4.0
+
+		The thresholds are calculated for all peaks at once, and only
+		the mass spectra are copied when ``copy_peaks`` is :py:obj:`True`.
+		Added support for :class:`~pyms.Peak.List.Table.PeakTable`.
+	"""  # noqa: D400
 
-	if not is_peak_list(peak_list):
+	if not is_peak_list(pl):
 		raise TypeError("'pl' must be a list of Peak objects")
 	if not is_number(percent):
 		raise TypeError("'percent' must be a number > 0")
@@ -380,28 +702,77 @@ def rel_threshold(pl: Sequence[Peak], percent: float = 2, copy_peaks: bool = Tru
 	if percent <= 0:
 		raise ValueError("'percent' must be a number > 0")
 
-	if copy_peaks:
-		peak_list = copy.deepcopy(peak_list)
+	if isinstance(pl, PeakTable):
+		table = pl.copy() if copy_peaks else pl
+		if len(table):
+			intensities = table.intensities
+			cutoff = (intensities.max(axis=1) / 100.0) * float(percent)
+			intensities[intensities < cutoff[:, None]] = 0
+			table.make_UIDs()
+		return table
+
+	if not pl:
+		return []
+
+	intensities, lengths = _stack_intensities(pl)
+
+	# assume max(ia) big so /100 1st
+	cutoff = (numpy.nanmax(intensities, axis=1) / 100.0) * float(percent)
+	with numpy.errstate(invalid="ignore"):
+		below_cutoff = intensities < cutoff[:, None]
 
 	new_peak_list = []
-	for peak in peak_list:
-		ms = peak.mass_spectrum
-		# if ms is None:
-		# 	raise ValueError("The peak has no mass spectrum.")
-
-		ia = ms.mass_spec
-		# assume max(ia) big so /100 1st
-		cutoff = (max(ia) / 100.0) * float(percent)
-		for i in range(len(ia)):
-			if ia[i] < cutoff:
-				ia[i] = 0
-		ms.mass_spec = ia
-		peak.mass_spectrum = ms
+	for peak, ia, below, length in zip(pl, intensities, below_cutoff, lengths):
+		if copy_peaks:
+			peak = _copy_peak(peak)
+
+		peak.mass_spectrum = MassSpectrum(peak.mass_spectrum.mass_array, numpy.where(below, 0, ia)[:length])
 		new_peak_list.append(peak)
 
 	return new_peak_list
 
 
+def _stack_intensities(peak_list: Sequence[Peak]) -> Tuple[numpy.ndarray, List[int]]:
+	"""
+	Stacks the intensities of the peaks' mass spectra into a matrix with rows as peaks and columns as ions.
+
+	Shorter mass spectra are padded with ``NaN``.
+
+	:param peak_list:
+
+	:return: The matrix, and the number of intensities in each mass spectrum.
+	"""
+
+	# The copies of the mass spectra returned by Peak.mass_spectrum share the read-only intensity arrays.
+	spectra = [peak.mass_spectrum.intensity_array for peak in peak_list]
+	lengths = [len(spectrum) for spectrum in spectra]
+	width = max(lengths, default=0)
+
+	if all(length == width for length in lengths):
+		return numpy.array(spectra, dtype=float).reshape(len(spectra), width), lengths
+
+	intensities = numpy.full((len(spectra), width), numpy.nan)
+	for row, spectrum in enumerate(spectra):
+		intensities[row, :len(spectrum)] = spectrum
+
+	return intensities, lengths
+
+
+def _copy_peak(peak: Peak) -> Peak:
+	"""
+	Returns a copy of the peak which shares its mass spectrum.
+
+	Peaks replace their mass spectra rather than modifying them in place, so this is safe,
+	and is much cheaper than :func:`copy.deepcopy`.
+
+	:param peak:
+	"""
+
+	new_peak = copy.copy(peak)
+	new_peak._ion_areas = dict(peak._ion_areas)
+	return new_peak
+
+
 def sum_maxima(im: BaseIntensityMatrix, points: int = 3, scans: int = 1) -> IonChromatogram:
 	"""
 	Reconstruct the TIC as sum of maxima.
@@ -425,16 +796,316 @@ def sum_maxima(im: BaseIntensityMatrix, points: int = 3, scans: int = 1) -> IonC
 		raise TypeError("'scans' must be an integer")
 
 	maxima_im = get_maxima_matrix(im, points)
-	sums = []
 	numrows = len(maxima_im)
 	half = int(scans / 2)
 
-	for row in range(numrows):
-		val = 0
-		for ii in range(scans):
-			if 0 <= row - half + ii < numrows:
-				val += maxima_im[row - half + ii].sum()
-		sums.append(val)
-	tic = IonChromatogram(numpy.array(sums), im.time_list)
+	# Pad the TIC of the maxima with zeros either side so every window is in range.
+	maxima_tic = numpy.zeros(numrows + scans)
+	maxima_tic[half:half + numrows] = maxima_im.sum(axis=1)
+
+	sums = numpy.zeros(numrows)
+	for ii in range(scans):
+		sums += maxima_tic[ii:ii + numrows]
+
+	tic = IonChromatogram(sums, im.time_list)
 
 	return tic
+
+
+class StreamingBillerBiemann:
+	"""
+	Biller and Biemann deconvolution of scans as they are read, without holding the complete intensity matrix in memory.
+
+	Blocks of scans are passed to :meth:`~.StreamingBillerBiemann.push`, optionally
+	preprocessed with a :class:`~pyms.Noise.Streaming.StreamingProcessor`, and the peaks
+	which can no longer be affected by later scans are returned. When the run is
+	complete, :meth:`~.StreamingBillerBiemann.flush` returns the remaining peaks.
+
+	Only the scans still needed are retained: the context for the preprocessing filter,
+	the ``points`` scans either side of the scans being checked for apexes, any
+	plateau which has not yet ended, and the ``scans`` scans which may still be consolidated.
+	Provided there are no negative intensities the peaks are the same as from
+	:func:`~.BillerBiemann` for the complete (preprocessed) intensity matrix,
+	regardless of how the scans are divided into blocks.
+
+	The apex of a plateau is at its midpoint, which is not known until the plateau ends,
+	so the scans from the start of a plateau are retained until it ends.
+	To keep the memory used proportional to the size of the blocks, ``points`` and ``max_plateau``,
+	a plateau which is longer than ``max_plateau`` scans (e.g. from detector saturation or a step
+	in the baseline) is not treated as an apex. These are the only peaks which differ from
+	:func:`~.BillerBiemann`. If ``max_plateau`` is :py:obj:`None` plateaus of any length are
+	found, but the scans from the start of a plateau to the end of the run may be retained.
+
+	:param mass_list: The masses of the columns of the scans.
+	:param points: Number of scans over which to consider a maxima to be a peak.
+	:param scans: Number of scans to combine peaks from to compensate for spectra skewing.
+	:param preprocess: Optional filter to apply to the scans before peak detection.
+	:param max_plateau: The maximum length of a plateau, in scans, for it to be treated as an apex.
+
+	.. versionadded:: 2.4.0
+	"""
+
+	def __init__(
+			self,
+			mass_list: Sequence[float],
+			points: int = 3,
+			scans: int = 1,
+			preprocess: Optional[StreamingProcessor] = None,
+			max_plateau: Optional[int] = 256,
+			):
+
+		if not is_sequence_of(mass_list, _number_types):
+			raise TypeError("'mass_list' must be a Sequence of numbers")
+
+		if not isinstance(points, int):
+			raise TypeError("'points' must be an integer")
+
+		if not isinstance(scans, int):
+			raise TypeError("'scans' must be an integer")
+
+		if preprocess is not None and not isinstance(preprocess, StreamingProcessor):
+			raise TypeError("'preprocess' must be a StreamingProcessor object")
+
+		if max_plateau is not None:
+			if not isinstance(max_plateau, int):
+				raise TypeError("'max_plateau' must be an integer")
+			if max_plateau < 1:
+				raise ValueError("'max_plateau' must be at least 1")
+
+		self._half = int(points / 2)
+		if self._half < 1:
+			raise ValueError("'points' must be at least 2")
+
+		self._mass_axis = _readonly_array(mass_list)
+		self._scans = scans
+		self._preprocess = preprocess
+		self._max_plateau = max_plateau
+
+		self.reset()
+
+	def reset(self):
+		"""
+		Discards all buffered scans, ready for a new run.
+		"""
+
+		n_cols = len(self._mass_axis)
+
+		if self._preprocess is not None:
+			self._preprocess.reset()
+
+		# Retention times, from the first scan pending consolidation.
+		self._times: List[float] = []
+		self._times_start = 0
+
+		# Scans for apex detection.
+		self._raw = numpy.empty((0, n_cols))
+		self._mask = numpy.empty((0, n_cols), dtype=bool)
+		self._raw_start = 0
+		self._n_rows = 0
+		self._next_centre = self._half
+		self._edges = numpy.full(n_cols, -1)
+		self._n_final = 0
+
+		# Scans of apexes pending consolidation.
+		self._pending = numpy.empty((0, n_cols))
+		self._pending_tic = numpy.empty(0)
+		self._pending_start = 0
+		self._next_window = 0
+
+	def push(
+			self,
+			time_list: Sequence[float],
+			scans: Union[Sequence[Sequence[float]], numpy.ndarray],
+			) -> List[Peak]:
+		"""
+		Adds a block of new scans.
+
+		:param time_list: The retention times of the scans.
+		:param scans: The new scans, as rows of intensities.
+
+		:return: Peaks which can no longer be affected by later scans.
+		"""
+
+		scans = numpy.array(scans, dtype=float, ndmin=2)
+
+		if len(time_list) != len(scans):
+			raise ValueError("'time_list' is not the same length as 'scans'")
+
+		if scans.shape[1] != len(self._mass_axis):
+			raise ValueError("'mass_list' is not the same size as the scans")
+
+		self._times.extend(time_list)
+
+		if self._preprocess is not None:
+			scans = self._preprocess.push(scans)
+
+		return self._consolidate(self._find_maxima(scans))
+
+	def flush(self) -> List[Peak]:
+		"""
+		Returns the remaining peaks, treating the scans received so far as the complete run.
+
+		The detector is reset afterwards.
+		"""
+
+		scans = numpy.empty((0, len(self._mass_axis)))
+
+		if self._preprocess is not None:
+			remaining = self._preprocess.flush()
+			if len(remaining):
+				scans = remaining
+
+		peak_list = self._consolidate(self._find_maxima(scans, final=True), final=True)
+		self.reset()
+
+		return peak_list
+
+	def process(self, blocks: Iterable[Tuple[Sequence[float], numpy.ndarray]]) -> List[Peak]:
+		"""
+		Detects the peaks in a complete run.
+
+		:param blocks: Iterable of retention times and scans, such as from :func:`~.iter_scan_blocks`.
+		"""
+
+		peak_list = []
+
+		for time_list, scans in blocks:
+			peak_list.extend(self.push(time_list, scans))
+
+		peak_list.extend(self.flush())
+
+		return peak_list
+
+	def _find_maxima(self, scans: numpy.ndarray, final: bool = False) -> numpy.ndarray:
+		"""
+		Finds apexes in the new scans, and returns the rows of the maxima matrix which are now final.
+
+		:param scans:
+		:param final: Whether the last scan is the end of the run.
+		"""
+
+		half = self._half
+
+		self._raw = numpy.concatenate([self._raw, scans])
+		self._mask = numpy.concatenate([self._mask, numpy.zeros(scans.shape, dtype=bool)])
+		self._n_rows += len(scans)
+
+		stop_centre = self._n_rows - half
+		if stop_centre > self._next_centre:
+			segment = self._raw[self._next_centre - half - self._raw_start:stop_centre + half - self._raw_start]
+			apex_rows, apex_cols, self._edges = _find_apexes(segment, half, self._next_centre, self._edges)
+			self._mask[apex_rows - self._raw_start, apex_cols] = True
+			self._next_centre = stop_centre
+
+		if self._max_plateau is not None:
+			# Plateaus which have been open for too long are no longer apexes, so their scans need not be retained.
+			self._edges[(self._edges >= 0) & (self._next_centre - self._edges > self._max_plateau)] = -1
+
+		# A plateau which has not yet ended may have an apex anywhere after its rising edge.
+		open_edges = self._edges[self._edges >= 0]
+		if final:
+			safe = self._n_rows
+		elif len(open_edges):
+			safe = min(self._next_centre, self._n_rows, int(open_edges.min()))
+		else:
+			safe = min(self._next_centre, self._n_rows)
+
+		start = self._n_final - self._raw_start
+		stop = safe - self._raw_start
+		maxima = numpy.where(self._mask[start:stop], self._raw[start:stop], 0)
+		self._n_final = safe
+
+		# discard scans that are no longer needed
+		keep_from = min(safe, self._next_centre - half) - self._raw_start
+		self._raw = self._raw[keep_from:]
+		self._mask = self._mask[keep_from:]
+		self._raw_start += keep_from
+
+		return maxima
+
+	def _consolidate(self, maxima: numpy.ndarray, final: bool = False) -> List[Peak]:
+		"""
+		Consolidates each window of ``scans`` scans once all of its scans are available.
+
+		:param maxima: The next rows of the maxima matrix.
+		:param final: Whether the last scan is the end of the run.
+
+		:return: The peaks in the scans which can no longer be changed by consolidation.
+		"""
+
+		scans = self._scans
+		half = int(scans / 2)
+
+		self._pending = numpy.concatenate([self._pending, maxima])
+		self._pending_tic = numpy.concatenate([self._pending_tic, maxima.sum(axis=1)])
+		offset = self._pending_start
+		n_rows = offset + len(self._pending)
+
+		if scans < 2:
+			stop = n_rows
+		else:
+			if final:
+				window_stop = n_rows
+			else:
+				window_stop = max(self._next_window, n_rows - scans + half + 1)
+
+			if window_stop > self._next_window:
+				# As in :func:`~._consolidate_scans`, only windows containing data need to be processed.
+				has_data = self._pending.any(axis=1).astype(int)
+				window_data = numpy.convolve(has_data, numpy.ones(scans, dtype=int))
+
+				for row_idx in range(self._next_window, window_stop):
+					start = row_idx - half - offset
+					if window_data[start + scans - 1]:
+						_consolidate_window(self._pending, self._pending_tic, start, scans)
+
+			self._next_window = window_stop
+
+			# Scans before the start of the next window will not be changed again.
+			stop = n_rows if final else max(offset, window_stop - half)
+
+		cut = stop - offset
+		if not cut:
+			return []
+
+		peak_list = _peaks_from_maxima(
+				self._pending[:cut],
+				self._times[offset - self._times_start:stop - self._times_start],
+				self._mass_axis,
+				row_offset=offset,
+				)
+
+		self._pending = self._pending[cut:]
+		self._pending_tic = self._pending_tic[cut:]
+		self._pending_start = stop
+		del self._times[:stop - self._times_start]
+		self._times_start = stop
+
+		return peak_list
+
+
+def iter_scan_blocks(
+		intensity_array: numpy.ndarray,
+		time_list: Sequence[float],
+		block_size: int = _SEGMENT_SIZE,
+		) -> Iterator[Tuple[List[float], numpy.ndarray]]:
+	"""
+	Yields successive blocks of scans from an intensity array, for use with :class:`~.StreamingBillerBiemann`.
+
+	The array may be a :class:`numpy.memmap` (e.g. from :func:`numpy.load` with ``mmap_mode='r'``),
+	in which case only one block at a time is read into memory.
+
+	:param intensity_array: Two-dimensional array of intensities, with rows as scans and columns as ions.
+	:param time_list: The retention times of the scans.
+	:param block_size: The number of scans in each block.
+
+	:return: Iterator of the retention times and intensities of each block of scans.
+
+	.. versionadded:: 2.4.0
+	"""
+
+	if len(time_list) != len(intensity_array):
+		raise ValueError("'time_list' is not the same length as 'intensity_array'")
+
+	for start in range(0, len(intensity_array), block_size):
+		yield list(time_list[start:start + block_size]), numpy.array(intensity_array[start:start + block_size])
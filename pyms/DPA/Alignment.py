@@ -28,7 +28,7 @@ import copy
 import math
 import operator
 import pathlib
-from typing import Dict, List, Optional, Sequence
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 
 # 3rd party
 import numpy  # type: ignore
@@ -39,42 +39,237 @@ from pandas import DataFrame
 # this package
 from pyms.Experiment import Experiment
 from pyms.Peak import Peak
-from pyms.Peak.List.Function import composite_peak
+from pyms.Spectrum import MassSpectrum
 from pyms.Utils.IO import prepare_filepath
 from pyms.Utils.Utils import _number_types, is_path, is_sequence, is_sequence_of
 
-__all__ = ["Alignment", "exprl2alignment"]
+__all__ = ["Alignment", "PositionAggregates", "exprl2alignment"]
+
+_different_lengths_msg = """Mass Spectra are of different lengths.
+Use `IntensityMatrix.crop_mass()` to set same length for all Mass Spectra"""
 
 # Ensure that the intersphinx links are correct.
 DataFrame.__module__ = "pandas"
 
 
+class PositionAggregates(NamedTuple):
+	"""
+	Summary statistics of the peaks in each position of an :class:`~.Alignment`.
+
+	.. versionadded:: 2.4.0
+	"""
+
+	#: The number of peaks in each position.
+	counts: numpy.ndarray
+
+	#: The sum of the retention times of the peaks in each position.
+	rt_sums: numpy.ndarray
+
+	#: The earliest retention time of the peaks in each position.
+	rt_min: numpy.ndarray
+
+	#: The latest retention time of the peaks in each position.
+	rt_max: numpy.ndarray
+
+	#: The sum of the spectra of the peaks in each position, with each spectrum scaled to a maximum intensity of 100.
+	spectrum_sums: numpy.ndarray
+
+	#: The Euclidean norm of each spectrum in :attr:`~.PositionAggregates.spectrum_sums`.
+	spectrum_norms: numpy.ndarray
+
+	#: The masses of the spectra.
+	mass_list: List[float]
+
+	@property
+	def rt_mean(self) -> numpy.ndarray:
+		"""
+		The mean retention time of the peaks in each position.
+		"""
+
+		with numpy.errstate(invalid="ignore", divide="ignore"):
+			return self.rt_sums / self.counts
+
+	@property
+	def composite_spectra(self) -> numpy.ndarray:
+		"""
+		The mean of the scaled spectra of the peaks in each position,
+		as used by :func:`~pyms.Peak.List.Function.composite_peak`.
+		"""
+
+		with numpy.errstate(invalid="ignore", divide="ignore"):
+			return self.spectrum_sums / self.counts[:, None]
+
+	def _take(self, positions: numpy.ndarray) -> "PositionAggregates":
+		"""
+		Returns the aggregates of the given positions. A position of ``-1`` gives an empty position.
+
+		:param positions:
+		"""
+
+		return PositionAggregates(
+				numpy.append(self.counts, 0)[positions],
+				numpy.append(self.rt_sums, 0.0)[positions],
+				numpy.append(self.rt_min, numpy.inf)[positions],
+				numpy.append(self.rt_max, -numpy.inf)[positions],
+				numpy.vstack([self.spectrum_sums, numpy.zeros((1, self.spectrum_sums.shape[1]))])[positions],
+				numpy.append(self.spectrum_norms, 0.0)[positions],
+				self.mass_list,
+				)
+
+	@classmethod
+	def _merge(
+			cls,
+			aggregates1: "PositionAggregates",
+			positions1: numpy.ndarray,
+			aggregates2: "PositionAggregates",
+			positions2: numpy.ndarray,
+			) -> "PositionAggregates":
+		"""
+		Returns the aggregates of the positions formed by merging positions of two alignments.
+
+		:param aggregates1: The aggregates of the first alignment.
+		:param positions1: The position in the first alignment of each merged position, or ``-1``.
+		:param aggregates2: The aggregates of the second alignment.
+		:param positions2: The position in the second alignment of each merged position, or ``-1``.
+		"""
+
+		part1 = aggregates1._take(positions1)
+		part2 = aggregates2._take(positions2)
+
+		# An alignment without any peaks has no masses
+		if not len(aggregates1.mass_list):
+			spectrum_sums = part2.spectrum_sums
+		elif not len(aggregates2.mass_list):
+			spectrum_sums = part1.spectrum_sums
+		elif part1.spectrum_sums.shape[1] != part2.spectrum_sums.shape[1]:
+			raise ValueError(_different_lengths_msg)
+		else:
+			spectrum_sums = part1.spectrum_sums + part2.spectrum_sums
+
+		return cls(
+				part1.counts + part2.counts,
+				part1.rt_sums + part2.rt_sums,
+				numpy.minimum(part1.rt_min, part2.rt_min),
+				numpy.maximum(part1.rt_max, part2.rt_max),
+				spectrum_sums,
+				numpy.sqrt(numpy.sum(spectrum_sums**2, axis=1)),
+				aggregates1.mass_list if len(aggregates1.mass_list) else aggregates2.mass_list,
+				)
+
+
+def _stack_intensities(peaks: Sequence[Peak]) -> numpy.ndarray:
+	"""
+	Returns the intensities of the mass spectra of the peaks, one row per peak.
+
+	:param peaks:
+	"""
+
+	try:
+		intensities = numpy.array([peak.mass_spectrum.intensity_array for peak in peaks], dtype=float)
+	except ValueError:
+		raise ValueError(_different_lengths_msg)
+
+	if intensities.ndim != 2:
+		raise ValueError(_different_lengths_msg)
+
+	return intensities
+
+
+class _PeakArrays(NamedTuple):
+	"""
+	The retention times and unit spectra of the peaks of an experiment, for scoring alignments.
+	"""
+
+	rts: numpy.ndarray
+
+	#: The spectra scaled to unit length.
+	spectra: numpy.ndarray
+
+	#: The intensity arrays of the peaks' mass spectra when the arrays were created.
+	sources: List[numpy.ndarray]
+
+	@classmethod
+	def from_peaks(cls, peaks: Sequence[Peak]) -> "_PeakArrays":
+		"""
+		Create the arrays for a list of peaks.
+
+		:param peaks:
+		"""
+
+		rts = numpy.array([peak.rt for peak in peaks], dtype=float)
+		sources = [peak.mass_spectrum.intensity_array for peak in peaks]
+
+		if not peaks:
+			return cls(rts, numpy.zeros((0, 0)), sources)
+
+		intensities = _stack_intensities(peaks)
+		norms = numpy.sqrt(numpy.sum(intensities**2, axis=1))
+
+		# Spectra with no intensity have a cosine similarity of 0 with everything
+		spectra = numpy.divide(
+				intensities,
+				norms[:, None],
+				out=intensities,
+				where=norms[:, None] > 0,
+				)
+
+		return cls(rts, spectra, sources)
+
+	def is_current(self, peaks: Sequence[Peak]) -> bool:
+		"""
+		Returns whether the mass spectra of the peaks are unchanged since the arrays were created.
+
+		The intensities of a mass spectrum are a read-only array, which is replaced
+		whenever the peak's mass spectrum is changed.
+
+		:param peaks:
+		"""
+
+		if len(peaks) != len(self.sources):
+			return False
+
+		return all(map(operator.is_, (peak.mass_spectrum.intensity_array for peak in peaks), self.sources))
+
+
 class Alignment:
 	"""
 	Models an alignment of peak lists.
 
+	The alignment is stored as the list of peaks of each experiment, and an integer
+	:attr:`~.Alignment.index` matrix giving the index of the peak from each experiment
+	in each position of the alignment, or ``-1`` where the experiment has no peak.
+
+	The peaks are shared with the experiment, and with the alignments created by merging this alignment,
+	rather than copied. The alignments do not change the peaks, but changes made to the peaks elsewhere
+	are seen by the alignments: the cached spectra and :attr:`~.Alignment.aggregates` of an experiment
+	are recalculated when the mass spectrum of one of its peaks has changed.
+	Pass ``copy_peaks=True`` to give the alignment its own copies of the peaks.
+
 	:param expr: The experiment to be converted into an alignment object.
+	:param copy_peaks: Whether to copy the experiment's peaks.
 
-	:authors: Woon Wai Keen, Qiao Wang, Vladimir Likic, Dominic Davis-Foster.
-	"""
+	:authors: Woon Wai Keen, Qiao Wang, Vladimir Likic, Dominic Davis-Foster
 
-	#:
-	peakpos: List[List[Peak]]
+	.. versionchanged:: 2.4.0
+
+		The alignment is now stored as an index matrix into the experiments' peak lists.
+		:attr:`~.Alignment.peakpos` and :attr:`~.Alignment.peakalgt` are now properties.
+
+	.. versionchanged:: 2.4.0
+
+		The peaks are no longer copied unless ``copy_peaks`` is :py:obj:`True`.
+	"""
 
 	#: List of experiment codes.
 	expr_code: List[str]
 
-	#:
-	peakalgt: List[List[Peak]]
-
 	#:
 	similarity: Optional[float]
 
-	def __init__(self, expr: Optional[Experiment]):
+	def __init__(self, expr: Optional[Experiment], copy_peaks: bool = False):
 
 		if expr is None:
-			self.peakpos = []
-			self.peakalgt = []
+			self._set_index([], numpy.empty((0, 0), dtype=numpy.intp))
 			self.expr_code = []
 			self.similarity = None
 		elif not isinstance(expr, Experiment):
@@ -83,11 +278,252 @@ class Alignment:
 			# for peak in expr.peak_list:
 			#    if peak.area() == None or peak.area() <= 0:
 			#        error("All peaks must have an area for alignment")
-			self.peakpos = [copy.deepcopy(expr.peak_list)]
-			self.peakalgt = numpy.transpose(self.peakpos).tolist()
+			if copy_peaks:
+				peak_list = copy.deepcopy(expr.peak_list)
+			else:
+				# Copy the list, so that changes to the experiment's list do not affect the index
+				peak_list = list(expr.peak_list)
+
+			self._set_index([peak_list], numpy.arange(len(peak_list), dtype=numpy.intp).reshape(-1, 1))
 			self.expr_code = [expr.expr_code]
 			self.similarity = None
 
+	def _set_index(
+			self,
+			peak_lists: List[List[Peak]],
+			index: numpy.ndarray,
+			peak_arrays: Optional[Sequence[Optional[_PeakArrays]]] = None,
+			aggregates: Optional[PositionAggregates] = None,
+			) -> None:
+		"""
+		Sets the peak lists of the experiments and the index matrix into them.
+
+		:param peak_lists: The peaks of each experiment.
+		:param index: The index of the peak from each experiment in each position, or ``-1``.
+		:param peak_arrays: The arrays of the peaks of each experiment, if already known.
+		:param aggregates: The aggregates of the positions, if already known.
+		"""
+
+		index = numpy.array(index, dtype=numpy.intp)
+		index.flags.writeable = False
+
+		self._peak_lists = peak_lists
+		self._index = index
+
+		# The arrays, aggregates and lists of peaks are created when first needed
+		if peak_arrays is None:
+			self._peak_arrays: List[Optional[_PeakArrays]] = [None] * len(peak_lists)
+		else:
+			self._peak_arrays = list(peak_arrays)
+		self._aggregates = aggregates
+		self._peakalgt: Optional[List[List[Optional[Peak]]]] = None
+		self._peakpos: Optional[List[List[Optional[Peak]]]] = None
+
+	def _set_positions(self, peakalgt: Sequence[Sequence[Optional[Peak]]]) -> None:
+		"""
+		Sets the alignment from a list of the peaks in each position.
+
+		:param peakalgt: The peak from each experiment in each position, or :py:obj:`None`.
+		"""
+
+		positions = [list(position) for position in peakalgt]
+
+		if positions:
+			n_expr = len(positions[0])
+		else:
+			n_expr = len(self._peak_lists)
+
+		peak_lists: List[List[Peak]] = [[] for _ in range(n_expr)]
+		index = numpy.full((len(positions), n_expr), -1, dtype=numpy.intp)
+
+		for pos_idx, position in enumerate(positions):
+			for expr_idx, peak in enumerate(position):
+				if peak is not None:
+					index[pos_idx, expr_idx] = len(peak_lists[expr_idx])
+					peak_lists[expr_idx].append(peak)
+
+		self._set_index(peak_lists, index)
+
+	@property
+	def index(self) -> numpy.ndarray:
+		"""
+		A read-only (positions × experiments) array giving the index of the peak from each experiment
+		in each position of the alignment, in the corresponding list in :attr:`~.Alignment.peak_lists`.
+		A value of ``-1`` shows that the experiment has no peak in that position.
+
+		.. versionadded:: 2.4.0
+		"""
+
+		return self._index
+
+	@property
+	def peak_lists(self) -> List[List[Peak]]:
+		"""
+		The peaks of each experiment, which :attr:`~.Alignment.index` refers to.
+
+		.. versionadded:: 2.4.0
+		"""
+
+		return self._peak_lists
+
+	@property
+	def peakalgt(self) -> List[List[Optional[Peak]]]:
+		"""
+		The peak from each experiment in each position of the alignment, or :py:obj:`None`.
+
+		.. versionchanged:: 2.4.0
+
+			Now created from :attr:`~.Alignment.index`.
+			Changes to the returned lists are not reflected in the alignment,
+			but a new list of positions may be assigned.
+		"""
+
+		if self._peakalgt is None:
+			peak_lists = self._peak_lists
+			self._peakalgt = [
+					[peak_lists[expr_idx][peak_idx] if peak_idx >= 0 else None for expr_idx, peak_idx in enumerate(position)]
+					for position in self._index.tolist()
+					]
+
+		return self._peakalgt
+
+	@peakalgt.setter
+	def peakalgt(self, peakalgt: Sequence[Sequence[Optional[Peak]]]) -> None:
+		self._set_positions(peakalgt)
+
+	@property
+	def peakpos(self) -> List[List[Optional[Peak]]]:
+		"""
+		The peak in each position of the alignment, or :py:obj:`None`, for each experiment.
+
+		.. versionchanged:: 2.4.0
+
+			Now created from :attr:`~.Alignment.index`.
+			Changes to the returned lists are not reflected in the alignment,
+			but a new list of peaks may be assigned.
+		"""
+
+		if self._peakpos is None:
+			self._peakpos = [
+					[peaks[peak_idx] if peak_idx >= 0 else None for peak_idx in column]
+					for peaks, column in zip(self._peak_lists, self._index.T.tolist())
+					]
+
+		return self._peakpos
+
+	@peakpos.setter
+	def peakpos(self, peakpos: Sequence[Sequence[Optional[Peak]]]) -> None:
+		self._set_positions(list(zip(*peakpos)))
+
+	def _get_peak_arrays(self) -> List[_PeakArrays]:
+		"""
+		Returns the arrays of the peaks of each experiment, creating them if necessary.
+
+		The arrays of experiments whose peaks have changed since the arrays were created are recreated,
+		and the aggregates are discarded.
+		"""
+
+		for expr_idx, (arrays, peaks) in enumerate(zip(self._peak_arrays, self._peak_lists)):
+			if arrays is None or not arrays.is_current(peaks):
+				self._peak_arrays[expr_idx] = _PeakArrays.from_peaks(peaks)
+				self._aggregates = None
+
+		return self._peak_arrays  # type: ignore
+
+	def _peak_positions(self) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+		"""
+		Returns the position, experiment and index in the experiment's peak list of each peak in the alignment,
+		position by position in order of experiment.
+		"""
+
+		pos_idx, expr_idx = numpy.nonzero(self._index >= 0)
+		return pos_idx, expr_idx, self._index[pos_idx, expr_idx]
+
+	def _gather_peaks(self) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+		"""
+		Returns the position, retention time and unit spectrum of each peak in the alignment,
+		position by position in order of experiment.
+		"""
+
+		peak_arrays = self._get_peak_arrays()
+		pos_idx, expr_idx, peak_idx = self._peak_positions()
+
+		offsets = numpy.cumsum([0] + [len(arrays.rts) for arrays in peak_arrays])
+		rows = offsets[expr_idx] + peak_idx
+
+		rts = numpy.concatenate([numpy.zeros(0)] + [arrays.rts for arrays in peak_arrays])[rows]
+
+		with_peaks = [arrays.spectra for arrays in peak_arrays if len(arrays.rts)]
+		if not with_peaks:
+			return pos_idx, rts, numpy.zeros((0, 0))
+
+		if any(spectra.shape[1] != with_peaks[0].shape[1] for spectra in with_peaks):
+			raise ValueError(_different_lengths_msg)
+
+		return pos_idx, rts, numpy.concatenate(with_peaks)[rows]
+
+	@property
+	def aggregates(self) -> PositionAggregates:
+		"""
+		The number of peaks, retention time statistics and summed spectra of each position in the alignment.
+
+		These are calculated when first needed, and are updated by
+		:func:`~pyms.DPA.PairwiseAlignment.merge_alignments` without recalculating them from the peaks.
+		They are recalculated if the mass spectrum of one of the peaks has changed.
+
+		.. versionadded:: 2.4.0
+		"""
+
+		# Discards the aggregates if any of the peaks have changed
+		self._get_peak_arrays()
+
+		if self._aggregates is None:
+			pos_idx, expr_idx, peak_idx = self._peak_positions()
+			peaks = [self._peak_lists[expr][idx] for expr, idx in zip(expr_idx.tolist(), peak_idx.tolist())]
+
+			n_positions = len(self._index)
+			positions, starts, counts = numpy.unique(pos_idx, return_index=True, return_counts=True)
+
+			if peaks:
+				rts = numpy.array([peak.rt for peak in peaks], dtype=float)
+				intensities = _stack_intensities(peaks)
+				mass_list = peaks[0].mass_spectrum.mass_list
+			else:
+				rts = numpy.zeros(0)
+				intensities = numpy.zeros((0, 0))
+				mass_list = []
+
+			aggregates = PositionAggregates(
+					numpy.zeros(n_positions, dtype=numpy.intp),
+					numpy.zeros(n_positions),
+					numpy.full(n_positions, numpy.inf),
+					numpy.full(n_positions, -numpy.inf),
+					numpy.zeros((n_positions, intensities.shape[1])),
+					numpy.zeros(n_positions),
+					mass_list,
+					)
+
+			if peaks:
+				# Scaled in the same way as by composite_peak()
+				maxima = numpy.max(intensities, axis=1, initial=0) / 100.0
+				scaled_spectra = numpy.divide(
+						intensities,
+						maxima[:, None],
+						out=numpy.zeros_like(intensities),
+						where=maxima[:, None] > 0,
+						)
+
+				aggregates.counts[positions] = counts
+				aggregates.rt_sums[positions] = numpy.add.reduceat(rts, starts)
+				aggregates.rt_min[positions] = numpy.minimum.reduceat(rts, starts)
+				aggregates.rt_max[positions] = numpy.maximum.reduceat(rts, starts)
+				aggregates.spectrum_sums[positions] = numpy.add.reduceat(scaled_spectra, starts, axis=0)
+				aggregates.spectrum_norms[:] = numpy.sqrt(numpy.sum(aggregates.spectrum_sums**2, axis=1))
+
+			self._aggregates = aggregates
+
+		return self._aggregates
+
 	def __len__(self) -> int:
 		"""
 		Returns the length of the alignment, defined as the number of
@@ -98,7 +534,7 @@ class Alignment:
 		:authors: Qiao Wang, Vladimir Likic
 		"""  # noqa: D400
 
-		return len(self.peakalgt)
+		return len(self._index)
 
 	def aligned_peaks(self, minutes: bool = False) -> Sequence[Optional[Peak]]:
 		"""
@@ -112,25 +548,21 @@ class Alignment:
 
 		:author: Andrew Isaac
 
-		.. TODO:: minutes currently does nothing
-		"""  # noqa: D400
-
-		# for all peaks found
-		peak_list = []
+		.. versionchanged:: 2.4.0
 
-		for peak_idx in range(len(self.peakpos[0])):
-			# get aligned peaks, ignore missing
+			The composite peaks are now created from the :attr:`~.Alignment.aggregates`.
 
-			new_peak_list = []
-			for align_idx in range(len(self.peakpos)):
-				peak = self.peakpos[align_idx][peak_idx]
+		.. TODO:: minutes currently does nothing
+		"""  # noqa: D400
 
-				if peak is not None:
-					new_peak_list.append(peak)
+		aggregates = self.aggregates
+		peak_list: List[Optional[Peak]] = []
 
-			# create composite
-			new_peak = composite_peak(new_peak_list)
-			peak_list.append(new_peak)
+		for count, rt, spectrum in zip(aggregates.counts, aggregates.rt_mean, aggregates.composite_spectra):
+			if count:
+				peak_list.append(Peak(float(rt), MassSpectrum(aggregates.mass_list, spectrum)))
+			else:
+				peak_list.append(None)
 
 		return peak_list
 
@@ -232,15 +664,14 @@ class Alignment:
 		if not isinstance(min_peaks, int):
 			raise TypeError("'min_peaks' must be an integer")
 
-		filtered_list = []
+		n_peaks = numpy.count_nonzero(self._index >= 0, axis=1)
+		keep = numpy.flatnonzero(n_peaks >= min_peaks)
 
-		for pos in range(len(self.peakalgt)):
-			# if len(filter(None,self.peakalgt[pos])) >= min_peaks:
-			if len([x for x in self.peakalgt[pos] if x is not None]) >= min_peaks:
-				filtered_list.append(self.peakalgt[pos])
+		aggregates = self._aggregates
+		if aggregates is not None:
+			aggregates = aggregates._take(keep)
 
-		self.peakalgt = filtered_list
-		self.peakpos = numpy.transpose(self.peakalgt).tolist()
+		self._set_index(self._peak_lists, self._index[keep], self._peak_arrays, aggregates)
 
 	@staticmethod
 	def get_highest_mz_ion(ion_dict: Dict[float, int]) -> float:
@@ -306,16 +737,18 @@ class Alignment:
 		fp1.write(','.join(header) + '\n')
 		fp2.write(','.join(header) + '\n')
 
+		compo_peaks = self.aligned_peaks()
+
 		# for each alignment position write alignment's peak and area
-		for peak_idx in range(len(self.peakpos[0])):  # loop through peak lists (rows)
+		for compo_peak, position in zip(compo_peaks, self.peakalgt):  # loop through peak lists (rows)
 
-			rts = []
-			areas = []
-			new_peak_list = []
+			if compo_peak is None:
+				continue
 
-			for align_idx in range(len(self.peakpos)):
-				peak = self.peakpos[align_idx][peak_idx]
+			rts: List[Optional[float]] = []
+			areas: List[Optional[float]] = []
 
+			for peak in position:
 				if peak is not None:
 
 					if minutes:
@@ -325,16 +758,11 @@ class Alignment:
 
 					rts.append(rt)
 					areas.append(peak.area)
-					new_peak_list.append(peak)
 
 				else:
 					rts.append(None)
 					areas.append(None)
 
-			compo_peak = composite_peak(new_peak_list)
-			if compo_peak is None:
-				continue
-
 			# write to retention times file
 			fp1.write(compo_peak.UID)
 
@@ -343,11 +771,11 @@ class Alignment:
 			else:
 				fp1.write(f",{compo_peak.rt:.3f}")
 
-			for rt in rts:
-				if rt is None or numpy.isnan(rt):
+			for peak_rt in rts:
+				if peak_rt is None or numpy.isnan(peak_rt):
 					fp1.write(",NA")
 				else:
-					fp1.write(f",{rt:.3f}")
+					fp1.write(f",{peak_rt:.3f}")
 			fp1.write('\n')
 
 			# write to peak areas file
@@ -409,80 +837,38 @@ class Alignment:
 			# write headers
 			fp.write(','.join(header) + '\n')
 
-			rtsums: List[float] = []
-			rtcounts = []
-
-			# The following two arrays will become list of lists
-			# such that:
-			# areas = [  [align1_peak1, align2_peak1, .....,alignn_peak1]
-			#            [align1_peak2, ................................]
-			#              .............................................
-			#            [align1_peakm,....................,alignn_peakm]  ]
-			areas: List[List] = []
-			new_peak_lists: List[List[Peak]] = []
-
-			for peak_list in self.peakpos:
-				index = 0
-				for peak in peak_list:
-					# one the first iteration, populate the lists
-					if len(areas) < len(peak_list):
-						areas.append([])
-						new_peak_lists.append([])
-						rtsums.append(0)
-						rtcounts.append(0)
-
-					if peak is not None:
-						rt = peak.rt
-
-						# get the area of the common ion for the peak
-						# an area of 'na' shows that while the peak was
-						# aligned, the common ion was not present
-						area = peak.get_ion_area(top_ion_list[index])
-
-						areas[index].append(area)
-						new_peak_lists[index].append(peak)
-
-						# The following code to the else statement is
-						# just for calculating the average rt
-						rtsums[index] += rt
-						rtcounts[index] += 1
+			aggregates = self.aggregates
+			compo_peaks = self.aligned_peaks()
 
-					else:
-						areas[index].append(None)
-
-					index += 1
-
-			out_strings = []
-			index = 0
 			# now write the strings for the file
-			for area_list in areas:
+			for index, (compo_peak, position) in enumerate(zip(compo_peaks, self.peakalgt)):
 
 				# write initial info:
 				# peak unique id, peak average rt
-				compo_peak = composite_peak(new_peak_lists[index])
 				if compo_peak is None:
 					continue
 
 				peak_UID = compo_peak.UID
 				peak_UID_string = f'"{peak_UID}"'
 
-				rt_avg = rtsums[index] / rtcounts[index]
+				rt_avg = aggregates.rt_mean[index]
 
-				out_strings.append(f"{peak_UID_string},{rt_avg / 60:.3f},{top_ion_list[index]:f}")
+				row = f"{peak_UID_string},{rt_avg / 60:.3f},{top_ion_list[index]:f}"
 
-				for area in area_list:
-					if area is not None:
-						out_strings[index] += f",{area:.4f}"
+				for peak in position:
+					# get the area of the common ion for the peak
+					# an area of 'na' shows that while the peak was
+					# aligned, the common ion was not present
+					if peak is None:
+						area = None
 					else:
-						out_strings[index] += ",NA"
+						area = peak.get_ion_area(top_ion_list[index])
 
-				index += 1
+					if area is not None:
+						row += f",{area:.4f}"
+					else:
+						row += ",NA"
 
-			# now write the file
-			#        print("length of areas[0]", len(areas[0]))
-			#        print("length of areas", len(areas))
-			#        print("length of out_strings", len(out_strings))
-			for row in out_strings:
 				fp.write(row + '\n')
 
 	def write_ion_areas_csv(self, ms_file_name: PathLike, minutes: bool = True):
@@ -512,14 +898,16 @@ class Alignment:
 			# write headers
 			fp1.write('|'.join(header) + '\n')
 
-			for peak_idx in range(len(self.peakpos[0])):
+			compo_peaks = self.aligned_peaks()
 
-				ias = []
-				new_peak_list = []
+			for compo_peak, position in zip(compo_peaks, self.peakalgt):
+
+				if compo_peak is None:
+					continue
 
-				for align_idx in range(len(self.peakpos)):
+				ias = []
 
-					peak = self.peakpos[align_idx][peak_idx]
+				for peak in position:
 
 					if peak is not None:
 
@@ -527,11 +915,6 @@ class Alignment:
 						ia.update((mass, math.floor(intensity)) for mass, intensity in ia.items())
 						sorted_ia = sorted(ia.items(), key=operator.itemgetter(1), reverse=True)
 						ias.append(sorted_ia)
-						new_peak_list.append(peak)
-
-				compo_peak = composite_peak(new_peak_list)
-				if compo_peak is None:
-					continue
 
 				# write to ms file
 				fp1.write(compo_peak.UID)
@@ -569,7 +952,7 @@ class Alignment:
 
 		# for each alignment position write alignment's RT
 		for peak_idx in range(len(self.peakpos[0])):
-			rts = []
+			rts: List[Optional[float]] = []
 			countrt = 0
 
 			for align_idx in range(len(self.peakpos)):
@@ -610,7 +993,7 @@ class Alignment:
 
 		# for each alignment position write alignment's ms
 		for peak_idx in range(len(self.peakpos[0])):
-			specs = []
+			specs: List[Optional[MassSpectrum]] = []
 			countms = 0
 
 			for align_idx in range(len(self.peakpos)):
@@ -645,7 +1028,7 @@ class Alignment:
 
 		# for each alignment position write alignment's ms
 		for peak_idx in range(len(self.peakpos[0])):
-			peaks = []
+			peaks: List[Optional[Peak]] = []
 			count_peaks = 0
 
 			for align_idx in range(len(self.peakpos)):
@@ -701,15 +1084,18 @@ class Alignment:
 		return area_alignment
 
 
-def exprl2alignment(expr_list: List[Experiment]) -> List[Alignment]:
+def exprl2alignment(expr_list: List[Experiment], copy_peaks: bool = False) -> List[Alignment]:
 	"""
 	Converts a list of experiments into a list of alignments.
 
 	:param expr_list: The list of experiments to be converted into an alignment objects.
+	:param copy_peaks: Whether to copy the experiments' peaks. See :class:`~.Alignment`.
 
 	:return: A list of alignment objects for the experiments.
 
 	:author: Vladimir Likic
+
+	.. versionchanged:: 2.4.0  Added the ``copy_peaks`` argument.
 	"""
 
 	if not is_sequence(expr_list):
@@ -721,6 +1107,6 @@ def exprl2alignment(expr_list: List[Experiment]) -> List[Alignment]:
 		if not isinstance(item, Experiment):
 			raise TypeError("list items must be 'Experiment' instances")
 
-		alignments.append(Alignment(item))
+		alignments.append(Alignment(item, copy_peaks=copy_peaks))
 
 	return alignments
@@ -37,7 +37,6 @@ from openpyxl.utils import get_column_letter  # type: ignore
 
 # this package
 from pyms.DPA.Alignment import Alignment
-from pyms.Peak.List.Function import composite_peak
 from pyms.Utils.IO import prepare_filepath
 from pyms.Utils.Utils import is_path
 
@@ -76,85 +75,24 @@ def write_mass_hunter_csv(
 			'"ratio QI2/CI","l window delta","r window delta"\n'
 			)
 
-	rtsums: List[float] = []
-	rtcounts = []
-
-	# The following two arrays will become list of lists
-	# such that:
-	# areas = [  [align1_peak1, align2_peak1, .....,alignn_peak1]
-	#            [align1_peak2, ................................]
-	#              .............................................
-	#            [align1_peakm,....................,alignn_peakm]  ]
-	areas = []  # type: ignore
-	new_peak_lists = []  # type: ignore
-	rtmax = []
-	rtmin = []
-
-	for peak_list in alignment.peakpos:
-		index = 0
-
-		for peak in peak_list:
-			# on the first iteration, populate the lists
-			if len(areas) < len(peak_list):
-				areas.append([])
-				new_peak_lists.append([])
-				rtsums.append(0)
-				rtcounts.append(0)
-				rtmax.append(0.0)
-				rtmin.append(0.0)
-
-			if peak is not None:
-				rt = peak.rt
-
-				# get the area of the common ion for the peak
-				# an area of 'na' shows that while the peak was
-				# aligned, the common ion was not present
-				area = peak.get_ion_area(top_ion_list[index])
-
-				areas[index].append(area)
-				new_peak_lists[index].append(peak)
-
-				# The following code to the else statement is
-				# just for calculating the average rt
-				rtsums[index] += rt
-				rtcounts[index] += 1
-
-				# quick workaround for weird problem when
-				# attempting to set rtmin to max time above
-				if rtmin[index] == 0.0:
-					rtmin[index] = 5400.0
-
-				if rt > rtmax[index]:
-					rtmax[index] = rt
-
-				if rt < rtmin[index]:
-					rtmin[index] = rt
-
-			else:
-				areas[index].append(None)
-
-			index += 1
+	aggregates = alignment.aggregates
+	compo_peaks = alignment.aligned_peaks()
 
 	out_strings = []
-	compo_peaks = []
-	index = 0
 	# now write the strings for the file
-	for area_list in areas:
+	for index, compo_peak in enumerate(compo_peaks):
 
 		# write initial info:
 		# peak unique id, peak average rt
-		compo_peak = composite_peak(new_peak_lists[index])
 		if compo_peak is None:
 			continue
 
-		compo_peaks.append(compo_peak)
 		peak_UID = compo_peak.UID
 		peak_UID_string = f'"{peak_UID}"'
 
 		# calculate the time from the leftmost peak to the average
-		l_window_delta = compo_peak.rt - rtmin[index]
-		# print("l_window", l_window_delta, "rt", compo_peak.rt, "rt_min", rtmin[index])
-		r_window_delta = rtmax[index] - compo_peak.rt
+		l_window_delta = compo_peak.rt - aggregates.rt_min[index]
+		r_window_delta = aggregates.rt_max[index] - compo_peak.rt
 
 		common_ion = top_ion_list[index]
 		qual_ion_1 = int(peak_UID_string.split('-')[0].strip('"'))
@@ -199,8 +137,6 @@ def write_mass_hunter_csv(
 						])
 				)
 
-		index += 1
-
 	# now write the file
 	#        print("length of areas[0]", len(areas[0]))
 	#        print("lenght of areas", len(areas))
@@ -246,13 +182,12 @@ def write_excel(
 		comment = Comment("sample " + str(i), "dave")
 		currcell.comment = comment
 
-	# for each alignment position write alignment's peak and area
-	for peak_idx in range(len(alignment.peakpos[0])):  # loop through peak lists (rows)
+	compo_peaks = alignment.aligned_peaks()
 
-		new_peak_list = []
+	# for each alignment position write alignment's peak and area
+	for peak_idx, position in enumerate(alignment.peakalgt):  # loop through peak lists (rows)
 
-		for align_idx in range(len(alignment.peakpos)):  # loops through samples (columns)
-			peak = alignment.peakpos[align_idx][peak_idx]
+		for align_idx, peak in enumerate(position):  # loops through samples (columns)
 
 			if peak is not None:
 
@@ -262,7 +197,6 @@ def write_excel(
 					rt = peak.rt
 
 				area = peak.area
-				new_peak_list.append(peak)
 
 				# write the RT into the cell in the excel file
 				currcell = ws.cell(row=2 + peak_idx, column=3 + align_idx, value=round(rt, 3))
@@ -285,7 +219,7 @@ def write_excel(
 				# currcell.number_format
 				currcell.comment = comment
 
-		compo_peak = composite_peak(new_peak_list)
+		compo_peak = compo_peaks[peak_idx]
 
 		if compo_peak is not None:
 			peak_UID = compo_peak.UID
@@ -351,13 +285,14 @@ def write_transposed_output(
 		ws1.cell(column=1, row=i + 3, value=f"{item}")
 		ws2.cell(column=1, row=i + 3, value=f"{item}")
 
+	compo_peaks = alignment.aligned_peaks()
+
 	# for each alignment position write alignment's peak and area
-	for peak_idx in range(len(alignment.peakpos[0])):  # loop through peak lists
+	for peak_idx, position in enumerate(alignment.peakalgt):  # loop through peak lists
 
 		new_peak_list = []  # this will contain a list of tuples of form (peak, col, row), but only non-NA peaks
 
-		for align_idx in range(len(alignment.peakpos)):  # loops through samples
-			peak = alignment.peakpos[align_idx][peak_idx]
+		for align_idx, peak in enumerate(position):  # loops through samples
 			cell_col = 2 + peak_idx
 			cell_row = 3 + align_idx
 
@@ -394,8 +329,7 @@ def write_transposed_output(
 				comment = Comment("Area: NA", "dave")
 				currcell1.comment = comment
 
-		# this method will create the compo peak, and also mark outlier peaks with a bool is_outlier
-		compo_peak = composite_peak(list(p[0] for p in new_peak_list))
+		compo_peak = compo_peaks[peak_idx]
 
 		if compo_peak is not None:
 			ws1.cell(column=2 + peak_idx, row=1, value=f'"{compo_peak.UID}"')
@@ -24,26 +24,22 @@ Classes for peak alignment by dynamic programming.
 ################################################################################
 
 # stdlib
-import copy
 import functools
 import math
-from typing import Dict, List
+import os
+import pathlib
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, as_completed, wait
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 # 3rd party
 import numpy  # type: ignore
 
 # this package
-from pyms.Peak import Peak
-
-try:
-	# 3rd party
-	from mpi4py import MPI  # type: ignore
-except ModuleNotFoundError:
-	pass
-
-# this package
-from pyms.DPA.Alignment import Alignment
+from pyms.DPA.Alignment import Alignment, PositionAggregates, _different_lengths_msg
 from pyms.DPA.clustering import treecluster
+from pyms.Experiment import Experiment
+from pyms.Peak import Peak
 from pyms.Utils.Utils import is_sequence_of
 
 __all__ = [
@@ -55,10 +51,20 @@ __all__ = [
 		"merge_alignments",
 		"alignment_similarity",
 		"alignment_compare",
-		"score_matrix_mpi",
-		"align_with_tree",  # "align_with_tree_mpi",
+		"align_with_tree",
+		"add_experiments",
 		]
 
+# Peaks further apart than the retention time corresponding to this
+# Gaussian weight (1/1000) are not compared.
+_TOL = 0.001
+
+# The maximum number of pairs of peaks compared at once in score_matrix.
+_SCORE_BLOCK_SIZE = 2**20
+
+# The number of chunks of pairwise alignments given to the executor for each CPU.
+_CHUNKS_PER_CPU = 4
+
 
 class PairwiseAlignment:
 	"""
@@ -67,11 +73,28 @@ class PairwiseAlignment:
 	:param alignments: A list of alignments.
 	:param D: Retention time tolerance parameter for pairwise alignments.
 	:param gap: Gap parameter for pairwise alignments.
+	:param executor: Optional :class:`concurrent.futures.Executor` to calculate the pairwise alignments in parallel.
+	:param progress: Optional function called with the number of pairwise alignments completed
+		and the total number of pairwise alignments as the calculation progresses.
+	:param sim_matrix: Optional similarity matrix of the first alignments in ``alignments``,
+		such as the :attr:`~.sim_matrix` of an earlier :class:`~.PairwiseAlignment` with the same ``D`` and ``gap``.
+		Only the pairs of alignments which include one of the remaining alignments are aligned.
 
-	:authors: Woon Wai Keen, Vladimir Likic
+	:authors: Woon Wai Keen, Vladimir Likic, Dominic Davis-Foster
+
+	.. versionchanged:: 2.4.0  Added the ``executor`` and ``progress`` arguments.
+	.. versionchanged:: 2.4.0  Added the ``sim_matrix`` argument.
 	"""
 
-	def __init__(self, alignments: List[Alignment], D: float, gap: float):
+	def __init__(
+			self,
+			alignments: List[Alignment],
+			D: float,
+			gap: float,
+			executor: Optional[Executor] = None,
+			progress: Optional[Callable[[int, int], Any]] = None,
+			sim_matrix: Optional[numpy.ndarray] = None,
+			):
 		if not is_sequence_of(alignments, Alignment):
 			raise TypeError("'alignments' must be a Sequence of Alignment objects")
 
@@ -85,32 +108,97 @@ class PairwiseAlignment:
 		self.D = D
 		self.gap = gap
 
-		self._sim_matrix()
+		if sim_matrix is not None:
+			sim_matrix = numpy.asarray(sim_matrix)
+
+			if sim_matrix.ndim != 2 or sim_matrix.shape[0] != sim_matrix.shape[1]:
+				raise ValueError("'sim_matrix' must be a square matrix")
+			elif len(sim_matrix) > len(alignments):
+				raise ValueError("'sim_matrix' cannot be larger than the number of alignments")
+
+		self._sim_matrix(executor, progress, sim_matrix)
 		self._dist_matrix()
 		self._guide_tree()
 
-	def _sim_matrix(self) -> None:
+	def _sim_matrix(
+			self,
+			executor: Optional[Executor] = None,
+			progress: Optional[Callable[[int, int], Any]] = None,
+			cached: Optional[numpy.ndarray] = None,
+			) -> None:
 		"""
 		Calculates the similarity matrix for the set of alignments.
 
-		:authors: Woon Wai Keen, Vladimir Likic
+		The similarities are the same as those calculated by :func:`~.align`,
+		but the alignments themselves are not merged.
+
+		If an ``executor`` is given the pairs of alignments are divided into chunks which are aligned in parallel.
+		With a :class:`~concurrent.futures.ProcessPoolExecutor` the stacked mass spectra of the alignments
+		are shared with the workers through memory-mapped files; other executors are sent them with each chunk.
+
+		:param executor: Optional :class:`concurrent.futures.Executor` to calculate the pairwise alignments in parallel.
+		:param progress: Optional function called with the number of pairwise alignments completed
+			and the total number of pairwise alignments.
+		:param cached: Optional similarity matrix of the first alignments, which are not aligned with each other again.
+
+		:authors: Woon Wai Keen, Vladimir Likic, Dominic Davis-Foster
+
+		.. versionchanged:: 2.4.0
+
+			Added the ``executor``, ``progress`` and ``cached`` arguments.
+			The progress is no longer printed for each pair of alignments.
 		"""
 
 		n = len(self.alignments)
+		n_cached = 0 if cached is None else len(cached)
 
-		total_n = n * (n - 1) // 2
+		pairs = [(i, j) for i in range(n - 1) for j in range(max(i + 1, n_cached), n)]
+		total_n = len(pairs)
 
 		print(f" Calculating pairwise alignments for {n:d} alignments (D={self.D:.2f}, gap={self.gap:.2f})")
 
 		self.sim_matrix = numpy.zeros((n, n), dtype='f')
 
-		# Could we parallelize this pairwise alignment loop??
-		for i in range(n - 1):
-			for j in range(i + 1, n):
-				ma = align(self.alignments[i], self.alignments[j], self.D, self.gap)
-				self.sim_matrix[i, j] = self.sim_matrix[j, i] = ma.similarity
-				total_n = total_n - 1
-				print(f" -> {total_n:d} pairs remaining")
+		if cached is not None:
+			self.sim_matrix[:n_cached, :n_cached] = cached
+
+		stacks = [_stack_positions(alignment) for alignment in self.alignments]
+
+		if executor is None or not pairs:
+			for done, (i, j) in enumerate(pairs, start=1):
+				similarity = _stacked_similarity(stacks[i], stacks[j], self.D, self.gap)
+				self.sim_matrix[i, j] = self.sim_matrix[j, i] = similarity
+
+				if progress is not None:
+					progress(done, total_n)
+
+			return
+
+		n_chunks = min(total_n, _CHUNKS_PER_CPU * (os.cpu_count() or 1))
+		chunks = [pairs[start::n_chunks] for start in range(n_chunks)]
+
+		with tempfile.TemporaryDirectory() as tmpdir:
+			if isinstance(executor, ProcessPoolExecutor):
+				# Share the stacked peaks between the local processes.
+				shared_stacks: Union[str, List[_PositionStack]] = _store_stacks(stacks, pathlib.Path(tmpdir))
+			else:
+				shared_stacks = stacks
+
+			futures = {
+					executor.submit(_similarity_chunk, shared_stacks, chunk, self.D, self.gap): chunk
+					for chunk in chunks
+					}
+
+			done = 0
+			for future in as_completed(futures):
+				chunk = futures[future]
+
+				for (i, j), similarity in zip(chunk, future.result()):
+					self.sim_matrix[i, j] = self.sim_matrix[j, i] = similarity
+
+				done += len(chunk)
+				if progress is not None:
+					progress(done, total_n)
 
 	def _dist_matrix(self) -> None:
 		"""
@@ -141,7 +229,13 @@ class PairwiseAlignment:
 		print("Done")
 
 
-def align(a1: Alignment, a2: Alignment, D: float, gap: float) -> Alignment:
+def align(
+		a1: Alignment,
+		a2: Alignment,
+		D: float,
+		gap: float,
+		executor: Optional[Executor] = None,
+		) -> Alignment:
 	"""
 	Aligns two alignments.
 
@@ -149,21 +243,20 @@ def align(a1: Alignment, a2: Alignment, D: float, gap: float) -> Alignment:
 	:param a2: The second alignment
 	:param D: Retention time tolerance
 	:param gap: Gap penalty
+	:param executor: Optional :class:`concurrent.futures.Executor` to calculate the score matrix in parallel.
 
 	:return: Aligned alignments
 
 	:authors: Woon Wai Keen, Vladimir Likic
-	"""
 
-	# comm = MPI.COMM_WORLD
-	# rank = comm.Get_rank()
+	.. versionchanged:: 2.4.0  Added the ``executor`` argument.
+	"""
 
 	# calculate score matrix for two alignments
-	M = score_matrix(a1, a2, D)
-	# print("calculated score matrix on rank", rank)
+	M = score_matrix(a1, a2, D, executor=executor)
 
 	# run dynamic programming
-	result = dp(M, gap)
+	result = dp(M, gap, banded=True)
 
 	# make composite alignment from the results
 	ma = merge_alignments(a1, a2, result["trace"])
@@ -174,46 +267,306 @@ def align(a1: Alignment, a2: Alignment, D: float, gap: float) -> Alignment:
 	return ma
 
 
-def score_matrix(a1: Alignment, a2: Alignment, D: float) -> numpy.ndarray:
+def score_matrix(
+		a1: Alignment,
+		a2: Alignment,
+		D: float,
+		executor: Optional[Executor] = None,
+		) -> numpy.ndarray:
 	"""
 	Calculates the score matrix between two alignments.
 
+	The scores are the same as those given by :func:`~.position_similarity` for each pair of positions,
+	but are calculated for all positions at once from the stacked mass spectra of the two alignments.
+
 	:param a1: The first alignment.
 	:param a2: The second alignment.
 	:param D: Retention time tolerance.
+	:param executor: Optional :class:`concurrent.futures.Executor` to calculate blocks of the score matrix in parallel.
+		The result is identical to the serial calculation.
 
 	:return: Aligned alignments.
 
-	:authors: Qiao Wang, Andrew Isaac
+	:authors: Qiao Wang, Andrew Isaac, Dominic Davis-Foster
+
+	.. versionchanged:: 2.4.0
+
+		The score matrix is now calculated with matrix operations.
+		Added the ``executor`` argument, which replaces ``score_matrix_mpi``.
+	"""
+
+	return _stacked_score_matrix(_stack_positions(a1), _stack_positions(a2), D, executor)
+
+
+class _PositionStack(NamedTuple):
+	"""
+	The peaks in the positions of an alignment, stacked for :func:`~.score_matrix`.
 	"""
 
-	# sim_score = 0
+	#: The number of positions in the alignment.
+	length: int
 
-	score_matrix = numpy.zeros((len(a1.peakalgt), len(a2.peakalgt)))
+	#: The retention times of the peaks.
+	rts: numpy.ndarray
 
-	for i, algt1pos in enumerate(a1.peakalgt):
-		for j, algt2pos in enumerate(a2.peakalgt):
-			sim_score = position_similarity(algt1pos, algt2pos, D)
-			score_matrix[i][j] = sim_score
+	#: The mass spectra of the peaks, scaled to unit length.
+	spectra: numpy.ndarray
+
+	#: The index of the first peak of each position which has peaks.
+	starts: numpy.ndarray
+
+	#: The number of peaks in each of those positions.
+	counts: numpy.ndarray
+
+	#: The indices of those positions.
+	positions: numpy.ndarray
+
+
+def _stacked_score_matrix(
+		stack1: _PositionStack,
+		stack2: _PositionStack,
+		D: float,
+		executor: Optional[Executor] = None,
+		) -> numpy.ndarray:
+	"""
+	Calculates the score matrix between two alignments from their stacked peaks.
+
+	:param stack1: The stacked peaks of the first alignment.
+	:param stack2: The stacked peaks of the second alignment.
+	:param D: Retention time tolerance.
+	:param executor: Optional :class:`concurrent.futures.Executor` to calculate the blocks in parallel.
+	"""
+
+	score_matrix = numpy.ones((stack1.length, stack2.length))
+
+	_, rt1, spectra1, starts1, counts1, positions1 = stack1
+	_, rt2, spectra2, starts2, counts2, positions2 = stack2
+
+	if not len(rt1) or not len(rt2):
+		# NB score of 1 is worst
+		return score_matrix
+
+	if spectra1.shape[1] != spectra2.shape[1]:
+		raise ValueError(_different_lengths_msg)
+
+	# The peaks of a1 are divided into the same blocks whether or not they are calculated in parallel.
+	block_size = max(1, _SCORE_BLOCK_SIZE // len(rt2))
+	blocks = [slice(start, start + block_size) for start in range(0, len(rt1), block_size)]
+	score_block = functools.partial(_score_block, rt2=rt2, spectra2=spectra2, starts2=starts2, D=D)
+
+	block_scores: Iterator[numpy.ndarray]
+	if executor is None:
+		block_scores = map(score_block, [rt1[block] for block in blocks], [spectra1[block] for block in blocks])
+	else:
+		block_scores = executor.map(
+				score_block,
+				[rt1[block] for block in blocks],
+				[spectra1[block] for block in blocks],
+				)
+
+	# The sum of the scores for each peak in a1 against each position in a2
+	peak_scores = numpy.concatenate(list(block_scores))
+
+	position_scores = numpy.add.reduceat(peak_scores, starts1, axis=0)
+	score_matrix[numpy.ix_(positions1, positions2)] = position_scores / numpy.outer(counts1, counts2)
 
 	return score_matrix
 
 
-def dp(S, gap_penalty: float) -> Dict:
+def _score_block(
+		rt1: numpy.ndarray,
+		spectra1: numpy.ndarray,
+		rt2: numpy.ndarray,
+		spectra2: numpy.ndarray,
+		starts2: numpy.ndarray,
+		D: float,
+		) -> numpy.ndarray:
+	"""
+	Calculates the sum of the scores for a block of peaks from one alignment against each position of another.
+
+	:param rt1: The retention times of the block of peaks.
+	:param spectra1: The normalised mass spectra of the block of peaks.
+	:param rt2: The retention times of the peaks in the other alignment.
+	:param spectra2: The normalised mass spectra of the peaks in the other alignment.
+	:param starts2: The index of the first peak of each position in the other alignment.
+	:param D: Retention time tolerance.
+	"""
+
+	cutoff = D * math.sqrt(-2.0 * math.log(_TOL))
+
+	rt_diff = numpy.subtract.outer(rt1, rt2)
+	cos = spectra1 @ spectra2.T
+	rtime = numpy.exp(-(rt_diff / float(D))**2 / 2.0)
+
+	# Pairs of peaks that are out of range get the worst score
+	scores = numpy.where(numpy.abs(rt_diff) > cutoff, 1.0, 1.0 - (cos * rtime))
+
+	return numpy.add.reduceat(scores, starts2, axis=1)
+
+
+def _stack_positions(alignment: Alignment) -> _PositionStack:
+	"""
+	Stacks the peaks in each position of the alignment for :func:`~.score_matrix`.
+
+	:param alignment:
+	"""
+
+	pos_idx, rts, spectra = alignment._gather_peaks()
+	positions, starts, counts = numpy.unique(pos_idx, return_index=True, return_counts=True)
+
+	return _PositionStack(
+			len(alignment),
+			rts,
+			spectra,
+			starts.astype(numpy.intp),
+			counts.astype(float),
+			positions.astype(numpy.intp),
+			)
+
+
+def _stacked_similarity(stack1: _PositionStack, stack2: _PositionStack, D: float, gap: float) -> float:
+	"""
+	Calculates the similarity score of the alignment of two alignments from their stacked peaks,
+	in the same way as :func:`~.align`.
+
+	:param stack1: The stacked peaks of the first alignment.
+	:param stack2: The stacked peaks of the second alignment.
+	:param D: Retention time tolerance.
+	:param gap: Gap penalty.
+	"""
+
+	M = _stacked_score_matrix(stack1, stack2, D)
+	result = dp(M, gap, banded=True)
+
+	return alignment_similarity(result["trace"], M, gap)
+
+
+def _store_stacks(stacks: Sequence[_PositionStack], directory: pathlib.Path) -> str:
+	"""
+	Stores the stacked peaks of a set of alignments as ``.npy`` files, which can be memory-mapped by
+	:func:`~._load_stacks` in other processes.
+
+	:param stacks:
+	:param directory: The directory to store the files in.
+
+	:return: The directory, as a string.
+	"""
+
+	widths = {stack.spectra.shape[1] for stack in stacks if len(stack.rts)}
+	if len(widths) > 1:
+		raise ValueError(_different_lengths_msg)
+
+	width = widths.pop() if widths else 0
+
+	numpy.save(directory / "lengths.npy", numpy.array([stack.length for stack in stacks], dtype=numpy.intp))
+	numpy.save(
+			directory / "peak_offsets.npy",
+			numpy.cumsum([0] + [len(stack.rts) for stack in stacks]),
+			)
+	numpy.save(
+			directory / "position_offsets.npy",
+			numpy.cumsum([0] + [len(stack.positions) for stack in stacks]),
+			)
+
+	for field in ("rts", "starts", "counts", "positions"):
+		numpy.save(directory / f"{field}.npy", numpy.concatenate([getattr(stack, field) for stack in stacks]))
+
+	numpy.save(
+			directory / "spectra.npy",
+			numpy.concatenate([stack.spectra.reshape(len(stack.rts), width) for stack in stacks]),
+			)
+
+	return str(directory)
+
+
+def _load_stacks(directory: str) -> List[_PositionStack]:
+	"""
+	Memory-maps the stacked peaks stored by :func:`~._store_stacks`.
+
+	:param directory:
+	"""
+
+	arrays = {
+			name: numpy.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+			for name in (
+					"lengths",
+					"peak_offsets",
+					"position_offsets",
+					"rts",
+					"spectra",
+					"starts",
+					"counts",
+					"positions",
+					)
+			}
+
+	peak_offsets = arrays["peak_offsets"]
+	position_offsets = arrays["position_offsets"]
+
+	stacks = []
+
+	for idx, length in enumerate(arrays["lengths"]):
+		peaks = slice(peak_offsets[idx], peak_offsets[idx + 1])
+		positions = slice(position_offsets[idx], position_offsets[idx + 1])
+
+		stacks.append(
+				_PositionStack(
+						int(length),
+						arrays["rts"][peaks],
+						arrays["spectra"][peaks],
+						arrays["starts"][positions],
+						arrays["counts"][positions],
+						arrays["positions"][positions],
+						)
+				)
+
+	return stacks
+
+
+def _similarity_chunk(
+		stacks: Union[str, Sequence[_PositionStack]],
+		pairs: Sequence[Tuple[int, int]],
+		D: float,
+		gap: float,
+		) -> List[float]:
+	"""
+	Calculates the similarity scores for a chunk of pairs of alignments, for :meth:`PairwiseAlignment._sim_matrix`.
+
+	:param stacks: The stacked peaks of the alignments,
+		or the directory they were stored in by :func:`~._store_stacks`.
+	:param pairs: The indices of the pairs of alignments.
+	:param D: Retention time tolerance.
+	:param gap: Gap penalty.
+	"""
+
+	if isinstance(stacks, str):
+		stacks = _load_stacks(stacks)
+
+	return [_stacked_similarity(stacks[i], stacks[j], D, gap) for i, j in pairs]
+
+
+def dp(S, gap_penalty: float, banded: bool = False) -> Dict:
 	"""
 	Solves optimal path in score matrix based on global sequence alignment.
 
 	:param S: Score matrix
 	:param gap_penalty: Gap penalty
+	:param banded: Whether to only fill the cells of the cost matrix
+		near positions which can be matched. See :func:`~._dp_band` for details.
+		The trace is the same as without a band, including the order of gaps where there are ties.
 
-	:return: A dictionary of results
+	:return: A dictionary of results. If ``banded`` is :py:obj:`True` the cost matrix (``'D'``)
+		and trace matrix (``'phi'``) only contain the cells in the band, one row after another,
+		and ``'band'`` contains the first and last column of the band in each row.
 
-	:author: Tim Erwin
-	"""
+	:author: Tim Erwin, Dominic Davis-Foster
 
-	# comm = MPI.COMM_WORLD
-	# rank = comm.Get_rank()
-	# print " In DP.py, I am rank", rank
+	.. versionchanged:: 2.4.0
+
+		The cost matrix is now filled one anti-diagonal at a time with numpy,
+		and the trace matrix (``'phi'``) is stored as :class:`numpy.int8`.
+		Added the ``banded`` argument.
+	"""
 
 	try:
 		row_length = len(S[:, 0])
@@ -222,48 +575,88 @@ def dp(S, gap_penalty: float) -> Dict:
 
 	col_length = len(S[0, :])
 
-	# D contains the score of the optimal alignment
-	D = numpy.zeros((row_length + 1, col_length + 1), dtype='d')
+	if banded:
+		lo, hi = _dp_band(S, gap_penalty)
+	else:
+		lo = numpy.zeros(row_length + 1, dtype=numpy.intp)
+		hi = numpy.full(row_length + 1, col_length, dtype=numpy.intp)
 
-	for i in range(1, row_length + 1):
-		D[i, 0] = gap_penalty * i
-	for j in range(1, col_length + 1):
-		D[0, j] = gap_penalty * j
+	# Only the cells in the band are stored, one row after another.
+	# Without a band each row is complete, so these are the flattened matrices.
+	offsets = numpy.zeros(row_length + 2, dtype=numpy.intp)
+	numpy.cumsum(hi - lo + 1, out=offsets[1:])
 
-	D[0, 0] = 0.0
-	D[1:(row_length + 1), 1:(col_length + 1)] = S.copy()
+	# D contains the score of the optimal alignment.
+	# Cells outside of the band are never reached.
+	D = numpy.full(offsets[-1], numpy.inf, dtype='d')
 
 	# Directions for trace
 	# 0 - match               (move diagonal)
 	# 1 - peaks1 has no match (move up)
 	# 2 - peaks2 has no match (move left)
 	# 3 - stop
-	trace_matrix = numpy.zeros((row_length + 1, col_length + 1))
-	trace_matrix[:, 0] = 1
-	trace_matrix[0, :] = 2
-	trace_matrix[0, 0] = 3
-
-	for i in range(1, row_length + 1):
-		for j in range(1, col_length + 1):
-			#
-			# Needleman-Wunsch Algorithm assuming a score function S(x,x)=0
-			#
-			#              | D[i-1,j-1] + S(i,j)
-			# D[i,j] = min | D(i-1,j] + gap
-			#              | D[i,j-1] + gap
-			#
-
-			darray = [D[i - 1, j - 1] + S[i - 1, j - 1], D[i - 1, j] + gap_penalty, D[i, j - 1] + gap_penalty]
-			D[i, j] = min(darray)
-			# Store direction in trace matrix
-			trace_matrix[i, j] = darray.index(D[i, j])
+	trace_matrix = numpy.zeros(offsets[-1], dtype=numpy.int8)
+
+	# The first row and column, where they are in the band.
+	first_row = numpy.arange(hi[0] + 1)
+	D[first_row] = gap_penalty * first_row
+	trace_matrix[first_row] = 2
+	first_column = numpy.flatnonzero(lo == 0)[1:]
+	D[offsets[first_column]] = gap_penalty * first_column
+	trace_matrix[offsets[first_column]] = 1
+	D[0] = 0.0
+	trace_matrix[0] = 3
+
+	#
+	# Needleman-Wunsch Algorithm assuming a score function S(x,x)=0
+	#
+	#              | D[i-1,j-1] + S(i,j)
+	# D[i,j] = min | D(i-1,j] + gap
+	#              | D[i,j-1] + gap
+	#
+	# Each cell only depends on the two previous anti-diagonals (i + j = k),
+	# so each anti-diagonal is calculated at once.
+
+	rows = numpy.arange(row_length + 1)
+	first_diagonal = lo + rows  # the first anti-diagonal in each row's band
+	last_diagonal = hi + rows  # the last anti-diagonal in each row's band
+	band_cost = functools.partial(_band_cost, D, offsets, lo, hi, gap_penalty)
+
+	for k in range(2, row_length + col_length + 1):
+		i_start = max(1, k - col_length, int(numpy.searchsorted(last_diagonal, k, side="left")))
+		i_stop = min(row_length, k - 1, int(numpy.searchsorted(first_diagonal, k, side="right")) - 1)
+
+		if i_start > i_stop:
+			continue
+
+		diag_i = numpy.arange(i_start, i_stop + 1)
+		diag_j = k - diag_i
+
+		match = band_cost(diag_i - 1, diag_j - 1) + S[diag_i - 1, diag_j - 1]
+		up = band_cost(diag_i - 1, diag_j) + gap_penalty
+		left = band_cost(diag_i, diag_j - 1) + gap_penalty
+
+		darray = numpy.stack([match, up, left])
+		diag_direction = numpy.argmin(darray, axis=0)
+		cells = offsets[diag_i] + diag_j - lo[diag_i]
+		D[cells] = darray[diag_direction, numpy.arange(darray.shape[1])]
+		# Store direction in trace matrix
+		trace_matrix[cells] = diag_direction
+
+	def get_direction(i: int, j: int) -> int:
+		if lo[i] <= j <= hi[i]:
+			return int(trace_matrix[offsets[i] + j - lo[i]])
+		elif i == 0:
+			return 2
+		else:
+			return 1
 
 	# Trace back from bottom right
 	trace = []
 	matches = []
 	i = row_length
 	j = col_length
-	direction = trace_matrix[i, j]
+	direction = get_direction(i, j)
 	p = [row_length - 1]
 	q = [col_length - 1]
 
@@ -280,7 +673,7 @@ def dp(S, gap_penalty: float) -> Dict:
 		p.append(i - 1)
 		q.append(j - 1)
 		trace.append(direction)
-		direction = trace_matrix[i, j]
+		direction = get_direction(i, j)
 
 	# remove 'stop' entry
 	p.pop()
@@ -291,7 +684,153 @@ def dp(S, gap_penalty: float) -> Dict:
 	trace.reverse()
 	matches.reverse()
 
-	return {'p': p, 'q': q, "trace": trace, "matches": matches, 'D': D, "phi": trace_matrix}
+	if banded:
+		# Where there are ties the band may not contain the path the full cost matrix is traced back along.
+		trace = _full_trace(S, gap_penalty, matches)
+		p, q = _trace_positions(trace)
+
+		return {
+				'p': p,
+				'q': q,
+				"trace": trace,
+				"matches": matches,
+				'D': D,
+				"phi": trace_matrix,
+				"band": (lo, hi),
+				}
+	else:
+		shape = (row_length + 1, col_length + 1)
+		return {'p': p, 'q': q, "trace": trace, "matches": matches, 'D': D.reshape(shape), "phi": trace_matrix.reshape(shape)}
+
+
+def _full_trace(S: numpy.ndarray, gap_penalty: float, matches: List[List[int]]) -> List[int]:
+	"""
+	Returns the trace :func:`~.dp` finds without a band, given the matches it finds.
+
+	The gaps between two matches are traced back first through the row of the later match
+	(peaks1 have no match) and then the column of the earlier match (peaks2 have no match),
+	so they are in the same order for any path with those matches.
+	Before the first match only the rounding of the gap costs decides the order of the gaps,
+	so that part of the cost matrix is filled in full. This is usually small.
+
+	:param S: Score matrix
+	:param gap_penalty: Gap penalty
+	:param matches: The pairs of positions which are matched, in order.
+	"""
+
+	row_length, col_length = S.shape
+
+	first_i, first_j = matches[0] if matches else (row_length, col_length)
+	if first_i and first_j:
+		trace = dp(S[:first_i, :first_j], gap_penalty)["trace"]
+	else:
+		trace = [1] * first_i + [2] * first_j
+
+	for (i, j), (next_i, next_j) in zip(matches, [*matches[1:], [row_length, col_length]]):
+		trace.append(0)
+		trace.extend([2] * (next_j - j - 1))
+		trace.extend([1] * (next_i - i - 1))
+
+	return trace
+
+
+def _trace_positions(trace: Sequence[int]) -> Tuple[List[int], List[int]]:
+	"""
+	Returns the positions of each alignment after each step of the trace from :func:`~.dp`.
+
+	:param trace:
+	"""
+
+	p, q = [], []
+	i = j = -1
+
+	for direction in trace:
+		if direction != 2:
+			i += 1
+		if direction != 1:
+			j += 1
+		p.append(i)
+		q.append(j)
+
+	return p, q
+
+
+def _band_cost(
+		D: numpy.ndarray,
+		offsets: numpy.ndarray,
+		lo: numpy.ndarray,
+		hi: numpy.ndarray,
+		gap_penalty: float,
+		i: numpy.ndarray,
+		j: numpy.ndarray,
+		) -> numpy.ndarray:
+	"""
+	Returns the costs of the cells ``(i, j)`` of the banded cost matrix of :func:`~.dp`.
+
+	Cells outside of the band cost :py:obj:`numpy.inf`, except for the first row and column.
+
+	:param D: The cells in the band, one row after another.
+	:param offsets: The index in ``D`` of the first cell of each row.
+	:param lo: The first column of the band in each row.
+	:param hi: The last column of the band in each row.
+	:param gap_penalty:
+	:param i: The rows of the cells.
+	:param j: The columns of the cells.
+	"""
+
+	in_band = (lo[i] <= j) & (j <= hi[i])
+	cost = D[numpy.clip(offsets[i] + j - lo[i], 0, len(D) - 1)]
+
+	if in_band.all():
+		return cost
+
+	outside = numpy.where(i == 0, gap_penalty * j, numpy.where(j == 0, gap_penalty * i, numpy.inf))
+
+	return numpy.where(in_band, cost, outside)
+
+
+def _dp_band(S: numpy.ndarray, gap_penalty: float) -> Tuple[numpy.ndarray, numpy.ndarray]:
+	"""
+	Returns the band of the cost matrix which contains an optimal path for :func:`~.dp`.
+
+	Matching two positions which score more than twice the gap penalty is never better than
+	adding a gap to each alignment. This includes all positions whose peaks are outside
+	of the retention time cutoff, which have the worst possible score of 1, unless the gap penalty is 0.5 or more.
+	Matches scoring exactly twice the gap penalty are as good as two gaps, and are kept in the band.
+	The band is the smallest set of rows, with non-decreasing start and end columns,
+	that connects all other possible matches between the corners of the cost matrix.
+
+	:param S: Score matrix
+	:param gap_penalty: Gap penalty
+
+	:return: The first and last column of the band in each row of the cost matrix.
+	"""
+
+	row_length, col_length = S.shape
+
+	required_lo = numpy.full(row_length + 1, col_length, dtype=numpy.intp)
+	required_hi = numpy.zeros(row_length + 1, dtype=numpy.intp)
+
+	# Each possible match, and the cell it is reached from.
+	# The score matrix is searched in blocks of rows to limit the size of the temporary arrays.
+	block_size = max(1, _SCORE_BLOCK_SIZE // max(col_length, 1))
+	for block_start in range(0, row_length, block_size):
+		match_i, match_j = numpy.nonzero(S[block_start:block_start + block_size] <= 2 * gap_penalty)
+		match_i += block_start
+
+		for i_offset in (0, 1):
+			numpy.minimum.at(required_lo, match_i + i_offset, match_j + i_offset)
+			numpy.maximum.at(required_hi, match_i + i_offset, match_j + i_offset)
+
+	required_lo[0] = 0
+	required_hi[-1] = col_length
+
+	lo = numpy.minimum.accumulate(required_lo[::-1])[::-1]
+	hi = numpy.maximum.accumulate(required_hi)
+	# Ensure each row overlaps the next
+	hi[:-1] = numpy.maximum(hi[:-1], lo[1:])
+
+	return lo, hi
 
 
 def position_similarity(pos1, pos2, D) -> float:
@@ -313,8 +852,6 @@ def position_similarity(pos1, pos2, D) -> float:
 	count = 0
 
 	# Attempt to speed up by only calculating 'in-range' values
-	# set tolerance to 1/1000
-	_TOL = 0.001
 	cutoff = D * math.sqrt(-2.0 * math.log(_TOL))
 
 	for a in pos1:
@@ -344,10 +881,7 @@ def position_similarity(pos1, pos2, D) -> float:
 						try:
 							top = numpy.dot(mass_spect1, mass_spect2)
 						except ValueError:
-							raise ValueError(
-									"""Mass Spectra are of different lengths.
-Use `IntensityMatrix.crop_mass()` to set same length for all Mass Spectra"""
-									)
+							raise ValueError(_different_lengths_msg)
 
 						bot = numpy.sqrt(mass_spect1_sum * mass_spect2_sum)
 						if bot > 0:
@@ -377,51 +911,49 @@ def merge_alignments(A1: Alignment, A2: Alignment, traces) -> Alignment:
 	:return: A single alignment from ``A1`` and ``A2``.
 
 	:authors: Woon Wai Keen, Vladimir Likic, Qiao Wang
+
+	.. versionchanged:: 2.4.0
+
+		The alignments' index matrices are now merged, without creating lists of peaks,
+		and the positions are sorted by their mean retention time.
+		The :attr:`~pyms.DPA.Alignment.Alignment.aggregates` of the merged positions
+		are calculated from those of ``A1`` and ``A2``.
 	"""
 
 	# Create object to hold new merged alignment and fill in its expr_codes
 	ma = Alignment(None)
 	ma.expr_code = A1.expr_code + A2.expr_code
 
-	# create empty lists of dimension |A1| + |A2|
-	dimension = len(A1.peakpos) + len(A2.peakpos)
-	merged: List[List[Peak]] = [[] for _ in range(dimension)]
-
-	idx1 = idx2 = 0
-
 	# trace can either be 0, 1, or 2
 	# if it is 0, there are no gaps. otherwise, if it is 1 or 2,
 	# there is a gap in A2 or A1 respectively.
+	traces = numpy.asarray(traces, dtype=int).reshape(-1)
+	in_a1 = traces != 2
+	in_a2 = traces != 1
 
-	for trace in traces:
-
-		if trace in {0, 1}:
-			for i, _ in enumerate(A1.peakpos):
-				merged[i].append(A1.peakpos[i][idx1])
+	# The position in A1 and A2 of each position in the merged alignment
+	idx1 = numpy.cumsum(in_a1) - 1
+	idx2 = numpy.cumsum(in_a2) - 1
 
-			idx1 = idx1 + 1
+	positions1 = numpy.where(in_a1, idx1, -1)
+	positions2 = numpy.where(in_a2, idx2, -1)
 
-		elif trace == 2:
-			for i, _ in enumerate(A1.peakpos):
-				merged[i].append(None)  # type: ignore
+	# Gaps are taken from the row of -1 appended to each index matrix
+	index1 = numpy.vstack([A1.index, numpy.full((1, A1.index.shape[1]), -1)])[positions1]
+	index2 = numpy.vstack([A2.index, numpy.full((1, A2.index.shape[1]), -1)])[positions2]
 
-		# ---
+	# The aggregates of each position are the sums of those of the merged positions
+	aggregates = PositionAggregates._merge(A1.aggregates, positions1, A2.aggregates, positions2)
 
-		if trace in {0, 2}:
-			for j, peak in enumerate(A2.peakpos):
-				merged[1 + i + j].append(peak[idx2])
-
-			idx2 = idx2 + 1
-
-		elif trace == 1:
-			for j, _ in enumerate(A2.peakpos):
-				merged[1 + i + j].append(None)  # type: ignore
-
-	ma.peakalgt = numpy.transpose(merged)
 	# sort according to average peak
-	ma.peakalgt = list(ma.peakalgt)
-	ma.peakalgt.sort(key=functools.cmp_to_key(alignment_compare))
-	ma.peakpos = numpy.transpose(ma.peakalgt)
+	order = numpy.argsort(aggregates.rt_mean, kind="stable")
+
+	ma._set_index(
+			A1.peak_lists + A2.peak_lists,
+			numpy.hstack([index1, index2])[order],
+			A1._get_peak_arrays() + A2._get_peak_arrays(),
+			aggregates._take(order),
+			)
 
 	return ma
 
@@ -484,169 +1016,203 @@ def alignment_compare(x, y):
 		return 1
 
 
-def score_matrix_mpi(a1: Alignment, a2: Alignment, D: float) -> Alignment:
+def align_with_tree(
+		T: PairwiseAlignment,
+		min_peaks: int = 1,
+		executor: Optional[Executor] = None,
+		) -> Alignment:
 	"""
-	Calculates the score matrix between two alignments.
-
-	:param a1: The first alignment.
-	:param a2: The second alignment.
-	:param D: Retention time tolerance.
+	Aligns a list of alignments using the supplied guide tree.
 
-	:return: Aligned alignments
+	:param T: The pairwise alignment object.
+	:param min_peaks:
+	:param executor: Optional :class:`concurrent.futures.Executor` to merge the alignments in parallel.
+		Merges whose alignments are both available run concurrently.
+		When only one merge can run, its score matrix is calculated in parallel instead.
+		The final alignment is identical to that aligned without an executor.
 
-	:authors: Qiao Wang, Andrew Isaac
-	"""
+	:return: The final alignment consisting of aligned input alignments.
 
-	# sim_score = 0
+	:authors: Woon Wai Keen, Vladimir Likic
 
-	comm = MPI.COMM_WORLD
-	rank = comm.Get_rank()
-	size = comm.Get_size()
+	.. versionchanged:: 2.4.0  Added the ``executor`` argument.
 
-	portion = int(float(len(a1.peakalgt)) / size)
+	.. versionchanged:: 2.4.0
 
-	# print("length of a1.peakalgt =", len(a1.peakalgt))
-	# print("portion size = ", portion)
+		The alignments are no longer copied, as merging them creates new alignments
+		which share their peaks. Each intermediate alignment is released once it has been merged.
+	"""
 
-	# if rank == 0:
-	score_matrix = numpy.zeros((len(a1.peakalgt), len(a2.peakalgt)))
+	print(f" Aligning {len(T.alignments):d} items with guide tree (D={T.D:.2f}, gap={T.gap:.2f})")
 
-	if rank < size - 1:  # if it's not the last slice
-		score_matrix_part = numpy.zeros((portion, len(a2.peakalgt)))
-		a1_part = a1.peakalgt[rank * portion:(rank + 1) * portion]
-	else:  # if it's the last strip, prob not full portion
-		score_matrix_part = numpy.zeros((
-				len(a1.peakalgt) - (rank * portion),
-				len(a2.peakalgt),
-				))
-		a1_part = a1.peakalgt[rank * portion:len(a1.peakalgt)]
+	# For everything else, we align according to the guide tree provided by
+	# Pycluster. From Pycluster documentation:
+	#   Each item and subnode is represented by an integer. For hierarchical
+	#   clustering of n items, we number the original items {0, ... , n-1},
+	#   nodes are numbered {-1, ... , -(n-1)}. Note that the number of nodes
+	#   is one less than the number of items.
 
-	for i, algt1pos in enumerate(a1_part):
-		for j, algt2pos in enumerate(a2.peakalgt):
-			sim_score = position_similarity(algt1pos, algt2pos, D)
-			score_matrix_part[i][j] = sim_score
+	# extend As to length 2n to hold the n items, n-1 nodes, and 1 root
+	As: List[Optional[Alignment]] = [*T.alignments, *(None for _ in range(len(T.alignments)))]
 
-	if rank == 0:
-		score_matrix[0:portion] = score_matrix_part
-		for i in range(1, size):
-			if i == size - 1:
-				recv_buffer = numpy.zeros((len(a1.peakalgt) - (i * portion), len(a2.peakalgt)))
-				comm.Recv(recv_buffer, i)
-				score_matrix[i * portion:len(a1.peakalgt)] = recv_buffer
-			else:
-				recv_buffer = numpy.zeros((portion, len(a2.peakalgt)))
-				comm.Recv(recv_buffer, i)
-				score_matrix[i * portion:(i + 1) * portion] = recv_buffer
+	# align the alignments into positions -1, ... ,-(n-1)
+	nodes = [(node.left, node.right) for node in T.tree[:]]
+	_merge_tree(As, nodes, T.D, T.gap, executor)
 
-	# print("I am rank 0, done!", score_matrix)
+	# the final alignment is in the root. Filter min peaks and return
+	final_algt = As[-len(nodes)]
+	assert final_algt is not None
 
-	else:
-		# all other process send their result
-		comm.Send(score_matrix_part)
+	# useful for within state alignment only
+	if min_peaks > 1:
+		final_algt.filter_min_peaks(min_peaks)
 
-	outputs = []
-	if rank == 0:
-		for rank in range(size):
-			# print rank
-			outputs.append(score_matrix)
+	return final_algt
 
-	score_matrix = comm.scatter(outputs, root=0)
 
-	# print("before return, rank", rank)
-	return score_matrix
+def add_experiments(
+		alignment: Alignment,
+		expr_list: Sequence[Experiment],
+		D: float,
+		gap: float,
+		min_peaks: int = 1,
+		executor: Optional[Executor] = None,
+		) -> Alignment:
+	"""
+	Adds experiments to an existing alignment, without aligning the experiments already in it again.
 
+	The new experiments are aligned with each other using a :class:`~.PairwiseAlignment`
+	and :func:`~.align_with_tree`, and the result is aligned with ``alignment`` by :func:`~.align`.
+	This takes a fraction of the time needed to align all the experiments again,
+	but the experiments already in ``alignment`` do not influence how the new experiments are aligned with each other.
 
-def align_with_tree(T: PairwiseAlignment, min_peaks: int = 1) -> Alignment:
-	"""
-	Aligns a list of alignments using the supplied guide tree.
+	To align all the experiments with a new guide tree instead, pass the :attr:`~.PairwiseAlignment.sim_matrix`
+	of the earlier :class:`~.PairwiseAlignment` as the ``sim_matrix`` argument of a new one, with the new
+	experiments' alignments after the existing ones, so only the pairs including a new experiment are aligned.
 
-	:param T: The pairwise alignment object.
-	:param min_peaks:
+	:param alignment: The existing alignment, which is not modified.
+	:param expr_list: The experiments to add.
+	:param D: Retention time tolerance parameter for pairwise alignments.
+	:param gap: Gap parameter for pairwise alignments.
+	:param min_peaks: The minimum number of peaks a position of the final alignment must have.
+	:param executor: Optional :class:`concurrent.futures.Executor` to align the experiments in parallel.
 
-	:return: The final alignment consisting of aligned input alignments.
+	:return: The alignment of the existing and new experiments.
 
-	:authors: Woon Wai Keen, Vladimir Likic
+	.. versionadded:: 2.4.0
 	"""
 
-	print(f" Aligning {len(T.alignments):d} items with guide tree (D={T.D:.2f}, gap={T.gap:.2f})")
+	if not isinstance(alignment, Alignment):
+		raise TypeError("'alignment' must be an Alignment object")
 
-	# For everything else, we align according to the guide tree provided by
-	# Pycluster. From Pycluster documentation:
-	#   Each item and subnode is represented by an integer. For hierarchical
-	#   clustering of n items, we number the original items {0, ... , n-1},
-	#   nodes are numbered {-1, ... , -(n-1)}. Note that the number of nodes
-	#   is one less than the number of items.
+	if not is_sequence_of(expr_list, Experiment) or not expr_list:
+		raise TypeError("'expr_list' must be a non-empty Sequence of Experiment objects")
 
-	# extend As to length 2n to hold the n items, n-1 nodes, and 1 root
-	As: List[Alignment] = copy.deepcopy(T.alignments) + [None for _ in range(len(T.alignments))]  # type: ignore
+	if not isinstance(D, float):
+		raise TypeError("'D' must be a float")
 
-	# align the alignments into positions -1, ... ,-(n-1)
-	total = len(T.tree)
-	index = 0
+	if not isinstance(gap, float):
+		raise TypeError("'gap' must be a float")
 
-	for node in T.tree[:]:
-		index = index - 1
-		As[index] = align(As[node.left], As[node.right], T.D, T.gap)
-		total = total - 1
-		print(f" -> {total:d} item(s) remaining")
+	if len(expr_list) == 1:
+		new_algt = Alignment(expr_list[0])
+	else:
+		T = PairwiseAlignment([Alignment(expr) for expr in expr_list], D, gap, executor=executor)
+		new_algt = align_with_tree(T, executor=executor)
 
-	# the final alignment is in the root. Filter min peaks and return
-	final_algt: Alignment = As[index]
+	print(f" Adding {len(expr_list):d} items to an alignment of {len(alignment.expr_code):d} items")
+	final_algt = align(alignment, new_algt, D, gap, executor=executor)
 
-	# useful for within state alignment only
 	if min_peaks > 1:
 		final_algt.filter_min_peaks(min_peaks)
 
 	return final_algt
 
 
-#
-# def align_with_tree_mpi(T: Alignment, min_peaks: int = 1) -> Alignment:
-# 	"""
-# 	Aligns a list of alignments using the supplied guide tree
-#
-# 	:param T: The pairwise alignment object
-# 	:param min_peaks:
-#
-# 	:return: The final alignment consisting of aligned input alignments
-#
-# 	:authors: Woon Wai Keen, Vladimir Likic
-# 	"""
-#
-# 	try:
-# 		rank = MPI.COMM_WORLD.Get_rank()
-# 	except:
-# 		rank = 0
-#
-# 	if rank == 0:
-# 		print(f" Aligning {len(T.alignments):d} items with guide tree (D={T.D:.2f}, gap={T.gap:.2f})")
-#
-# 	# For everything else, we align according to the guide tree provided by
-# 	# Pycluster. From Pycluster documentation:
-# 	#   Each item and subnode is represented by an integer. For hierarchical
-# 	#   clustering of n items, we number the original items {0, ... , n-1},
-# 	#   nodes are numbered {-1, ... , -(n-1)}. Note that the number of nodes
-# 	#   is one less than the number of items.
-#
-# 	# extend As to length 2n to hold the n items, n-1 nodes, and 1 root
-# 	As = copy.deepcopy(T.alignments) + [None for _ in range(len(T.alignments))]
-#
-# 	# align the alignments into positions -1, ... ,-(n-1)
-# 	total = len(T.tree)
-# 	index = 0
-#
-# 	for node in T.tree[:]:
-# 		index = index - 1
-# 		As[index] = align(As[node.left], As[node.right], T.D, T.gap)
-# 		total = total - 1
-# 		if rank == 0:
-# 			print(f" -> {total:d} item(s) remaining")
-#
-# 	# the final alignment is in the root. Filter min peaks and return
-# 	final_algt = As[index]
-#
-# 	# useful for within state alignment only
-# 	if min_peaks > 1:
-# 		final_algt.filter_min_peaks(min_peaks)
-#
-# 	return final_algt
+def _merge_tree(
+		As: List[Optional[Alignment]],
+		nodes: Sequence[Tuple[int, int]],
+		D: float,
+		gap: float,
+		executor: Optional[Executor] = None,
+		) -> None:
+	"""
+	Merges the alignments in the order given by the guide tree, storing the alignment of each node in ``As``.
+
+	With an executor, merges whose alignments are both available run concurrently.
+	When only one merge can run, its score matrix is calculated on the executor instead.
+	Each merge gives the same result however it is run.
+
+	:param As: The alignments, followed by a space for the alignment of each node.
+	:param nodes: The left and right children of each node.
+	:param D: Retention time tolerance.
+	:param gap: Gap penalty.
+	:param executor:
+	"""
+
+	remaining = len(nodes)
+
+	def child_alignments(node_idx: int) -> Tuple[Alignment, Alignment]:
+		left, right = nodes[node_idx]
+		a1, a2 = As[left], As[right]
+		assert a1 is not None and a2 is not None
+		return a1, a2
+
+	def store(node_idx: int, alignment: Alignment) -> None:
+		nonlocal remaining
+
+		left, right = nodes[node_idx]
+		As[-1 - node_idx] = alignment
+		As[left] = As[right] = None
+		remaining -= 1
+		print(f" -> {remaining:d} item(s) remaining")
+
+	if executor is None:
+		for node_idx in range(len(nodes)):
+			store(node_idx, align(*child_alignments(node_idx), D, gap))
+		return
+
+	# The node whose merge uses each node's alignment,
+	# and the number of each node's children which have not been merged yet.
+	parents: Dict[int, int] = {}
+	waiting: List[int] = []
+	ready: List[int] = []
+
+	for node_idx, (left, right) in enumerate(nodes):
+		children = [child for child in (left, right) if child < 0]
+		for child in children:
+			parents[-1 - child] = node_idx
+
+		waiting.append(len(children))
+		if not children:
+			ready.append(node_idx)
+
+	running: Dict[Future, int] = {}
+
+	def finish(node_idx: int, alignment: Alignment) -> None:
+		store(node_idx, alignment)
+
+		parent = parents.get(node_idx)
+		if parent is not None:
+			waiting[parent] -= 1
+			if not waiting[parent]:
+				ready.append(parent)
+
+	try:
+		while ready or running:
+			if len(ready) == 1 and not running:
+				# Only one merge can run, so divide its score matrix between the workers instead.
+				node_idx = ready.pop()
+				finish(node_idx, align(*child_alignments(node_idx), D, gap, executor=executor))
+				continue
+
+			for node_idx in sorted(ready):
+				running[executor.submit(align, *child_alignments(node_idx), D, gap)] = node_idx
+			ready.clear()
+
+			done, _ = wait(running, return_when=FIRST_COMPLETED)
+			for future in sorted(done, key=running.__getitem__):
+				finish(running.pop(future), future.result())
+	finally:
+		for future in running:
+			future.cancel()
@@ -0,0 +1,279 @@
+"""
+Alignment of peak lists to a reference alignment.
+
+Rather than aligning every pair of experiments, as :class:`~pyms.DPA.PairwiseAlignment.PairwiseAlignment` does,
+each experiment is aligned to a reference alignment independently, and the peaks aligned to the same
+position of the reference are placed in the same position of the final alignment.
+The time taken increases linearly with the number of experiments.
+
+.. versionadded:: 2.4.0
+"""
+
+################################################################################
+#                                                                              #
+#    PyMassSpec software for processing of mass-spectrometry data              #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                              #
+#                                                                              #
+#    This program is free software; you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License version 2 as         #
+#    published by the Free Software Foundation.                                #
+#                                                                              #
+#    This program is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of            #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the             #
+#    GNU General Public License for more details.                              #
+#                                                                              #
+#    You should have received a copy of the GNU General Public License         #
+#    along with this program; if not, write to the Free Software               #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.                 #
+#                                                                              #
+################################################################################
+
+# stdlib
+import functools
+import os
+from concurrent.futures import Executor
+from typing import List, Optional, Sequence
+
+# 3rd party
+import numpy  # type: ignore
+
+# this package
+from pyms.DPA.Alignment import Alignment
+from pyms.DPA.PairwiseAlignment import (
+		_CHUNKS_PER_CPU,
+		PairwiseAlignment,
+		_PositionStack,
+		_stack_positions,
+		_stacked_score_matrix,
+		align_with_tree,
+		dp
+		)
+from pyms.Experiment import Experiment
+from pyms.Utils.Utils import is_sequence_of
+
+__all__ = ["build_reference", "align_to_reference"]
+
+
+def build_reference(
+		expr_list: Sequence[Experiment],
+		D: float,
+		gap: float,
+		n_experiments: int = 10,
+		min_peaks: int = 1,
+		executor: Optional[Executor] = None,
+		) -> Alignment:
+	"""
+	Builds a reference alignment from a subset of the experiments, for :func:`~.align_to_reference`.
+
+	The subset is ``n_experiments`` experiments spread evenly through ``expr_list``,
+	which are aligned with :class:`~pyms.DPA.PairwiseAlignment.PairwiseAlignment`
+	and :func:`~pyms.DPA.PairwiseAlignment.align_with_tree`.
+
+	:param expr_list: The experiments.
+	:param D: Retention time tolerance parameter for pairwise alignments.
+	:param gap: Gap parameter for pairwise alignments.
+	:param n_experiments: The number of experiments in the reference.
+	:param min_peaks: The minimum number of peaks a position of the reference must have.
+	:param executor: Optional :class:`concurrent.futures.Executor` to align the subset in parallel.
+
+	:return: The alignment of the subset of experiments.
+	"""
+
+	if not is_sequence_of(expr_list, Experiment) or not expr_list:
+		raise TypeError("'expr_list' must be a non-empty Sequence of Experiment objects")
+
+	if not isinstance(D, float):
+		raise TypeError("'D' must be a float")
+
+	if not isinstance(gap, float):
+		raise TypeError("'gap' must be a float")
+
+	if not isinstance(n_experiments, int):
+		raise TypeError("'n_experiments' must be an integer")
+
+	if n_experiments < 1:
+		raise ValueError("'n_experiments' must be at least 1")
+
+	n_experiments = min(n_experiments, len(expr_list))
+	subset = [expr_list[idx] for idx in numpy.linspace(0, len(expr_list) - 1, n_experiments).round().astype(int)]
+
+	if len(subset) == 1:
+		reference = Alignment(subset[0])
+		reference.filter_min_peaks(min_peaks)
+		return reference
+
+	alignments = [Alignment(expr) for expr in subset]
+	T = PairwiseAlignment(alignments, D, gap, executor=executor)
+
+	return align_with_tree(T, min_peaks=min_peaks, executor=executor)
+
+
+def align_to_reference(
+		expr_list: Sequence[Experiment],
+		D: float,
+		gap: float,
+		reference: Optional[Alignment] = None,
+		min_peaks: int = 1,
+		executor: Optional[Executor] = None,
+		) -> Alignment:
+	"""
+	Aligns the experiments by aligning each of them to a reference alignment.
+
+	Each experiment is aligned to the reference in the same way as by :func:`~pyms.DPA.PairwiseAlignment.align`.
+	Peaks aligned to the same position of the reference are placed in the same position of the final alignment,
+	and each peak not aligned to the reference is placed in a position of its own.
+	The positions are sorted by their mean retention time.
+
+	:param expr_list: The experiments to align.
+	:param D: Retention time tolerance parameter for pairwise alignments.
+	:param gap: Gap parameter for pairwise alignments.
+	:param reference: The reference alignment, for example a consensus alignment of some of the experiments.
+		If :py:obj:`None` the reference is created with :func:`~.build_reference`.
+	:param min_peaks: The minimum number of peaks a position of the final alignment must have.
+	:param executor: Optional :class:`concurrent.futures.Executor` to align the experiments to the reference in parallel.
+		The final alignment is identical to that aligned without an executor.
+
+	:return: The alignment of the experiments. The peaks of the reference are not included.
+	"""
+
+	if not is_sequence_of(expr_list, Experiment) or not expr_list:
+		raise TypeError("'expr_list' must be a non-empty Sequence of Experiment objects")
+
+	if not isinstance(D, float):
+		raise TypeError("'D' must be a float")
+
+	if not isinstance(gap, float):
+		raise TypeError("'gap' must be a float")
+
+	if reference is None:
+		reference = build_reference(expr_list, D, gap, executor=executor)
+	elif not isinstance(reference, Alignment):
+		raise TypeError("'reference' must be an Alignment object")
+
+	if not isinstance(min_peaks, int):
+		raise TypeError("'min_peaks' must be an integer")
+
+	print(f" Aligning {len(expr_list):d} items to a reference of {len(reference):d} positions (D={D:.2f}, gap={gap:.2f})")
+
+	alignments = [Alignment(expr) for expr in expr_list]
+	reference_stack = _stack_positions(reference)
+	stacks = [_stack_positions(alignment) for alignment in alignments]
+
+	map_to_reference = functools.partial(_map_to_reference, reference_stack, D=D, gap=gap)
+
+	if executor is None:
+		mappings = list(map(map_to_reference, stacks))
+	else:
+		n_chunks = min(len(stacks), _CHUNKS_PER_CPU * (os.cpu_count() or 1))
+		bounds = numpy.linspace(0, len(stacks), n_chunks + 1).round().astype(int)
+		chunks = [stacks[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+		mappings = []
+		for chunk_mappings in executor.map(functools.partial(_map_chunk, reference_stack, D=D, gap=gap), chunks):
+			mappings.extend(chunk_mappings)
+
+	return _combine_mappings(alignments, mappings, len(reference), min_peaks)
+
+
+def _map_to_reference(reference_stack: _PositionStack, stack: _PositionStack, D: float, gap: float) -> numpy.ndarray:
+	"""
+	Aligns the peaks of an experiment to the reference.
+
+	:param reference_stack: The stacked peaks of the reference.
+	:param stack: The stacked peaks of the experiment.
+	:param D: Retention time tolerance.
+	:param gap: Gap penalty.
+
+	:return: The position of the reference each peak is aligned to, or ``-1``.
+	"""
+
+	M = _stacked_score_matrix(reference_stack, stack, D)
+	traces = numpy.asarray(dp(M, gap, banded=True)["trace"], dtype=int)
+
+	# trace can either be 0, 1, or 2
+	# if it is 0, there are no gaps. otherwise, if it is 1 or 2,
+	# there is a gap in the experiment or the reference respectively.
+	ref_idx = numpy.cumsum(traces != 2) - 1
+	peak_idx = numpy.cumsum(traces != 1) - 1
+	matched = traces == 0
+
+	mapping = numpy.full(stack.length, -1, dtype=numpy.intp)
+	mapping[peak_idx[matched]] = ref_idx[matched]
+
+	return mapping
+
+
+def _map_chunk(
+		reference_stack: _PositionStack,
+		stacks: Sequence[_PositionStack],
+		D: float,
+		gap: float,
+		) -> List[numpy.ndarray]:
+	"""
+	Aligns the peaks of several experiments to the reference.
+
+	:param reference_stack: The stacked peaks of the reference.
+	:param stacks: The stacked peaks of the experiments.
+	:param D: Retention time tolerance.
+	:param gap: Gap penalty.
+	"""
+
+	return [_map_to_reference(reference_stack, stack, D, gap) for stack in stacks]
+
+
+def _combine_mappings(
+		alignments: Sequence[Alignment],
+		mappings: Sequence[numpy.ndarray],
+		n_reference: int,
+		min_peaks: int,
+		) -> Alignment:
+	"""
+	Combines the alignments of the experiments to the reference into a single alignment.
+
+	:param alignments: The alignment of each experiment on its own.
+	:param mappings: The position of the reference each peak of each experiment is aligned to, or ``-1``.
+	:param n_reference: The number of positions in the reference.
+	:param min_peaks: The minimum number of peaks a position must have.
+	"""
+
+	n_expr = len(alignments)
+	index = numpy.full((n_reference, n_expr), -1, dtype=numpy.intp)
+
+	# Each peak not aligned to the reference gets a position of its own
+	unmatched_expr = []
+	unmatched_peaks = []
+
+	for expr_idx, mapping in enumerate(mappings):
+		matched = mapping >= 0
+		index[mapping[matched], expr_idx] = numpy.flatnonzero(matched)
+
+		unmatched = numpy.flatnonzero(~matched)
+		unmatched_expr.append(numpy.full(len(unmatched), expr_idx, dtype=numpy.intp))
+		unmatched_peaks.append(unmatched)
+
+	unmatched_expr_idx = numpy.concatenate(unmatched_expr)
+	extra_index = numpy.full((len(unmatched_expr_idx), n_expr), -1, dtype=numpy.intp)
+	extra_index[numpy.arange(len(unmatched_expr_idx)), unmatched_expr_idx] = numpy.concatenate(unmatched_peaks)
+
+	index = numpy.vstack([index, extra_index])
+
+	# Positions of the reference with no peaks aligned to them are dropped
+	index = index[(index >= 0).any(axis=1)]
+
+	ma = Alignment(None)
+	ma.expr_code = [code for alignment in alignments for code in alignment.expr_code]
+
+	peak_lists = [peaks for alignment in alignments for peaks in alignment.peak_lists]
+	peak_arrays = [arrays for alignment in alignments for arrays in alignment._get_peak_arrays()]
+	ma._set_index(peak_lists, index, peak_arrays)
+
+	# sort according to average peak
+	aggregates = ma.aggregates
+	order = numpy.argsort(aggregates.rt_mean, kind="stable")
+	ma._set_index(peak_lists, index[order], peak_arrays, aggregates._take(order))
+
+	if min_peaks > 1:
+		ma.filter_min_peaks(min_peaks)
+
+	return ma
@@ -25,8 +25,10 @@ Models a GC-MS experiment, represented by a list of signal peaks.
 
 # stdlib
 import copy
+import functools
 import pickle
-from typing import List, Sequence
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
 
 # 3rd party
 from domdf_python_tools.typing import PathLike
@@ -35,6 +37,8 @@ from domdf_python_tools.typing import PathLike
 from pyms.Base import pymsBaseClass
 from pyms.Peak.Class import Peak
 from pyms.Peak.List.Function import is_peak_list, sele_peaks_by_rt
+from pyms.Peak.List.IO import is_binary_peak_list, load_peak_attributes, load_peak_table, store_peak_table
+from pyms.Peak.List.Table import PeakTable
 from pyms.Utils.IO import prepare_filepath
 from pyms.Utils.Utils import is_path, is_sequence
 
@@ -45,21 +49,47 @@ class Experiment(pymsBaseClass):
 	"""
 	Models an experiment.
 
+	If the peaks are given as a :class:`~pyms.Peak.List.Table.PeakTable` they are kept in that form,
+	and the :class:`~pyms.Peak.Class.Peak` objects are only created when
+	:attr:`~.Experiment.peak_list` is first accessed.
+	If a function is given it is called to load the peaks the first time they are needed.
+
 	:param expr_code: A unique identifier for the experiment.
-	:param peak_list:
+	:param peak_list: The peaks, as a list of :class:`~pyms.Peak.Class.Peak` objects
+		or a :class:`~pyms.Peak.List.Table.PeakTable`, or a function which returns
+		a :class:`~pyms.Peak.List.Table.PeakTable`.
 
 	:author: Vladimir Likic, Andrew Isaac,  Dominic Davis-Foster (type assertions, properties and pathlib support)
+
+	.. versionchanged:: 2.4.0
+
+		``peak_list`` may be a :class:`~pyms.Peak.List.Table.PeakTable`
+		or a function which returns one.
 	"""
 
-	def __init__(self, expr_code: str, peak_list: Sequence[Peak]):
+	def __init__(
+			self,
+			expr_code: str,
+			peak_list: Union[Sequence[Peak], PeakTable, Callable[[], PeakTable]],
+			):
 		if not isinstance(expr_code, str):
 			raise TypeError("'expr_code' must be a string")
 
-		if not is_peak_list(peak_list):
-			raise TypeError("'peak_list' must be a list of Peak objects")
-
 		self._expr_code = expr_code
-		self._peak_list = list(peak_list)
+		self._peak_list: Optional[List[Peak]] = None
+		self._peak_table: Optional[PeakTable] = None
+
+		# Called to load the peak table the first time the peaks are needed.
+		self._peak_loader: Optional[Callable[[], PeakTable]] = None
+
+		if isinstance(peak_list, PeakTable):
+			self._peak_table = peak_list
+		elif callable(peak_list):
+			self._peak_loader = peak_list
+		elif is_peak_list(peak_list):
+			self._peak_list = list(peak_list)
+		else:
+			raise TypeError("'peak_list' must be a list of Peak objects")
 
 	def __eq__(self, other) -> bool:
 		"""
@@ -78,7 +108,10 @@ class Experiment(pymsBaseClass):
 		Returns the number of peaks in the Experiment.
 		"""
 
-		return len(self.peak_list)
+		if self._peak_list is None:
+			return len(self._get_peak_table())
+
+		return len(self._peak_list)
 
 	def __copy__(self) -> "Experiment":
 		"""
@@ -94,6 +127,13 @@ class Experiment(pymsBaseClass):
 
 		return self.__copy__()
 
+	def __getstate__(self) -> Dict[str, Any]:
+		# The same as earlier versions, which stored the peak list directly.
+		return {"_expr_code": self._expr_code, "_peak_list": self.peak_list}
+
+	def __setstate__(self, state: Dict[str, Any]):
+		self.__init__(state["_expr_code"], state["_peak_list"])  # type: ignore
+
 	@property
 	def expr_code(self) -> str:
 		"""
@@ -106,10 +146,47 @@ class Experiment(pymsBaseClass):
 	def peak_list(self) -> List[Peak]:
 		"""
 		Returns the peak list.
+
+		.. versionchanged:: 2.4.0
+
+			If the peaks were given as a :class:`~pyms.Peak.List.Table.PeakTable`, or have not been loaded yet,
+			the :class:`~pyms.Peak.Class.Peak` objects are created when this is first accessed.
 		"""
 
+		if self._peak_list is None:
+			self._peak_list = self._get_peak_table().to_peak_list()
+			self._peak_table = None
+
 		return self._peak_list
 
+	@property
+	def peak_table(self) -> PeakTable:
+		"""
+		Returns the peaks as a :class:`~pyms.Peak.List.Table.PeakTable`.
+
+		If the :class:`~pyms.Peak.Class.Peak` objects have not been created yet
+		this does not create them.
+
+		.. versionadded:: 2.4.0
+		"""
+
+		if self._peak_list is None:
+			return self._get_peak_table()
+
+		return PeakTable.from_peak_list(self._peak_list)
+
+	def _get_peak_table(self) -> PeakTable:
+		"""
+		Returns the peak table, loading it if necessary.
+		"""
+
+		if self._peak_table is None:
+			assert self._peak_loader is not None
+			self._peak_table = self._peak_loader()
+			self._peak_loader = None
+
+		return self._peak_table
+
 	def sele_rt_range(self, rt_range: Sequence[str]):
 		"""
 		Discards all peaks which have the retention time outside the specified range.
@@ -120,19 +197,51 @@ class Experiment(pymsBaseClass):
 		if not is_sequence(rt_range):
 			raise TypeError("'rt_range' must be a Sequence")
 
-		peaks_sele = sele_peaks_by_rt(self._peak_list, rt_range)
-		self._peak_list = peaks_sele
+		if self._peak_list is None:
+			self._peak_table = sele_peaks_by_rt(self._get_peak_table(), rt_range)
+		else:
+			self._peak_list = sele_peaks_by_rt(self._peak_list, rt_range)
+
+	def store(self, file_name: PathLike, compress: bool = False):
+		"""
+		Stores the experiment in a compact columnar binary format.
+
+		The peaks are stored in the same format as :func:`~pyms.Peak.List.IO.store_peak_table`,
+		so the mass spectra of all peaks must have the same mass list.
+		The experiment can be loaded with :func:`~.load_expr`.
+
+		:param file_name: Experiment file name.
+		:param compress: Whether to compress the arrays.
+
+		.. versionadded:: 2.4.0
+		"""
+
+		if not is_path(file_name):
+			raise TypeError("'file_name' must be a string or a PathLike object")
+
+		store_peak_table(self.peak_table, file_name, compress=compress, attributes={"expr_code": self._expr_code})
 
 
-def read_expr_list(file_name: PathLike) -> List[Experiment]:
+def read_expr_list(
+		file_name: PathLike,
+		lazy: bool = False,
+		executor: Optional[Executor] = None,
+		) -> List[Experiment]:
 	"""
 	Reads the set of experiment files and returns a list of :class:`pyms.Experiment.Experiment` objects.
 
 	:param file_name: The name of the file which lists experiment dump file names, one file per line.
+	:param lazy: Whether to defer loading the peaks of experiments stored with :meth:`~.Experiment.store`
+		until they are needed. See :func:`~.load_expr`.
+	:param executor: Optional :class:`concurrent.futures.Executor` to load the experiments concurrently.
+		A :class:`~concurrent.futures.ThreadPoolExecutor` avoids copying the
+		loaded experiments between processes.
 
 	:return: A list of Experiment instances.
 
 	:author: Vladimir Likic
+
+	.. versionchanged:: 2.4.0  Added the ``lazy`` and ``executor`` arguments.
 	"""
 
 	if not is_path(file_name):
@@ -142,37 +251,52 @@ def read_expr_list(file_name: PathLike) -> List[Experiment]:
 
 	fp = file_name.open()
 
-	exprfiles = fp.readlines()
+	exprfiles = [exprfile.strip() for exprfile in fp.readlines()]
 	fp.close()
 
-	expr_list = []
-
-	for exprfile in exprfiles:
-
-		exprfile = exprfile.strip()
-		expr = load_expr(exprfile)
+	if executor is None:
+		return [load_expr(exprfile, lazy=lazy) for exprfile in exprfiles]
+	else:
+		return list(executor.map(functools.partial(load_expr, lazy=lazy), exprfiles))
 
-		expr_list.append(expr)
 
-	return expr_list
-
-
-def load_expr(file_name: PathLike) -> Experiment:
+def load_expr(file_name: PathLike, lazy: bool = False) -> Experiment:
 	"""
-	Loads an experiment saved with :meth:`pyms.Experiment.Experiment.dump`.
+	Loads an experiment saved with :meth:`pyms.Experiment.Experiment.store`
+	or :meth:`pyms.Experiment.Experiment.dump`.
+
+	The format of the file is detected automatically.
 
 	:param file_name: Experiment file name.
+	:param lazy: Whether to defer loading the peaks of an experiment stored with
+		:meth:`~.Experiment.store` until they are needed.
+		Only the ``expr_code`` is read when the experiment is loaded.
+		Ignored for experiments saved with :meth:`~.Experiment.dump`.
 
 	:return: The loaded experiment.
 
 	:author: Vladimir Likic, Andrew Isaac, Dominic Davis-Foster (type assertions and pathlib support)
-	"""
+
+	.. versionchanged:: 2.4.0
+
+		Added support for the format written by :meth:`~.Experiment.store`, and the ``lazy`` argument.
+	"""  # noqa: D400
 
 	if not is_path(file_name):
 		raise TypeError("'file_name' must be a string or a PathLike object")
 
 	file_name = prepare_filepath(file_name, mkdirs=False)
 
+	if is_binary_peak_list(file_name):
+		attributes = load_peak_attributes(file_name)
+		if "expr_code" not in attributes:
+			raise OSError("The loaded file is not an experiment file")
+
+		if lazy:
+			return Experiment(attributes["expr_code"], functools.partial(load_peak_table, file_name))
+		else:
+			return Experiment(attributes["expr_code"], load_peak_table(file_name))
+
 	fp = file_name.open("rb")
 	expr = pickle.load(fp)
 	fp.close()
@@ -30,12 +30,6 @@ import pathlib
 from domdf_python_tools.typing import PathLike
 from netCDF4 import Dataset  # type: ignore
 
-try:
-	# 3rd party
-	from mpi4py import MPI  # type: ignore
-except ModuleNotFoundError:
-	pass
-
 # this package
 from pyms.GCMS.Class import GCMS_data
 from pyms.Spectrum import Scan
@@ -27,12 +27,6 @@ Functions for reading mzML format data files.
 import pymzml  # type: ignore
 from domdf_python_tools.typing import PathLike
 
-try:
-	# 3rd party
-	from mpi4py import MPI  # type: ignore
-except ModuleNotFoundError:
-	pass
-
 # this package
 from pyms.Base import is_path
 from pyms.GCMS.Class import GCMS_data
@@ -57,29 +51,7 @@ def mzML_reader(file_name: PathLike) -> GCMS_data:
 
 	mzml_file = pymzml.run.Reader(str(file_name))
 
-	try:  # avoid printing from each rank
-		comm = MPI.COMM_WORLD
-		rank = comm.Get_rank()
-		size = comm.Get_size()
-
-		if rank == 0:
-			file_names = []
-
-			for i in range(1, size):
-				recv_buffer = ''
-				file_n = comm.recv(recv_buffer, i)
-				file_names.append(file_n)
-
-			print(" -> Reading mzML files:")
-			print(file_name)
-			for file_n in file_names:
-				print(file_n)
-		else:
-			comm.send(file_name, dest=0)
-	# TODO: Find specific error
-	except Exception as e:
-		print(e)
-		print(f" -> Reading mzML file '{file_name}'")
+	print(f" -> Reading mzML file '{file_name}'")
 
 	scan_list = []
 	time_list = []
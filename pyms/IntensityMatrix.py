@@ -37,7 +37,7 @@ from pyms.Base import pymsBaseClass
 from pyms.GCMS.Class import GCMS_data
 from pyms.IonChromatogram import BasePeakChromatogram, IonChromatogram
 from pyms.Mixins import GetIndexTimeMixin, IntensityArrayMixin, MassListMixin, TimeListMixin
-from pyms.Spectrum import MassSpectrum
+from pyms.Spectrum import MassSpectrum, array_as_numeric
 from pyms.Utils.IO import prepare_filepath, save_data
 from pyms.Utils.Utils import _number_types, is_number, is_path, is_sequence, is_sequence_of
 
@@ -112,6 +112,7 @@ class BaseIntensityMatrix(pymsBaseClass, TimeListMixin, MassListMixin, Intensity
 
 		self._time_list = list(time_list)
 		self._mass_list = list(mass_list)
+		self._mass_axis: Optional[numpy.ndarray] = None
 
 		self._intensity_array = intensity_array
 
@@ -234,9 +235,25 @@ class BaseIntensityMatrix(pymsBaseClass, TimeListMixin, MassListMixin, Intensity
 		if not isinstance(ix, int):
 			raise TypeError("'ix' must be an an integer")
 
-		scan = self.get_scan_at_index(ix)
+		if ix < 0 or ix >= len(self._intensity_array):
+			raise IndexError("index out of range")
+
+		return MassSpectrum(self._get_mass_axis(), self._intensity_array[ix])
+
+	def _get_mass_axis(self) -> numpy.ndarray:
+		"""
+		Returns the masses as a read-only array, which is shared by
+		all mass spectra created from the intensity matrix.
+		"""  # noqa: D400
+
+		mass_axis = getattr(self, "_mass_axis", None)
 
-		return MassSpectrum(self.mass_list, scan)
+		if mass_axis is None:
+			mass_axis = array_as_numeric(self._mass_list)
+			mass_axis.flags.writeable = False
+			self._mass_axis = mass_axis
+
+		return mass_axis
 
 	def get_scan_at_index(self, ix: int) -> List[float]:
 		"""
@@ -335,6 +352,7 @@ class BaseIntensityMatrix(pymsBaseClass, TimeListMixin, MassListMixin, Intensity
 		self._intensity_array = numpy.array(im)
 
 		self._mass_list = new_mass_list
+		self._mass_axis = None
 		self._min_mass = min(new_mass_list)
 		self._max_mass = max(new_mass_list)
 
@@ -413,31 +431,6 @@ class IntensityMatrix(BaseIntensityMatrix):
 			):
 		super().__init__(time_list, mass_list, intensity_array)
 
-		# Try to include parallelism.
-		try:
-			# 3rd party
-			from mpi4py import MPI  # type: ignore
-			comm = MPI.COMM_WORLD
-			num_ranks = comm.Get_size()
-			rank = comm.Get_rank()
-			M, N = len(intensity_array), len(intensity_array[0])
-			lrr = (rank * M / num_ranks, (rank + 1) * M / num_ranks)
-			lcr = (rank * N / num_ranks, (rank + 1) * N / num_ranks)
-			m, n = (lrr[1] - lrr[0], lcr[1] - lcr[0])
-			self.comm = comm
-			self.num_ranks = num_ranks
-			self.rank = rank
-			self.M = M
-			self.N = N
-			self.local_row_range = lrr
-			self.local_col_range = lcr
-			self.m = m
-			self.n = n
-
-		# If we can't import mpi4py then continue in serial.
-		except ModuleNotFoundError:
-			pass
-
 	@property
 	def local_size(self) -> Tuple[int, int]:
 		"""
@@ -447,50 +440,15 @@ class IntensityMatrix(BaseIntensityMatrix):
 		:rtype: int
 
 		:author: Luke Hodkinson
-		"""
-
-		# Check for parallel.
-		if hasattr(self, "comm"):
-			return self.m, self.n
-
-		# If serial call the regular routine.
-		return self.size
-
-	def iter_ms_indices(self) -> Iterator[int]:
-		"""
-		Iterates over the local row indices.
-
-		:author: Luke Hodkinson
-		"""
-
-		# Check for parallel.
-		if hasattr(self, "comm"):
-			# At the moment we assume we break the matrix into contiguous
-			# ranges. We've allowed for this to change by wrapping up the
-			# iteration in this method.
-			yield from range(self.local_row_range[0], self.local_row_range[1])
 
-		else:
-			# Iterate over global indices.
-			return super().iter_ms_indices()
+		.. versionchanged:: 2.4.0
 
-	def iter_ic_indices(self) -> Iterator[int]:
-		"""
-		Iterate over local column indices.
-
-		:author: Luke Hodkinson
+			Now always the same as :attr:`~.IntensityMatrix.size`.
+			The intensity matrix is no longer divided between MPI ranks;
+			use the ``executor`` argument of the functions which support it to run in parallel.
 		"""
 
-		# Check for parallel.
-		if hasattr(self, "comm"):
-			# At the moment we assume we break the matrix into contiguous
-			# ranges. We've allowed for this to change by wrapping up the
-			# iteration in this method.
-			yield from range(self.local_col_range[0], self.local_col_range[1])
-
-		else:
-			# Iterate over global indices.
-			return super().iter_ic_indices()
+		return self.size
 
 	def get_ic_at_mass(self, mass: Optional[float] = None) -> IonChromatogram:
 		"""
@@ -28,16 +28,24 @@ import math
 import random
 from typing import Union
 
+# 3rd party
+import numpy  # type: ignore
+from numpy.lib.stride_tricks import as_strided  # type: ignore
+
 # this package
+from pyms.IntensityMatrix import BaseIntensityMatrix
 from pyms.IonChromatogram import IonChromatogram
 from pyms.Utils.Math import MAD
 from pyms.Utils.Time import window_sele_points
 
-__all__ = ["window_analyzer"]
+__all__ = ["window_analyzer", "window_analyzer_im"]
 
 _DEFAULT_WINDOW = 256
 _DEFAULT_N_WINDOWS = 1024
 
+# Maximum number of intensity values copied out of the strided window view at once.
+_CHUNK_SIZE = 2**22
+
 
 def window_analyzer(
 		ic: IonChromatogram,
@@ -74,32 +82,123 @@ def window_analyzer(
 
 	ia = ic.intensity_array  # fetch the intensitiess
 
+	window_pts = window_sele_points(ic, window)
+	positions = _window_positions(ia.size, window_pts, n_windows, rand_seed)
+
+	noise_level = math.fabs(ia.max() - ia.min())
+	min_mad = _min_window_mad(ia[:, numpy.newaxis], window_pts, positions)[0]
+
+	return float(min(noise_level, min_mad))
+
+
+def window_analyzer_im(
+		im: BaseIntensityMatrix,
+		window: Union[int, str] = _DEFAULT_WINDOW,
+		n_windows: int = _DEFAULT_N_WINDOWS,
+		rand_seed: Union[int, float, str, None] = None,
+		exhaustive: bool = False,
+		) -> numpy.ndarray:
+	"""
+	Estimates the signal noise for every ion chromatogram in an intensity matrix at once.
+
+	The same window positions are evaluated for every ion, so for a given ``rand_seed``
+	the noise level of each ion is identical to that returned by :func:`~.window_analyzer`
+	for the corresponding ion chromatogram.
+
+	:param im:
+	:param window: Window width selection.
+	:param n_windows: The number of windows to calculate. Ignored if ``exhaustive`` is :py:obj:`True`.
+	:param rand_seed: Seed for random number generator.
+	:param exhaustive: If :py:obj:`True` every possible window position is evaluated
+		rather than a random sample of ``n_windows`` positions.
+
+	:return: Array of noise estimates, one per ion chromatogram (column) of the intensity matrix.
+
+	.. versionadded:: 2.4.0
+	"""
+
+	if not isinstance(im, BaseIntensityMatrix):
+		raise TypeError("'im' must be an IntensityMatrix object")
+
+	if not isinstance(window, (int, str)):
+		raise TypeError("'window' must be a int or string")
+
+	if not isinstance(n_windows, int):
+		raise TypeError("'n_windows' must be an integer")
+
+	ia = im.intensity_array
+	n_scan = ia.shape[0]
+
+	window_pts = window_sele_points(im.get_ic_at_index(0), window)
+
+	if exhaustive:
+		positions = numpy.arange(n_scan - window_pts + 1)
+	else:
+		positions = _window_positions(n_scan, window_pts, n_windows, rand_seed)
+
+	noise_level = numpy.abs(ia.max(axis=0) - ia.min(axis=0))
+	min_mad = _min_window_mad(ia, window_pts, positions)
+
+	return numpy.minimum(noise_level, min_mad)
+
+
+def _window_positions(
+		n_points: int,
+		window_pts: int,
+		n_windows: int,
+		rand_seed: Union[int, float, str, None] = None,
+		) -> numpy.ndarray:
+	"""
+	Returns the sorted, unique start positions of ``n_windows`` randomly placed windows.
+
+	:param n_points: The number of points in the signal.
+	:param window_pts: The number of points in each window.
+	:param n_windows: The number of windows to place.
+	:param rand_seed: Seed for random number generator.
+	"""
+
 	# create an instance of the Random class
 	if rand_seed:
 		generator = random.Random(rand_seed)
 	else:
 		generator = random.Random()
 
-	window_pts = window_sele_points(ic, window)
+	maxi = n_points - window_pts
 
-	maxi = ia.size - window_pts
-	noise_level = math.fabs(ia.max() - ia.min())
-	# best_window_pos = None
-	seen_positions = []
-
-	cntr = 0
-
-	while cntr < n_windows:
-		# generator.randrange(): last point not included in range
-		try_pos = generator.randrange(0, maxi + 1)
-		# only process the window if not analyzed previously
-		if try_pos not in seen_positions:
-			end_slice = try_pos + window_pts
-			crnt_mad = MAD(ia[try_pos:end_slice])
-			if crnt_mad < noise_level:
-				noise_level = crnt_mad
-				# best_window_pos = try_pos
-		cntr = cntr + 1
-		seen_positions.append(try_pos)
-
-	return noise_level
+	# generator.randrange(): last point not included in range
+	seen_positions = {generator.randrange(0, maxi + 1) for _ in range(n_windows)}
+
+	return numpy.array(sorted(seen_positions), dtype=int)
+
+
+def _min_window_mad(ia: numpy.ndarray, window_pts: int, positions: numpy.ndarray) -> numpy.ndarray:
+	"""
+	Returns the minimum median absolute deviation over the given windows for each column of ``ia``.
+
+	The windows are taken from a read-only strided view of ``ia``, and are processed
+	in chunks to bound the amount of memory used.
+
+	:param ia: 2D array of intensities, with rows as scans and columns as ions.
+	:param window_pts: The number of points in each window.
+	:param positions: The start positions of the windows.
+	"""
+
+	ia = numpy.ascontiguousarray(ia, dtype=float)
+	n_scan, n_ions = ia.shape
+
+	row_stride, col_stride = ia.strides
+	windows = as_strided(
+			ia,
+			shape=(n_scan - window_pts + 1, window_pts, n_ions),
+			strides=(row_stride, row_stride, col_stride),
+			writeable=False,
+			)
+
+	min_mad = numpy.full(n_ions, numpy.inf)
+	chunk = max(1, _CHUNK_SIZE // (window_pts * n_ions))
+
+	for start in range(0, len(positions), chunk):
+		block = windows[positions[start:start + chunk]]
+		numpy.minimum(min_mad, MAD(block, axis=1).min(axis=0), out=min_mad)
+
+	return min_mad
@@ -25,7 +25,9 @@ Savitzky-Golay noise filter.
 
 # stdlib
 import copy
-from typing import TypeVar, Union
+import functools
+from concurrent.futures import Executor
+from typing import Iterator, Optional, TypeVar, Union
 
 # 3rd party
 import numpy  # type: ignore
@@ -92,6 +94,7 @@ def savitzky_golay_im(
 		im: _IM,
 		window: Union[int, str] = _DEFAULT_WINDOW,
 		degree: int = _DEFAULT_POLYNOMIAL_DEGREE,
+		executor: Optional[Executor] = None,
 		) -> _IM:
 	"""
 	Applies Savitzky-Golay filter on Intensity Matrix.
@@ -102,11 +105,14 @@ def savitzky_golay_im(
 	:type im: :class:`~.BaseIntensityMatrix`
 	:param window: The window selection parameter.
 	:param degree: degree of the fitting polynomial for the Savitzky-Golay filter.
+	:param executor: Optional :class:`concurrent.futures.Executor` to smooth the ion chromatograms in parallel.
 
 	:return: Smoothed IntensityMatrix.
 	:rtype: :class:`~.BaseIntensityMatrix`
 
 	:authors: Sean O'Callaghan, Vladimir Likic, Dominic Davis-Foster
+
+	.. versionchanged:: 2.4.0  Added the ``executor`` argument.
 	"""
 
 	if not isinstance(im, BaseIntensityMatrix):
@@ -122,9 +128,16 @@ def savitzky_golay_im(
 
 	im_smooth = copy.deepcopy(im)
 
-	for ii in range(n_mz):
-		ic = im_smooth.get_ic_at_index(ii)
-		ic_smooth = savitzky_golay(ic, window, degree)
+	ics = (im_smooth.get_ic_at_index(ii) for ii in range(n_mz))
+	smooth = functools.partial(savitzky_golay, window=window, degree=degree)
+
+	ics_smooth: Iterator[IonChromatogram]
+	if executor is None:
+		ics_smooth = map(smooth, ics)
+	else:
+		ics_smooth = executor.map(smooth, ics)
+
+	for ii, ic_smooth in enumerate(ics_smooth):
 		im_smooth.set_ic_at_index(ii, ic_smooth)
 
 	return im_smooth
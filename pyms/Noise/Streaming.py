@@ -0,0 +1,486 @@
+"""
+Incremental noise smoothing and baseline correction filters for data that is still being acquired.
+
+.. versionadded:: 2.4.0
+"""
+
+################################################################################
+#                                                                              #
+#    PyMassSpec software for processing of mass-spectrometry data              #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                              #
+#                                                                              #
+#    This program is free software; you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License version 2 as         #
+#    published by the Free Software Foundation.                                #
+#                                                                              #
+#    This program is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of            #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the             #
+#    GNU General Public License for more details.                              #
+#                                                                              #
+#    You should have received a copy of the GNU General Public License         #
+#    along with this program; if not, write to the Free Software               #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.                 #
+#                                                                              #
+################################################################################
+
+# stdlib
+import abc
+import math
+from typing import Optional, Sequence, Union
+
+# 3rd party
+import numpy  # type: ignore
+from scipy import ndimage  # type: ignore
+
+# this package
+from pyms.Noise.SavitzkyGolay import _DEFAULT_POLYNOMIAL_DEGREE, _calc_coeff, _smooth
+from pyms.Noise.SavitzkyGolay import _DEFAULT_WINDOW as _DEFAULT_SG_WINDOW
+from pyms.Noise.Window import _DEFAULT_WINDOW as _DEFAULT_SMOOTH_WINDOW
+from pyms.Noise.Window import _mean_window, _median_window
+from pyms.Utils.Time import time_str_secs
+
+__all__ = [
+		"StreamingProcessor",
+		"StreamingFilter",
+		"StreamingSavitzkyGolay",
+		"StreamingWindowSmooth",
+		"StreamingTopHat",
+		"StreamingPipeline",
+		]
+
+
+class StreamingProcessor(abc.ABC):
+	"""
+	Interface for objects which process an intensity matrix incrementally, a block of scans at a time.
+
+	Implemented by :class:`~.StreamingFilter` and :class:`~.StreamingPipeline`.
+	"""
+
+	@property
+	@abc.abstractmethod
+	def latency(self) -> int:
+		"""
+		The number of scans by which the output lags the input.
+		"""
+
+		raise NotImplementedError
+
+	@property
+	@abc.abstractmethod
+	def n_scans_in(self) -> int:
+		"""
+		The number of scans received so far.
+		"""
+
+		raise NotImplementedError
+
+	@property
+	@abc.abstractmethod
+	def n_scans_out(self) -> int:
+		"""
+		The number of finalised scans returned so far.
+		"""
+
+		raise NotImplementedError
+
+	@abc.abstractmethod
+	def reset(self):
+		"""
+		Discards all buffered scans, ready for a new acquisition.
+		"""
+
+		raise NotImplementedError
+
+	@abc.abstractmethod
+	def push(self, scans: Union[Sequence[Sequence[float]], numpy.ndarray]) -> numpy.ndarray:
+		"""
+		Adds a block of new scans.
+
+		:param scans: The new scans, as rows of intensities. A one-dimensional
+			sequence is treated as a single scan.
+
+		:return: The scans finalised by the new data, with one row per scan.
+		"""
+
+		raise NotImplementedError
+
+	@abc.abstractmethod
+	def flush(self) -> numpy.ndarray:
+		"""
+		Returns all remaining scans, treating the data received so far as the complete acquisition.
+
+		The processor is reset afterwards.
+		"""
+
+		raise NotImplementedError
+
+	@abc.abstractmethod
+	def apply(self, intensities: Union[Sequence[Sequence[float]], numpy.ndarray]) -> numpy.ndarray:
+		"""
+		Processes a complete intensity matrix at once.
+
+		The result is the same as pushing every scan and then flushing.
+		Any scans already pushed are unaffected.
+
+		:param intensities: The scans of the complete intensity matrix, as rows of intensities.
+		"""
+
+		raise NotImplementedError
+
+
+class StreamingFilter(StreamingProcessor):
+	"""
+	Base class for filters which process an intensity matrix incrementally, a block of scans at a time.
+
+	Each call to :meth:`~.StreamingFilter.push` returns the scans which can be finalised
+	with the data received so far. A scan is finalised once the ``right_context``
+	scans following it have been received, so the output lags the input by
+	:attr:`~.StreamingFilter.latency` scans. Only the scans still needed to
+	calculate future output are retained between calls. When acquisition is
+	complete, :meth:`~.StreamingFilter.flush` returns the remaining scans.
+
+	The concatenated output matches that of applying the equivalent filter to
+	every ion chromatogram of the complete intensity matrix, regardless of how
+	the scans are divided into blocks.
+
+	:param left_context: The number of preceding scans needed to calculate each output scan.
+	:param right_context: The number of following scans needed to calculate each output scan.
+	"""
+
+	def __init__(self, left_context: int, right_context: int):
+		self._left = left_context
+		self._right = right_context
+		self.reset()
+
+	def reset(self):
+		"""
+		Discards all buffered scans, ready for a new acquisition.
+		"""
+
+		self._buffer: Optional[numpy.ndarray] = None
+		self._buffer_start = 0  # Index of the first buffered scan
+		self._n_in = 0
+		self._n_out = 0
+
+	@property
+	def latency(self) -> int:
+		"""
+		The number of scans by which the output lags the input.
+		"""
+
+		return self._right
+
+	@property
+	def n_scans_in(self) -> int:
+		"""
+		The number of scans received so far.
+		"""
+
+		return self._n_in
+
+	@property
+	def n_scans_out(self) -> int:
+		"""
+		The number of finalised scans returned so far.
+		"""
+
+		return self._n_out
+
+	def push(self, scans: Union[Sequence[Sequence[float]], numpy.ndarray]) -> numpy.ndarray:
+		"""
+		Adds a block of new scans to the filter.
+
+		:param scans: The new scans, as rows of intensities. A one-dimensional
+			sequence is treated as a single scan.
+
+		:return: The scans finalised by the new data, with one row per scan.
+		"""
+
+		scans = numpy.array(scans, dtype=float, ndmin=2)
+
+		if scans.ndim != 2:
+			raise ValueError("'scans' must be a two-dimensional array of intensities")
+
+		if self._buffer is None:
+			self._buffer = scans
+		elif scans.shape[1] != self._buffer.shape[1]:
+			raise ValueError(
+					f"Expected scans with {self._buffer.shape[1]} intensities, got {scans.shape[1]}"
+					)
+		else:
+			self._buffer = numpy.concatenate([self._buffer, scans])
+
+		self._n_in += len(scans)
+
+		return self._emit(self._n_in - self._right)
+
+	def flush(self) -> numpy.ndarray:
+		"""
+		Returns all remaining scans, treating the data received so far as the complete acquisition.
+
+		The filter is reset afterwards.
+		"""
+
+		if self._buffer is None:
+			return numpy.empty((0, 0))
+
+		output = self._emit(self._n_in, final=True)
+		self.reset()
+
+		return output
+
+	def _emit(self, stop: int, final: bool = False) -> numpy.ndarray:
+		"""
+		Calculates the output scans from :attr:`~.n_scans_out` up to (but not including) ``stop``.
+
+		:param stop: The index of the scan after the last one to finalise.
+		:param final: Whether the last received scan is the end of the acquisition.
+		"""
+
+		assert self._buffer is not None
+
+		start = self._n_out
+		if stop <= start:
+			return numpy.empty((0, self._buffer.shape[1]))
+
+		# The segment extends as far as the context allows, and is truncated only
+		# at the true start and (if final) end of the data, where the batch filter
+		# would apply its own edge handling.
+		seg_start = max(0, start - self._left)
+		seg_stop = self._n_in if final else min(self._n_in, stop + self._right)
+
+		offset = self._buffer_start
+		segment = self._buffer[seg_start - offset:seg_stop - offset]
+		output = self._apply(segment)[start - seg_start:stop - seg_start]
+
+		# discard scans that are no longer needed
+		keep_from = max(0, stop - self._left)
+		self._buffer = self._buffer[keep_from - offset:]
+		self._buffer_start = keep_from
+		self._n_out = stop
+
+		return output
+
+	def apply(self, intensities: Union[Sequence[Sequence[float]], numpy.ndarray]) -> numpy.ndarray:  # noqa: D102
+		intensities = numpy.array(intensities, dtype=float, ndmin=2)
+
+		if intensities.ndim != 2:
+			raise ValueError("'intensities' must be a two-dimensional array of intensities")
+
+		return self._apply(intensities)
+
+	@abc.abstractmethod
+	def _apply(self, segment: numpy.ndarray) -> numpy.ndarray:
+		"""
+		Applies the filter to each column of a contiguous segment of the intensity matrix.
+
+		:param segment:
+		"""
+
+		raise NotImplementedError
+
+
+class StreamingSavitzkyGolay(StreamingFilter):
+	"""
+	Incremental equivalent of :func:`~pyms.Noise.SavitzkyGolay.savitzky_golay_im`.
+
+	:param window: The window selection parameter. This can be an integer
+		or time string. If an integer, taken as the number of points. If a
+		string, must be the form ``'<NUMBER>s'`` or ``'<NUMBER>m'``, specifying
+		a time in seconds or minutes, respectively.
+	:param degree: degree of the fitting polynomial for the Savitzky-Golay filter.
+	:param time_step: The time between scans, in seconds. Required if ``window`` is a time string.
+	"""
+
+	def __init__(
+			self,
+			window: Union[int, str] = _DEFAULT_SG_WINDOW,
+			degree: int = _DEFAULT_POLYNOMIAL_DEGREE,
+			time_step: Optional[float] = None,
+			):
+
+		if not isinstance(degree, int):
+			raise TypeError("'degree' must be an integer")
+
+		wing_length = _window_points(window, time_step, half_window=True)
+		self._coeff = _calc_coeff(wing_length, degree)
+
+		super().__init__(wing_length, wing_length)
+
+	def _apply(self, segment: numpy.ndarray) -> numpy.ndarray:  # noqa: D102
+		return numpy.column_stack([_smooth(column, self._coeff) for column in segment.T])
+
+
+class StreamingWindowSmooth(StreamingFilter):
+	"""
+	Incremental equivalent of :func:`~pyms.Noise.Window.window_smooth_im`.
+
+	:param window: The window selection parameter. This can be an integer
+		or time string. If an integer, taken as the number of points. If a
+		string, must be in the form ``'<NUMBER>s'`` or ``'<NUMBER>m'``, specifying
+		a time in seconds or minutes, respectively
+	:param use_median: Whether to use the the mean or median window smoothing.
+	:param time_step: The time between scans, in seconds. Required if ``window`` is a time string.
+	"""
+
+	def __init__(
+			self,
+			window: Union[int, str] = _DEFAULT_SMOOTH_WINDOW,
+			use_median: bool = False,
+			time_step: Optional[float] = None,
+			):
+
+		if not isinstance(use_median, bool):
+			raise TypeError("'median' must be a Boolean")
+
+		wing_length = _window_points(window, time_step, half_window=True)
+		self._wing_length = wing_length
+		self._use_median = use_median
+
+		super().__init__(wing_length, wing_length)
+
+	def _apply(self, segment: numpy.ndarray) -> numpy.ndarray:  # noqa: D102
+		if self._use_median:
+			smooth = _median_window
+		else:
+			smooth = _mean_window
+
+		return numpy.column_stack([smooth(column, self._wing_length) for column in segment.T]).astype(float)
+
+
+class StreamingTopHat(StreamingFilter):
+	"""
+	Incremental equivalent of :func:`~pyms.TopHat.tophat_im`.
+
+	Unlike :func:`~pyms.TopHat.tophat_im` the structural element must be given,
+	as the default depends on the total number of scans.
+
+	:param struct: Top-hat structural element as an integer number of points or a time string.
+		The structural element needs to be larger than the features one
+		wants to retain in the spectrum after the top-hat transform.
+	:param time_step: The time between scans, in seconds. Required if ``struct`` is a time string.
+	"""
+
+	def __init__(self, struct: Union[int, str], time_step: Optional[float] = None):
+		struct_pts = _window_points(struct, time_step)
+		self._footprint = numpy.ones((struct_pts, 1))
+
+		# The opening is an erosion followed by a dilation, each of which
+		# looks up to ``struct_pts - 1`` scans either side.
+		super().__init__(struct_pts, struct_pts)
+
+	def _apply(self, segment: numpy.ndarray) -> numpy.ndarray:  # noqa: D102
+		return ndimage.white_tophat(segment, footprint=self._footprint)
+
+
+class StreamingPipeline(StreamingProcessor):
+	"""
+	Chains several streaming filters together, passing the output of each to the next.
+
+	:param filters: The filters to apply, in order.
+	"""
+
+	def __init__(self, *filters: StreamingProcessor):
+		for filter_ in filters:
+			if not isinstance(filter_, StreamingProcessor):
+				raise TypeError("'filters' must be StreamingProcessor objects")
+
+		self._filters = filters
+		self._n_in = 0
+		self._n_out = 0
+
+	@property
+	def latency(self) -> int:  # noqa: D102
+		return sum(filter_.latency for filter_ in self._filters)
+
+	@property
+	def n_scans_in(self) -> int:  # noqa: D102
+		return self._n_in
+
+	@property
+	def n_scans_out(self) -> int:  # noqa: D102
+		return self._n_out
+
+	def reset(self):  # noqa: D102
+		self._n_in = 0
+		self._n_out = 0
+		for filter_ in self._filters:
+			filter_.reset()
+
+	def push(self, scans: Union[Sequence[Sequence[float]], numpy.ndarray]) -> numpy.ndarray:  # noqa: D102
+		scans = numpy.array(scans, dtype=float, ndmin=2)
+		self._n_in += len(scans)
+
+		for filter_ in self._filters:
+			scans = filter_.push(scans)
+
+		self._n_out += len(scans)
+		return scans
+
+	def flush(self) -> numpy.ndarray:  # noqa: D102
+		output = None
+
+		for filter_ in self._filters:
+			if output is not None and len(output):
+				output = numpy.concatenate([filter_.push(output), filter_.flush()])
+			else:
+				output = filter_.flush()
+
+		self.reset()
+
+		if output is None:
+			return numpy.empty((0, 0))
+		return output
+
+	def apply(self, intensities: Union[Sequence[Sequence[float]], numpy.ndarray]) -> numpy.ndarray:  # noqa: D102
+		intensities = numpy.array(intensities, dtype=float, ndmin=2)
+
+		for filter_ in self._filters:
+			intensities = filter_.apply(intensities)
+
+		return intensities
+
+
+def _window_points(window: Union[int, str], time_step: Optional[float], half_window: bool = False) -> int:
+	"""
+	Converts the window selection parameter into points, based on the time between scans.
+
+	This is equivalent to :func:`pyms.GCMS.Function.ic_window_points`,
+	but does not require an :class:`~pyms.IonChromatogram.IonChromatogram`.
+
+	:param window: The window selection parameter.
+	:param time_step: The time between scans, in seconds.
+	:param half_window: Specifies whether to return half-window
+	"""
+
+	if not isinstance(window, (int, str)):
+		raise TypeError("'window' must be either an int or a string")
+
+	if isinstance(window, int):
+		if half_window:
+			if window % 2 == 0:
+				raise ValueError("window must be an odd number of points")
+			else:
+				points = int(math.floor(window * 0.5))
+		else:
+			points = window
+	else:
+		if time_step is None:
+			raise ValueError("'time_step' must be given when the window is a time string")
+
+		time = time_str_secs(window)
+
+		if half_window:
+			time = time * 0.5
+
+		points = int(math.floor(time / time_step))
+
+	if half_window:
+		if points < 1:
+			raise ValueError(f"window too small (half window={points:d})")
+	else:
+		if points < 2:
+			raise ValueError(f"window too small (window={points})")
+
+	return points
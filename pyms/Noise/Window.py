@@ -25,8 +25,10 @@ Moving window noise filter.
 
 # stdlib
 import copy
+import functools
+from concurrent.futures import Executor
 from statistics import median
-from typing import Union
+from typing import Iterator, Optional, Union
 
 # 3rd party
 import numpy  # type: ignore
@@ -90,6 +92,7 @@ def window_smooth_im(
 		im: _IM,
 		window: Union[int, str] = _DEFAULT_WINDOW,
 		use_median: bool = False,
+		executor: Optional[Executor] = None,
 		) -> _IM:
 	"""
 	Applies window smoothing on Intensity Matrix.
@@ -101,11 +104,14 @@ def window_smooth_im(
 	:param window: The window selection parameter.
 	:param use_median: If :py:obj:`True` median window smoothing will be used.
 		If :py:obj:`False` mean window smoothing will be used.
+	:param executor: Optional :class:`concurrent.futures.Executor` to smooth the ion chromatograms in parallel.
 
 	:return: Smoothed Intensity Matrix
 	:rtype: :class:`~.BaseIntensityMatrix`
 
 	:authors: Sean O'Callaghan, Vladimir Likic
+
+	.. versionchanged:: 2.4.0  Added the ``executor`` argument.
 	"""
 
 	if not isinstance(im, BaseIntensityMatrix):
@@ -115,9 +121,16 @@ def window_smooth_im(
 
 	im_smooth = copy.deepcopy(im)
 
-	for ii in range(n_mz):
-		ic = im_smooth.get_ic_at_index(ii)
-		ic_smooth = window_smooth(ic, window, use_median)
+	ics = (im_smooth.get_ic_at_index(ii) for ii in range(n_mz))
+	smooth = functools.partial(window_smooth, window=window, use_median=use_median)
+
+	ics_smooth: Iterator[IonChromatogram]
+	if executor is None:
+		ics_smooth = map(smooth, ics)
+	else:
+		ics_smooth = executor.map(smooth, ics)
+
+	for ii, ic_smooth in enumerate(ics_smooth):
 		im_smooth.set_ic_at_index(ii, ic_smooth)
 
 	return im_smooth
@@ -24,4 +24,4 @@ Noise processing functions.
 ################################################################################
 
 # this package
-from pyms.Noise import Analysis, SavitzkyGolay, Window
+from pyms.Noise import Analysis, SavitzkyGolay, Streaming, Window
@@ -26,7 +26,7 @@ Provides a class to model signal peak.
 # stdlib
 import copy
 import warnings
-from typing import Dict, List, Optional, Sequence, Tuple, Union, cast, overload
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union, cast, overload
 from warnings import warn
 
 # this package
@@ -51,8 +51,15 @@ class AbstractPeak(pymsBaseClass):
 		Dominic Davis-Foster (type assertions and properties), David Kainer (outlier flag)
 
 	.. versionadded:: 2.3.0
+
+	.. versionchanged:: 2.4.0
+
+		Peaks store their attributes in ``__slots__`` rather than an instance dictionary,
+		and the UID is calculated when it is first needed rather than on construction.
 	"""
 
+	__slots__ = ("is_outlier", "_rt", "_pt_bounds", "_area", "_ion_areas", "_UID")
+
 	def __init__(
 			self,
 			rt: Union[int, float] = 0.0,
@@ -73,7 +80,29 @@ class AbstractPeak(pymsBaseClass):
 		self._area: Optional[float] = None
 		self._ion_areas: Dict[float, float] = {}
 
-		self.make_UID()
+		# Calculated by the UID property when first needed
+		self._UID: Optional[str] = None
+
+	def __getstate__(self) -> Dict[str, Any]:
+		state = {name: getattr(self, name) for name in _slot_names(type(self))}
+
+		# Subclasses without __slots__ may have other attributes.
+		state.update(getattr(self, "__dict__", {}))
+
+		return state
+
+	def __setstate__(self, state: Dict[str, Any]):
+		slot_names = _slot_names(type(self))
+		has_dict = hasattr(self, "__dict__")
+
+		for name, value in state.items():
+			# Peaks pickled by earlier versions may have attributes which no longer exist.
+			if name in slot_names or has_dict:
+				setattr(self, name, value)
+
+		for name in slot_names:
+			if not hasattr(self, name):
+				setattr(self, name, {} if name == "_ion_areas" else None)
 
 	def __eq__(self, other) -> bool:
 		"""
@@ -280,7 +309,10 @@ class AbstractPeak(pymsBaseClass):
 		:author: Andrew Isaac
 		"""  # noqa: D400
 
-		return self._UID
+		if self._UID is None:
+			self.make_UID()
+
+		return cast(str, self._UID)
 
 	# def __dict__(self):
 	#
@@ -327,9 +359,16 @@ class Peak(AbstractPeak):
 		If the ``ms`` argument is unset an empty mass spectrum is used,
 		rather than :py:obj:`None` in previous versions.
 
+	.. versionchanged:: 2.4.0
+
+		:meth:`~.Peak.crop_mass` and :meth:`~.Peak.null_mass` assign a new mass spectrum
+		rather than modifying the existing one, so copies of a peak may share its mass spectrum.
+
 	.. TODO:: Change type hint of ``ms`` to Optional[MassSpectrum] once __new__ removed.
 	"""
 
+	__slots__ = ("_mass_spectrum", )
+
 	_mass_spectrum: MassSpectrum
 
 	def __init__(
@@ -377,6 +416,10 @@ class Peak(AbstractPeak):
 			outlier: bool = False,
 			):
 
+		if ms is None or isinstance(ms, MassSpectrum):
+			# __init__ is called by Python afterwards
+			return super().__new__(cls)
+
 		if is_number(ms):
 			warnings.warn(
 					"Creating a Peak object for a single ion chromatogram is "
@@ -384,9 +427,7 @@ class Peak(AbstractPeak):
 					)
 			return ICPeak(rt, cast(float, ms), minutes, outlier)
 		else:
-			obj = super().__new__(cls)
-			obj.__init__(rt, ms, minutes, outlier)
-			return obj
+			return super().__new__(cls)
 
 	def __eq__(self, other) -> bool:
 		"""
@@ -440,8 +481,8 @@ class Peak(AbstractPeak):
 				new_mass_list.append(mass)
 				new_mass_spec.append(mass_spec[ii])
 
-		self._mass_spectrum.mass_list = new_mass_list
-		self._mass_spectrum.mass_spec = new_mass_spec
+		# A new mass spectrum is assigned, as the current one may be shared with copies of this peak.
+		self._mass_spectrum = MassSpectrum(new_mass_list, new_mass_spec)
 
 		if len(new_mass_list) == 0:
 			raise ValueError("mass spectrum is now empty")
@@ -449,7 +490,7 @@ class Peak(AbstractPeak):
 			warn("peak mass spectrum contains < 10 points", Warning)
 
 		# update UID
-		self.make_UID()
+		self._UID = None
 
 	def get_int_of_ion(self, ion: int) -> float:
 		"""
@@ -536,7 +577,7 @@ class Peak(AbstractPeak):
 			raise TypeError("'Peak.mass_spectrum' must be a MassSpectrum object")
 
 		self._mass_spectrum = value
-		self.make_UID()
+		self._UID = None
 
 	def null_mass(self, mass: float):
 		"""
@@ -566,10 +607,14 @@ class Peak(AbstractPeak):
 				best = tmp
 				ix = ii
 
-		self._mass_spectrum.mass_spec[ix] = 0
+		intensity_list = self._mass_spectrum.intensity_list
+		intensity_list[ix] = 0
+
+		# A new mass spectrum is assigned, as the current one may be shared with copies of this peak.
+		self._mass_spectrum = MassSpectrum(self._mass_spectrum.mass_array, intensity_list)
 
 		# update UID
-		self.make_UID()
+		self._UID = None
 
 	def find_mass_spectrum(self, data: BaseIntensityMatrix, from_bounds: float = False):
 		"""
@@ -602,7 +647,7 @@ class Peak(AbstractPeak):
 		# TODO: something about this function for ICPeak
 		# clear single ion chromatogram mass
 		# self._ic_mass = None
-		self.make_UID()
+		self._UID = None
 
 	def top_ions(self, num_ions: int = 5) -> List[float]:
 		"""
@@ -653,6 +698,8 @@ class ICPeak(AbstractPeak):
 	.. versionadded:: 2.3.0
 	"""
 
+	__slots__ = ("_ic_mass", )
+
 	_ic_mass: Optional[float]
 
 	def __init__(
@@ -707,7 +754,7 @@ class ICPeak(AbstractPeak):
 			raise TypeError("'Peak.ic_mass' must be a number")
 
 		self._ic_mass = value
-		self.make_UID()
+		self._UID = None
 
 	def make_UID(self) -> None:
 		"""
@@ -722,3 +769,28 @@ class ICPeak(AbstractPeak):
 			self._UID = f"{int(self._ic_mass):d}-{self._rt:.2f}"
 		else:
 			super().make_UID()
+
+
+# Mapping of peak classes to the names of their slots
+_slot_names_cache: Dict[type, Tuple[str, ...]] = {}
+
+
+def _slot_names(cls: type) -> Tuple[str, ...]:
+	"""
+	Returns the names of the ``__slots__`` of the given peak class and its base classes.
+
+	:param cls:
+	"""
+
+	if cls in _slot_names_cache:
+		return _slot_names_cache[cls]
+
+	names: List[str] = []
+
+	for klass in reversed(cls.__mro__):
+		for name in klass.__dict__.get("__slots__", ()):
+			if name not in names and name not in {"__dict__", "__weakref__"}:
+				names.append(name)
+
+	_slot_names_cache[cls] = tuple(names)
+	return _slot_names_cache[cls]
@@ -25,12 +25,15 @@ Functions related to Peak modification.
 
 # stdlib
 import copy
+from concurrent.futures import Executor
+from itertools import chain
 from math import ceil
 from statistics import median
-from typing import Dict, List, Sequence, Tuple, Union, cast, overload
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union, cast, overload
 
 # 3rd party
 import deprecation  # type: ignore
+import numpy  # type: ignore
 from numpy import percentile  # type: ignore
 from typing_extensions import Literal
 
@@ -41,6 +44,9 @@ from pyms.Peak import Peak
 from pyms.Utils.Utils import is_number, is_sequence
 
 __all__ = [
+		"PeakAreas",
+		"batch_peak_areas",
+		"batch_ion_areas",
 		"peak_sum_area",
 		"peak_pt_bounds",
 		"peak_top_ion_areas",
@@ -51,6 +57,9 @@ __all__ = [
 		"median_bounds"
 		]
 
+# The number of ion chromatograms per task for batch_peak_areas
+_COLUMN_BLOCK_SIZE = 16
+
 
 @overload
 def peak_sum_area(
@@ -115,16 +124,15 @@ def peak_sum_area(
 	apex = im.get_index_at_time(rt)
 
 	# get peak masses with non-zero intensity
-	mass_ii = [ii for ii in range(len(ms.mass_list)) if ms.mass_spec[ii] > 0]
+	mass_ii = numpy.flatnonzero(ms.intensity_array > 0).tolist()
 
 	area_dict = {}
 	# get stats on boundaries
-	for ii in mass_ii:
-		# get ion chromatogram as list
-		ia = [mat[scan][ii] for scan in range(len(mat))]
-		area, left, right, l_share, r_share = ion_area(ia, apex, max_bound)
+	areas = batch_ion_areas(mat, mass_ii, [apex] * len(mass_ii), max_bound)[0]
+	mass_list = ms.mass_list
+	for ii, area in zip(mass_ii, areas):
 		# need actual mass for single ion areas
-		actual_mass = ms.mass_list[ii]
+		actual_mass = mass_list[ii]
 		area_dict[actual_mass] = area
 		sum_area += area
 
@@ -164,21 +172,12 @@ def peak_pt_bounds(im: BaseIntensityMatrix, peak: Peak) -> Tuple[int, int]:
 	apex = im.get_index_at_time(rt)
 
 	# get peak masses with non-zero intensity
-	mass_ii = [ii for ii in range(len(ms.mass_list)) if ms.mass_spec[ii] > 0]
-
-	left_list = []
-	right_list = []
+	mass_ii = numpy.flatnonzero(ms.intensity_array > 0).tolist()
 
 	# get stats on boundaries
-	for ii in mass_ii:
-		# get ion chromatogram as list
-		ia = [mat[scan][ii] for scan in range(len(mat))]
-		area, left, right, l_share, r_share = ion_area(ia, apex, 0)
-		left_list.append(left)
-		right_list.append(right)
-
-	left_list.sort()
-	right_list.sort()
+	area, left, right, l_share, r_share = batch_ion_areas(mat, mass_ii, [apex] * len(mass_ii), 0)
+	left_list = sorted(left.tolist())
+	right_list = sorted(right.tolist())
 
 	return int(ceil(percentile(left_list, 95))), int(ceil(percentile(right_list, 95)))
 
@@ -225,15 +224,183 @@ def peak_top_ion_areas(
 
 	for ion in top_ions:
 		ion_chrom = im.get_ic_at_mass(ion)
-		# need ia as a list not numpy array so use .tolist()
-		ia = ion_chrom.intensity_array.tolist()
-		area, left, right, l_share, r_share = ion_area(ia, apex, max_bound)
+		area = _column_ion_areas(ion_chrom.intensity_array, numpy.array([apex]), max_bound, 0.5)[0]
 		# need actual mass for single ion areas
-		ion_areas[ion] = area
+		ion_areas[ion] = area[0]
 
 	return ion_areas
 
 
+class PeakAreas(NamedTuple):
+	"""
+	The areas and boundaries of each peak in a peak list, as calculated by :func:`~.batch_peak_areas`.
+
+	.. versionadded:: 2.4.0
+	"""
+
+	#: The sum of the areas of the ions with non-zero intensity, as from :func:`~.peak_sum_area`.
+	area: numpy.ndarray
+
+	#: The left and right boundary offsets from the ions with non-zero intensity,
+	#: as from :func:`~.peak_pt_bounds`, with a row for each peak.
+	pt_bounds: numpy.ndarray
+
+	#: The median left and right boundary offsets, as from :func:`~.median_bounds`, with a row for each peak.
+	median_bounds: numpy.ndarray
+
+	#: Mappings of mass to area for the ions with non-zero intensity, as from :func:`~.peak_sum_area`.
+	ion_areas: List[Dict[float, float]]
+
+	#: Mappings of mass to area for the most abundant ions, as from :func:`~.peak_top_ion_areas`.
+	top_ion_areas: List[Dict[float, float]]
+
+
+def batch_peak_areas(
+		im: BaseIntensityMatrix,
+		peak_list: Sequence[Peak],
+		n_top_ions: int = 5,
+		max_bound: int = 0,
+		executor: Optional[Executor] = None,
+		) -> PeakAreas:
+	"""
+	Calculate the areas and boundaries of all peaks in a peak list at once.
+
+	Each ion chromatogram is extracted from the intensity matrix only once,
+	and the areas for every peak which requires it are calculated together.
+	The results are the same as from calling :func:`~.peak_sum_area`, :func:`~.peak_pt_bounds`,
+	:func:`~.median_bounds` and :func:`~.peak_top_ion_areas` for each peak.
+
+	:param im: The originating IntensityMatrix object.
+	:param peak_list:
+	:param n_top_ions: Number of top ions to return areas for.
+	:param max_bound: Optional value to limit size of detected bound.
+		If not ``0`` the boundaries differ from those from :func:`~.peak_pt_bounds`
+		and :func:`~.median_bounds`, which are not limited.
+	:param executor: Optional :class:`concurrent.futures.Executor` to calculate
+		the areas for blocks of ion chromatograms in parallel.
+
+	:return: The areas and boundaries of each peak. The boundaries of a peak with no ions are ``0``.
+
+	.. versionadded:: 2.4.0
+	"""
+
+	if not isinstance(im, BaseIntensityMatrix):
+		raise TypeError("'im' must be an IntensityMatrix object")
+
+	if not is_sequence(peak_list) or not all(isinstance(peak, Peak) for peak in peak_list):
+		raise TypeError("'peak_list' must be a Sequence of Peak objects")
+
+	if not isinstance(n_top_ions, int):
+		raise TypeError("'n_top_ions' must be an integer")
+
+	if not isinstance(max_bound, int):
+		raise TypeError("'max_bound' must be an integer")
+
+	apexes = [im.get_index_at_time(peak.rt) for peak in peak_list]
+
+	# For each peak, the columns of the ions with non-zero intensity, and the masses and columns of its top ions.
+	ion_columns = []
+	top_ions = []
+	for peak in peak_list:
+		# Copies of a peak's mass spectrum share its arrays.
+		ms = peak.mass_spectrum
+		mass_list = ms.mass_list
+		mass_spec = ms.mass_spec
+
+		ion_columns.append(numpy.flatnonzero(ms.intensity_array > 0).tolist())
+
+		# as Peak.top_ions
+		top_masses = [mass for intensity, mass in sorted(zip(mass_spec, mass_list))[-n_top_ions:]]
+		top_ions.append([(mass, im.get_index_of_mass(mass)) for mass in top_masses])
+
+	# The apexes at which each ion chromatogram is required
+	column_apexes: Dict[int, Dict[int, None]] = {}
+	for apex, columns, ions in zip(apexes, ion_columns, top_ions):
+		for column in columns:
+			column_apexes.setdefault(column, {})[apex] = None
+		for mass, column in ions:
+			column_apexes.setdefault(column, {})[apex] = None
+
+	columns = sorted(column_apexes)
+	apex_lists = [list(column_apexes[column]) for column in columns]
+	intensity_array = im.intensity_array
+
+	blocks = [
+			intensity_array[:, columns[start:start + _COLUMN_BLOCK_SIZE]]
+			for start in range(0, len(columns), _COLUMN_BLOCK_SIZE)
+			]
+	block_apex_lists = [
+			apex_lists[start:start + _COLUMN_BLOCK_SIZE] for start in range(0, len(columns), _COLUMN_BLOCK_SIZE)
+			]
+	max_bounds = [max_bound] * len(blocks)
+
+	block_results: Iterator[List[List[Tuple[float, int, int, bool, bool]]]]
+	if executor is None:
+		block_results = map(_block_ion_areas, blocks, block_apex_lists, max_bounds)
+	else:
+		block_results = executor.map(_block_ion_areas, blocks, block_apex_lists, max_bounds)
+
+	# Mapping of (column, apex) to area, left, right, shared left, shared right
+	results: Dict[Tuple[int, int], Tuple[float, int, int, bool, bool]] = {}
+	for column, apex_list, column_results in zip(columns, apex_lists, chain.from_iterable(block_results)):
+		for apex, result in zip(apex_list, column_results):
+			results[(column, apex)] = result
+
+	n_peaks = len(peak_list)
+	areas = numpy.zeros(n_peaks)
+	pt_bounds = numpy.zeros((n_peaks, 2), dtype=int)
+	median_bounds_array = numpy.zeros((n_peaks, 2))
+	ion_areas_list = []
+	top_ion_areas_list = []
+
+	for peak_idx, (peak, apex, columns_, ions) in enumerate(zip(peak_list, apexes, ion_columns, top_ions)):
+		mass_list = peak.mass_spectrum.mass_list
+
+		sum_area = 0.0
+		area_dict = {}
+		left_list = []
+		right_list = []
+
+		for column in columns_:
+			area, left, right, l_share, r_share = results[(column, apex)]
+			area_dict[mass_list[column]] = area
+			sum_area += area
+			left_list.append(left)
+			right_list.append(right)
+
+		areas[peak_idx] = sum_area
+		ion_areas_list.append(area_dict)
+		top_ion_areas_list.append({mass: results[(column, apex)][0] for mass, column in ions})
+
+		if left_list:
+			pt_bounds[peak_idx] = int(ceil(percentile(left_list, 95))), int(ceil(percentile(right_list, 95)))
+			median_bounds_array[peak_idx] = median(left_list), median(right_list)
+
+	return PeakAreas(areas, pt_bounds, median_bounds_array, ion_areas_list, top_ion_areas_list)
+
+
+def _block_ion_areas(
+		block: numpy.ndarray,
+		apex_lists: List[List[int]],
+		max_bound: int,
+		) -> List[List[Tuple[float, int, int, bool, bool]]]:
+	"""
+	Calculate the ion areas for each of the given apexes in a block of ion chromatograms.
+
+	:param block: Array of intensities, with rows as scans and columns as ions.
+	:param apex_lists: The apexes at which to calculate the area for each column.
+	:param max_bound: Optional value to limit size of detected bound.
+	"""
+
+	block_results = []
+
+	for column, apex_list in zip(block.T, apex_lists):
+		column_results = _column_ion_areas(column, numpy.asarray(apex_list, dtype=int), max_bound, 0.5)
+		block_results.append(list(zip(*(result.tolist() for result in column_results))))
+
+	return block_results
+
+
 @deprecation.deprecated(
 		deprecated_in="2.0.0",
 		removed_in="2.4.0",
@@ -323,6 +490,8 @@ def ion_area(
 	Find bounds of peak by summing intensities until change in sum is less than
 	``tol`` percent of the current area.
 
+	To find the bounds of many peaks at once use :func:`~.batch_ion_areas`.
+
 	:param ia: List of intensities for a given mass.
 	:param apex: Index of the peak apex.
 	:param max_bound: Optional value to limit size of detected bound.
@@ -415,6 +584,156 @@ def half_area(
 	return area, index, shared
 
 
+def batch_ion_areas(
+		intensity_array: numpy.ndarray,
+		ions: Sequence[int],
+		apexes: Sequence[int],
+		max_bound: int = 0,
+		tol: float = 0.5,
+		) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+	"""
+	Find the bounds and areas of many ion peaks at once, as :func:`~.ion_area` does for a single peak.
+
+	The areas are accumulated outward from each apex with cumulative sums, and the point at which
+	each search stops is found with array comparisons rather than stepping through the intensities.
+	The results are the same as from :func:`~.ion_area`.
+
+	:param intensity_array: Array of intensities, with rows as scans and columns as ions.
+	:param ions: The column of the ion for each peak.
+	:param apexes: The index of the apex of each peak.
+	:param max_bound: Optional value to limit size of detected bound.
+	:param tol: Percentage tolerance of added area to current area.
+
+	:return: Arrays of the area, left and right boundary offsets, shared left, and shared right for each peak.
+
+	.. versionadded:: 2.4.0
+	"""
+
+	if not isinstance(intensity_array, numpy.ndarray) or intensity_array.ndim != 2:
+		raise TypeError("'intensity_array' must be a two-dimensional numpy array")
+	if not is_sequence(ions):
+		raise TypeError("'ions' must be a Sequence of integers")
+	if not is_sequence(apexes):
+		raise TypeError("'apexes' must be a Sequence of integers")
+	if not isinstance(max_bound, int):
+		raise TypeError("'max_bound' must be an integer")
+	if not isinstance(tol, float):
+		raise TypeError("'tol' must be a float")
+
+	ions = numpy.asarray(ions, dtype=int)
+	apexes = numpy.asarray(apexes, dtype=int)
+
+	if len(ions) != len(apexes):
+		raise ValueError("'ions' and 'apexes' must be the same length")
+
+	area = numpy.zeros(len(ions))
+	left = numpy.zeros(len(ions), dtype=int)
+	right = numpy.zeros(len(ions), dtype=int)
+	l_share = numpy.zeros(len(ions), dtype=bool)
+	r_share = numpy.zeros(len(ions), dtype=bool)
+
+	for ion in numpy.unique(ions):
+		selected = ions == ion
+		(
+				area[selected],
+				left[selected],
+				right[selected],
+				l_share[selected],
+				r_share[selected],
+				) = _column_ion_areas(intensity_array[:, ion], apexes[selected], max_bound, tol)
+
+	return area, left, right, l_share, r_share
+
+
+def _column_ion_areas(
+		ia: numpy.ndarray,
+		apexes: numpy.ndarray,
+		max_bound: int,
+		tol: float,
+		) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+	"""
+	Find the bounds and areas of peaks at several apexes in a single ion chromatogram.
+
+	:param ia: Array of intensities for a given mass.
+	:param apexes: Array of the indices of the peak apexes.
+	:param max_bound: Optional value to limit size of detected bound.
+	:param tol: Percentage tolerance of added area to current area.
+
+	:return: Arrays of the area, left and right boundary offset, shared left, and shared right.
+	"""
+
+	ia = numpy.asarray(ia, dtype=float)
+	n_points = len(ia)
+
+	# The intensities to the left of the apex are those to the right in the reversed array.
+	left_limits = apexes + 1
+	right_limits = n_points - apexes
+	if max_bound >= 1:
+		left_limits = numpy.minimum(left_limits, max_bound + 1)
+		right_limits = numpy.minimum(right_limits, max_bound + 1)
+
+	l_area, left, l_share = _half_areas(ia[::-1], n_points - 1 - apexes, left_limits, tol)
+	r_area, right, r_share = _half_areas(ia, apexes, right_limits, tol)
+	r_area -= ia[apexes]  # Counted apex twice for tolerance now ignore
+
+	return l_area + r_area, left, right, l_share, r_share
+
+
+def _half_areas(
+		ia: numpy.ndarray,
+		starts: numpy.ndarray,
+		limits: numpy.ndarray,
+		tol: float,
+		) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+	"""
+	Find the bounds of peaks by summing intensities to the right of each start point,
+	as :func:`~.half_area` does for a single peak.
+
+	:param ia: Array of intensities for a given mass.
+	:param starts: Array of the indices to start from.
+	:param limits: The maximum number of points to search for each start point.
+	:param tol: Percentage tolerance of added area to current area.
+
+	:return: Arrays of half peak area, boundary offset, and shared (True if shared ion).
+	"""  # noqa: D400
+
+	tol = tol / 200.0  # halve and convert from percent
+
+	# The average of the 3 points from each point, for smoothing.
+	# The terms are added in the same order as in half_area.
+	padded = numpy.concatenate([ia, [0.0, 0.0]])
+	edges = ((padded[:-2] + padded[1:-1]) + padded[2:]) / 3
+
+	# The search stops where the edge area stops decreasing...
+	not_decreasing = numpy.flatnonzero(edges[1:] >= edges[:-1]) + 1
+	first_positive = edges[starts] < 2 * edges[starts]
+	next_not_decreasing = numpy.append(not_decreasing, len(ia))[numpy.searchsorted(not_decreasing, starts + 1)]
+	stops = numpy.where(first_positive, next_not_decreasing - starts + 1, 1)
+
+	# ... or the bound is reached ...
+	stops = numpy.minimum(stops, limits)
+
+	area = numpy.zeros(len(starts))
+	index = numpy.zeros(len(starts), dtype=int)
+	shared = numpy.zeros(len(starts), dtype=bool)
+
+	for peak_idx, (start, stop) in enumerate(zip(starts.tolist(), stops.tolist())):
+		# ... or the tolerance is reached.
+		# The areas are summed sequentially from the start point, as in half_area.
+		areas = numpy.cumsum(ia[start:start + stop])
+		within_tol = areas[:stop - 1] * tol < edges[start:start + stop - 1]
+		stop = int(numpy.argmin(within_tol)) + 1 if not within_tol.all() else stop
+
+		area[peak_idx] = areas[stop - 1]
+		index[peak_idx] = stop - 1
+		if stop == 1:
+			shared[peak_idx] = edges[start] >= 2 * edges[start]
+		else:
+			shared[peak_idx] = edges[start + stop - 1] >= edges[start + stop - 2]
+
+	return area, index, shared
+
+
 def median_bounds(im: BaseIntensityMatrix, peak: Peak, shared: bool = True) -> Tuple[float, float]:
 	"""
 	Calculates the median of the left and right bounds found for each apexing peak mass.
@@ -448,20 +767,18 @@ def median_bounds(im: BaseIntensityMatrix, peak: Peak, shared: bool = True) -> T
 			apex = bounds[1]
 
 	# get peak masses with non-zero intensity
-	mass_ii = [ii for ii in range(len(ms.mass_list)) if ms.mass_spec[ii] > 0]
+	mass_ii = numpy.flatnonzero(ms.intensity_array > 0).tolist()
 
 	# get stats on boundaries
 	left_list = []
 	right_list = []
 
-	for ii in mass_ii:
-		# get ion chromatogram as list
-		ia = [mat[scan][ii] for scan in range(len(mat))]
-		area, left, right, l_share, r_share = ion_area(ia, apex)
-		if shared or not l_share:
-			left_list.append(left)
-		if shared or not r_share:
-			right_list.append(right)
+	area, left, right, l_share, r_share = batch_ion_areas(mat, mass_ii, [apex] * len(mass_ii))
+	for left_, right_, l_share_, r_share_ in zip(left.tolist(), right.tolist(), l_share.tolist(), r_share.tolist()):
+		if shared or not l_share_:
+			left_list.append(left_)
+		if shared or not r_share_:
+			right_list.append(right_)
 
 	# return medians
 	# NB if shared=True, lists maybe empty
@@ -25,7 +25,7 @@ Functions related to Peak modification.
 
 # stdlib
 import math
-from typing import Any, List, Optional, Sequence, Union
+from typing import Any, List, Optional, Sequence, Union, overload
 
 # 3rd party
 import numpy  # type: ignore
@@ -33,6 +33,7 @@ import numpy  # type: ignore
 # this package
 from pyms.IntensityMatrix import BaseIntensityMatrix
 from pyms.Peak import Peak
+from pyms.Peak.List.Table import PeakTable
 from pyms.Spectrum import MassSpectrum
 from pyms.Utils.Math import median_outliers
 from pyms.Utils.Time import time_str_secs
@@ -46,7 +47,9 @@ def composite_peak(peak_list: List[Peak], ignore_outliers: bool = False) -> Opti
 	Create a peak that consists of a composite spectrum from all spectra in the list of peaks.
 
 	:param peak_list: A list of peak objects
-	:param ignore_outliers:
+	:param ignore_outliers: Whether to ignore peaks whose retention times are outliers.
+		The outliers are marked by setting :attr:`~pyms.Peak.Class.Peak.is_outlier`,
+		so ``peak_list`` cannot be a :class:`~pyms.Peak.List.Table.PeakTable`.
 
 	:return: The composite peak
 
@@ -56,6 +59,12 @@ def composite_peak(peak_list: List[Peak], ignore_outliers: bool = False) -> Opti
 	if not is_peak_list(peak_list):
 		raise TypeError("'peak_list' must be a list of Peak objects")
 
+	if ignore_outliers and isinstance(peak_list, PeakTable):
+		raise TypeError(
+				"Outliers cannot be marked on the peaks of a PeakTable. "
+				"Convert it with 'PeakTable.to_peak_list()' first."
+				)
+
 	first = True
 	count = 0
 	avg_rt = 0.0
@@ -231,22 +240,39 @@ def is_peak_list(peaks: Any) -> bool:
 	Returns whether ``peaks`` is a valid peak list.
 
 	:author: Dominic Davis-Foster
+
+	.. versionchanged:: 2.4.0  :class:`~pyms.Peak.List.Table.PeakTable` objects are valid peak lists.
 	"""
 
+	if isinstance(peaks, PeakTable):
+		return True
+
 	return is_sequence_of(peaks, Peak)
 
 
+@overload
+def sele_peaks_by_rt(peaks: PeakTable, rt_range: Sequence[str]) -> PeakTable:
+	...  # pragma: no cover
+
+
+@overload
+def sele_peaks_by_rt(peaks: Union[Sequence[Peak], numpy.ndarray], rt_range: Sequence[str]) -> List[Peak]:
+	...  # pragma: no cover
+
+
 def sele_peaks_by_rt(
-		peaks: Union[Sequence[Peak], numpy.ndarray],
+		peaks: Union[Sequence[Peak], numpy.ndarray, PeakTable],
 		rt_range: Sequence[str],
-		) -> List[Peak]:
+		) -> Union[List[Peak], PeakTable]:
 	"""
 	Selects peaks from a retention time range.
 
 	:param peaks: A list of peak objects
 	:param rt_range: A list of two time strings, specifying lower and upper retention times.
 
-	:return: A list of peak objects
+	:return: A list of peak objects, or a :class:`~pyms.Peak.List.Table.PeakTable` if ``peaks`` is one.
+
+	.. versionchanged:: 2.4.0  Added support for :class:`~pyms.Peak.List.Table.PeakTable`.
 	"""
 
 	if not is_peak_list(peaks):
@@ -267,6 +293,9 @@ def sele_peaks_by_rt(
 	if rt_lo >= rt_hi:
 		raise ValueError("lower retention time limit must be less than upper")
 
+	if isinstance(peaks, PeakTable):
+		return peaks[(rt_lo < peaks.rt) & (peaks.rt < rt_hi)]
+
 	peaks_sele = []
 
 	for peak in peaks:
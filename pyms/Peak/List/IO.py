@@ -24,36 +24,86 @@ Functions related to storing and loading a list of Peak objects.
 ################################################################################
 
 # stdlib
+import functools
+import pathlib
 import pickle
-from typing import List, Sequence
+import struct
+import zipfile
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 # 3rd party
+import numpy  # type: ignore
 from domdf_python_tools.typing import PathLike
 
 # this package
 from pyms.Peak.Class import Peak
 from pyms.Peak.List.Function import is_peak_list
+from pyms.Peak.List.Table import PeakTable
 from pyms.Utils.IO import prepare_filepath
 from pyms.Utils.Utils import is_path, is_sequence
 
-__all__ = ["store_peaks", "load_peaks"]
+__all__ = [
+		"store_peaks",
+		"load_peaks",
+		"store_peak_table",
+		"load_peak_table",
+		"load_peak_columns",
+		"load_peak_attributes",
+		"is_binary_peak_list",
+		]
+
+#: The version of the binary peak list format written by :func:`~.store_peak_table`.
+_FORMAT_VERSION = 1
+
+#: The columns which can be read from a binary peak list with :func:`~.load_peak_columns`.
+_COLUMNS = (
+		"mass_list",
+		"rt",
+		"intensities",
+		"area",
+		"bounds",
+		"has_bounds",
+		"is_outlier",
+		"UID",
+		"ion_areas",
+		)
+
+# The other arrays which make up a binary peak list, and cannot be used as attribute names.
+_INTERNAL_ARRAYS = ("format_version", "ion_area_offsets", "ion_area_masses", "ion_area_values")
+
+# Binary peak lists are stored as numpy ``.npz`` archives, which are zip files.
+_ZIP_SIGNATURE = b"PK\x03\x04"
+
+# The size of the fixed part of a zip file's local file header.
+_ZIP_LOCAL_HEADER_SIZE = 30
 
 
 def store_peaks(
-		peak_list: Sequence[Peak],
+		peak_list: Union[Sequence[Peak], PeakTable],
 		file_name: PathLike,
 		protocol: int = 1,
+		binary: bool = False,
+		compress: bool = False,
 		):
 	"""
 	Store the list of peak objects.
 
 	:param peak_list: A list of peak objects.
 	:param file_name: File name to store peak list.
-	:param protocol: The :mod:`pickle` protocol to use.
+	:param protocol: The :mod:`pickle` protocol to use. Ignored if ``binary`` is :py:obj:`True`.
+	:param binary: Whether to store the peaks in the binary format written by :func:`~.store_peak_table`
+		rather than pickling them. The mass spectra of all peaks must then have the same mass list.
+	:param compress: Whether to compress the binary format. Ignored if ``binary`` is :py:obj:`False`.
 
 	:authors: Andrew Isaac, Dominic Davis-Foster (type assertions and pathlib support)
+
+	.. versionchanged:: 2.4.0  Added the ``binary`` and ``compress`` arguments.
 	"""
 
+	if binary:
+		store_peak_table(peak_list, file_name, compress=compress)
+		return
+
 	if not is_peak_list(peak_list):
 		raise TypeError("'peak_list' must be a list of Peak objects")
 
@@ -62,6 +112,9 @@ def store_peaks(
 
 	file_name = prepare_filepath(file_name)
 
+	if isinstance(peak_list, PeakTable):
+		peak_list = peak_list.to_peak_list()
+
 	with file_name.open("wb") as fp:
 		pickle.dump(peak_list, fp, protocol)
 
@@ -70,11 +123,15 @@ def load_peaks(file_name: PathLike) -> List[Peak]:
 	"""
 	Loads the peak_list stored with :func:`~.store_peaks`.
 
+	The format of the file is detected automatically.
+
 	:param file_name: File name of peak list
 
 	:return: The list of Peak objects
 
 	:authors: Andrew Isaac, Dominic Davis-Foster (pathlib support)
+
+	.. versionchanged:: 2.4.0  Added support for the binary format written by :func:`~.store_peak_table`.
 	"""
 
 	if not is_path(file_name):
@@ -82,9 +139,12 @@ def load_peaks(file_name: PathLike) -> List[Peak]:
 
 	file_name = prepare_filepath(file_name, mkdirs=False)
 
-	fp = file_name.open("rb")
-	peak_list = pickle.load(fp)
-	fp.close()
+	if is_binary_peak_list(file_name):
+		peak_list = load_peak_table(file_name).to_peak_list()
+	else:
+		fp = file_name.open("rb")
+		peak_list = pickle.load(fp)
+		fp.close()
 
 	if not is_sequence(peak_list):
 		raise OSError("The selected file is not a List")
@@ -92,3 +152,342 @@ def load_peaks(file_name: PathLike) -> List[Peak]:
 		raise OSError("The selected file is not a list of Peak objects")
 
 	return peak_list
+
+
+def store_peak_table(
+		peak_list: Union[Sequence[Peak], PeakTable],
+		file_name: PathLike,
+		compress: bool = False,
+		attributes: Optional[Dict[str, str]] = None,
+		):
+	"""
+	Store a peak list in a columnar binary format.
+
+	The retention times, areas, bounds, UIDs, mass spectra and ion areas are stored as
+	separate arrays in a numpy ``.npz`` archive, with the mass spectra as a single
+	matrix sharing one mass list. Unlike a pickle, loading the file cannot execute code,
+	and individual columns can be read without loading the rest of the file.
+
+	:param peak_list: A list of peak objects, or a :class:`~pyms.Peak.List.Table.PeakTable`.
+		The mass spectra of all peaks must have the same mass list.
+	:param file_name: File name to store peak list.
+	:param compress: Whether to compress the arrays. Compressed files are smaller,
+		but loading a range of retention times from them reads the whole of each column.
+	:param attributes: Optional strings to store with the peaks, such as the ``expr_code`` of an experiment.
+		They can be read with :func:`~.load_peak_attributes` without loading the peaks.
+
+	.. versionadded:: 2.4.0
+	"""
+
+	if not is_peak_list(peak_list):
+		raise TypeError("'peak_list' must be a list of Peak objects")
+
+	if not is_path(file_name):
+		raise TypeError("'file_name' must be a string or a PathLike object")
+
+	if isinstance(peak_list, PeakTable):
+		table = peak_list
+	else:
+		table = PeakTable.from_peak_list(peak_list)
+
+	arrays = _peak_table_arrays(table)
+
+	for name, value in (attributes or {}).items():
+		if not isinstance(name, str) or not isinstance(value, str):
+			raise TypeError("'attributes' must be a dictionary of strings")
+		if name in arrays:
+			raise ValueError(f"{name!r} cannot be used as an attribute name")
+
+		arrays[name] = numpy.array(value)
+
+	_write_arrays(prepare_filepath(file_name), arrays, compress)
+
+
+def load_peak_table(
+		file_name: PathLike,
+		rt_range: Optional[Tuple[float, float]] = None,
+		) -> PeakTable:
+	"""
+	Loads a peak list stored with :func:`~.store_peak_table`.
+
+	:param file_name: File name of peak list.
+	:param rt_range: The minimum and maximum retention times, in seconds, of the peaks to load.
+		If :py:obj:`None` all peaks are loaded. See :func:`~.load_peak_columns` for details.
+
+	.. versionadded:: 2.4.0
+	"""
+
+	return _table_from_columns(load_peak_columns(file_name, rt_range=rt_range))
+
+
+def load_peak_columns(
+		file_name: PathLike,
+		columns: Optional[Iterable[str]] = None,
+		rt_range: Optional[Tuple[float, float]] = None,
+		) -> Dict[str, Any]:
+	"""
+	Loads selected columns of a peak list stored with :func:`~.store_peak_table`.
+
+	Only the requested columns are read from the file.
+
+	:param file_name: File name of peak list.
+	:param columns: The columns to load, from ``'mass_list'``, ``'rt'``, ``'intensities'``,
+		``'area'``, ``'bounds'``, ``'has_bounds'``, ``'is_outlier'``, ``'UID'`` and ``'ion_areas'``.
+		These correspond to the properties of :class:`~pyms.Peak.List.Table.PeakTable`.
+		If :py:obj:`None` all columns are loaded.
+	:param rt_range: The minimum and maximum retention times, in seconds, of the peaks to load.
+		If :py:obj:`None` all peaks are loaded. The columns of an uncompressed file are memory-mapped,
+		so only the rows of the selected peaks are read. The columns of a compressed file must
+		be decompressed in full before the rows are selected, which saves no time.
+
+	:return: A dictionary mapping column names to their values.
+		The ``'ion_areas'`` column is a list of dictionaries; the other columns are numpy arrays.
+
+	.. versionadded:: 2.4.0
+	"""
+
+	if not is_path(file_name):
+		raise TypeError("'file_name' must be a string or a PathLike object")
+
+	if columns is None:
+		columns = _COLUMNS
+	else:
+		columns = tuple(columns)
+		for column in columns:
+			if column not in _COLUMNS:
+				raise ValueError(f"Unknown column {column!r}")
+
+	with _open_archive(file_name) as archive:
+		return _read_columns(archive, columns, rt_range)
+
+
+def load_peak_attributes(file_name: PathLike) -> Dict[str, str]:
+	"""
+	Loads the attributes stored with a peak list by :func:`~.store_peak_table`, without loading the peaks.
+
+	:param file_name: File name of peak list.
+
+	.. versionadded:: 2.4.0
+	"""
+
+	if not is_path(file_name):
+		raise TypeError("'file_name' must be a string or a PathLike object")
+
+	with _open_archive(file_name) as archive:
+		return {
+				name: str(archive[name])
+				for name in archive.files
+				if name not in _COLUMNS and name not in _INTERNAL_ARRAYS
+				}
+
+
+def is_binary_peak_list(file_name: PathLike) -> bool:
+	"""
+	Returns whether the file is in the binary format written by :func:`~.store_peak_table`, rather than a pickle.
+
+	:param file_name:
+
+	.. versionadded:: 2.4.0
+	"""
+
+	if not is_path(file_name):
+		raise TypeError("'file_name' must be a string or a PathLike object")
+
+	with prepare_filepath(file_name, mkdirs=False).open("rb") as fp:
+		return fp.read(len(_ZIP_SIGNATURE)) == _ZIP_SIGNATURE
+
+
+def _peak_table_arrays(table: PeakTable) -> Dict[str, numpy.ndarray]:
+	"""
+	Returns the arrays which store the peak table in the binary format.
+
+	:param table:
+	"""
+
+	# The ion areas are stored as flat arrays, with the offset of each peak's ion areas.
+	ion_area_counts = [len(ion_areas) for ion_areas in table.ion_areas]
+	ion_area_offsets = numpy.zeros(len(table) + 1, dtype=numpy.int64)
+	numpy.cumsum(ion_area_counts, out=ion_area_offsets[1:])
+
+	return {
+			"format_version": numpy.array(_FORMAT_VERSION),
+			"mass_list": table.mass_list,
+			"rt": table.rt,
+			"intensities": table.intensities,
+			"area": table.area,
+			"bounds": table.bounds,
+			"has_bounds": table.has_bounds,
+			"is_outlier": table.is_outlier,
+			"UID": numpy.array(table.UID.tolist(), dtype=str),
+			"ion_area_offsets": ion_area_offsets,
+			# The dtype is inferred, so integer masses are loaded as integers.
+			"ion_area_masses": numpy.array([ion for areas in table.ion_areas for ion in areas]),
+			"ion_area_values": numpy.array([area for areas in table.ion_areas for area in areas.values()], dtype=float),
+			}
+
+
+def _write_arrays(file_name: pathlib.Path, arrays: Dict[str, numpy.ndarray], compress: bool = False):
+	"""
+	Writes arrays to a numpy ``.npz`` archive.
+
+	:param file_name:
+	:param arrays:
+	:param compress: Whether to compress the arrays.
+	"""
+
+	# numpy adds a ".npz" extension to filenames, but not to open files.
+	with file_name.open("wb") as fp:
+		if compress:
+			numpy.savez_compressed(fp, **arrays)
+		else:
+			numpy.savez(fp, **arrays)
+
+
+def _open_archive(file_name: PathLike):
+	"""
+	Opens a binary peak list, checking that it can be read.
+
+	:param file_name:
+
+	:return: The open ``.npz`` archive.
+	"""
+
+	file_name = prepare_filepath(file_name, mkdirs=False)
+
+	try:
+		archive = numpy.load(str(file_name), allow_pickle=False)
+	except ValueError:
+		raise OSError("The selected file is not a binary peak list")
+
+	if not isinstance(archive, numpy.lib.npyio.NpzFile):
+		raise OSError("The selected file is not a binary peak list")
+
+	if "format_version" not in archive.files:
+		archive.close()
+		raise OSError("The selected file is not a binary peak list")
+	elif int(archive["format_version"]) > _FORMAT_VERSION:
+		archive.close()
+		raise OSError("The selected peak list was written by a newer version of PyMassSpec")
+
+	return archive
+
+
+def _read_columns(
+		archive,
+		columns: Iterable[str] = _COLUMNS,
+		rt_range: Optional[Tuple[float, float]] = None,
+		) -> Dict[str, Any]:
+	"""
+	Reads columns from an open binary peak list.
+
+	:param archive: The open ``.npz`` archive.
+	:param columns: The columns to load.
+	:param rt_range: The minimum and maximum retention times, in seconds, of the peaks to load.
+	"""
+
+	selection: Union[slice, numpy.ndarray] = slice(None)
+	if rt_range is None:
+		get_array = archive.__getitem__
+	else:
+		# Only the selected rows of the other columns are read, provided the file is uncompressed.
+		get_array = functools.partial(_map_array, archive)
+		rt = archive["rt"]
+		selection = numpy.flatnonzero((rt >= rt_range[0]) & (rt <= rt_range[1]))
+
+	loaded = {}
+	for column in columns:
+		if column == "mass_list":
+			loaded[column] = archive[column]
+		elif column == "ion_areas":
+			loaded[column] = _load_ion_areas(get_array, selection)
+		else:
+			loaded[column] = numpy.asarray(get_array(column)[selection])
+
+	return loaded
+
+
+def _map_array(archive, name: str) -> numpy.ndarray:
+	"""
+	Returns an array from a binary peak list, memory-mapping it if it is stored uncompressed.
+
+	Indexing the memory-mapped array reads only the selected elements from the file.
+	Compressed arrays are read in full.
+
+	:param archive: The open ``.npz`` archive.
+	:param name: The name of the array.
+	"""
+
+	info = archive.zip.getinfo(f"{name}.npy")
+	if info.compress_type != zipfile.ZIP_STORED:
+		return archive[name]
+
+	fp = archive.fid
+	fp.seek(info.header_offset)
+	local_header = fp.read(_ZIP_LOCAL_HEADER_SIZE)
+	filename_length, extra_length = struct.unpack("<HH", local_header[26:30])
+	fp.seek(info.header_offset + _ZIP_LOCAL_HEADER_SIZE + filename_length + extra_length)
+
+	version = numpy.lib.format.read_magic(fp)
+	if version == (1, 0):
+		shape, fortran_order, dtype = numpy.lib.format.read_array_header_1_0(fp)
+	else:
+		shape, fortran_order, dtype = numpy.lib.format.read_array_header_2_0(fp)
+
+	if not numpy.prod(shape, dtype=numpy.int64):
+		# Empty files cannot be memory-mapped
+		return archive[name]
+
+	return numpy.memmap(
+			fp,
+			dtype=dtype,
+			mode='r',
+			offset=fp.tell(),
+			shape=shape,
+			order='F' if fortran_order else 'C',
+			)
+
+
+def _table_from_columns(columns: Dict[str, Any]) -> PeakTable:
+	"""
+	Constructs a :class:`~pyms.Peak.List.Table.PeakTable` from all of the columns of a binary peak list.
+
+	:param columns:
+	"""
+
+	return PeakTable(
+			columns["mass_list"],
+			columns["rt"],
+			columns["intensities"],
+			area=columns["area"],
+			bounds=columns["bounds"],
+			has_bounds=columns["has_bounds"],
+			is_outlier=columns["is_outlier"],
+			uid=columns["UID"],
+			ion_areas=columns["ion_areas"],
+			)
+
+
+def _load_ion_areas(
+		get_array: Callable[[str], numpy.ndarray],
+		selection: Union[slice, numpy.ndarray],
+		) -> List[Dict[float, float]]:
+	"""
+	Reconstructs the ion areas dictionaries of the selected peaks from their flat arrays.
+
+	:param get_array: Function which returns an array from the open ``.npz`` archive.
+	:param selection: The indices of the peaks to load.
+	"""
+
+	offsets = get_array("ion_area_offsets")
+	masses = get_array("ion_area_masses")
+	values = get_array("ion_area_values")
+
+	if isinstance(selection, slice):
+		indices = range(len(offsets) - 1)[selection]
+	else:
+		indices = selection.tolist()
+
+	starts = offsets[indices].tolist()
+	stops = offsets[[idx + 1 for idx in indices]].tolist()
+
+	return [dict(zip(masses[start:stop].tolist(), values[start:stop].tolist())) for start, stop in zip(starts, stops)]
@@ -0,0 +1,387 @@
+"""
+Columnar representation of large peak lists.
+
+.. versionadded:: 2.4.0
+"""
+
+################################################################################
+#                                                                              #
+#    PyMassSpec software for processing of mass-spectrometry data              #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                              #
+#                                                                              #
+#    This program is free software; you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License version 2 as         #
+#    published by the Free Software Foundation.                                #
+#                                                                              #
+#    This program is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of            #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the             #
+#    GNU General Public License for more details.                              #
+#                                                                              #
+#    You should have received a copy of the GNU General Public License         #
+#    along with this program; if not, write to the Free Software               #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.                 #
+#                                                                              #
+################################################################################
+
+# stdlib
+from collections.abc import Sequence as _SequenceABC
+from typing import Dict, Iterator, List, Optional, Sequence, Union, overload
+
+# 3rd party
+import numpy  # type: ignore
+
+# this package
+from pyms.Base import pymsBaseClass
+from pyms.Peak.Class import Peak
+from pyms.Spectrum import MassSpectrum, _readonly_array
+
+__all__ = ["PeakTable"]
+
+
+class PeakTable(pymsBaseClass, _SequenceABC):
+	"""
+	A peak list stored as columns of arrays rather than as individual :class:`~pyms.Peak.Class.Peak` objects.
+
+	The mass spectra of all peaks share a single mass axis, and the intensities are
+	stored as a matrix with a row for each peak and a column for each mass.
+	This uses much less memory than a list of :class:`~pyms.Peak.Class.Peak` objects,
+	and allows operations such as :func:`~pyms.BillerBiemann.rel_threshold` to be
+	applied to every peak at once.
+
+	A :class:`~.PeakTable` is a :class:`~collections.abc.Sequence` of peaks, so it can be
+	used in place of a peak list by functions which do not change the peaks. Indexing with an integer,
+	or iterating over the table, returns new :class:`~pyms.Peak.Class.Peak` objects each time,
+	so changes to those peaks are not reflected in the table. Use :meth:`~.PeakTable.to_peak_list`
+	to obtain peaks which can be changed. Indexing with a slice, an array of indices,
+	or a boolean mask returns a new :class:`~.PeakTable`.
+
+	:param mass_list: The masses shared by the mass spectra of all peaks.
+	:param rt: The retention time of each peak, in seconds.
+	:param intensities: The mass spectrum intensities, with a row for each peak and a column for each mass.
+	:param area: The area of each peak, or ``NaN`` if not set.
+	:param bounds: The left, apex and right bounds of each peak.
+	:param has_bounds: Whether the bounds of each peak are set.
+	:param is_outlier: Whether each peak is an outlier.
+	:param uid: The UID of each peak. If not given the UIDs are calculated from the mass spectra.
+	:param ion_areas: Mappings of ion to ion area for each peak.
+	"""
+
+	def __init__(
+			self,
+			mass_list: Union[Sequence[float], numpy.ndarray],
+			rt: Union[Sequence[float], numpy.ndarray],
+			intensities: numpy.ndarray,
+			area: Optional[numpy.ndarray] = None,
+			bounds: Optional[numpy.ndarray] = None,
+			has_bounds: Optional[numpy.ndarray] = None,
+			is_outlier: Optional[numpy.ndarray] = None,
+			uid: Optional[Sequence[str]] = None,
+			ion_areas: Optional[List[Dict[float, float]]] = None,
+			):
+
+		self._mass_list = _readonly_array(numpy.asarray(mass_list, dtype=float))
+		self._rt = numpy.array(rt, dtype=float)
+		n_peaks = len(self._rt)
+		self._intensities = numpy.array(intensities, dtype=float, ndmin=2)
+
+		if self._intensities.size != n_peaks * len(self._mass_list):
+			raise ValueError("'intensities' must have a row for each peak and a column for each mass in 'mass_list'")
+		self._intensities = self._intensities.reshape(n_peaks, len(self._mass_list))
+
+		if area is None:
+			area = numpy.full(n_peaks, numpy.nan)
+		if bounds is None:
+			bounds = numpy.zeros((n_peaks, 3), dtype=int)
+			has_bounds = numpy.zeros(n_peaks, dtype=bool)
+		elif has_bounds is None:
+			has_bounds = numpy.ones(n_peaks, dtype=bool)
+		if is_outlier is None:
+			is_outlier = numpy.zeros(n_peaks, dtype=bool)
+		if ion_areas is None:
+			ion_areas = [{} for _ in range(n_peaks)]
+
+		self._area = numpy.array(area, dtype=float)
+		self._bounds = numpy.array(bounds, dtype=int).reshape(n_peaks, 3)
+		self._has_bounds = numpy.array(has_bounds, dtype=bool)
+		self._is_outlier = numpy.array(is_outlier, dtype=bool)
+		self._ion_areas = list(ion_areas)
+
+		if uid is None:
+			self._uid = _make_uids(self._mass_list, self._intensities, self._rt)
+		else:
+			self._uid = numpy.array(uid, dtype=object)
+
+		for column in (self._area, self._has_bounds, self._is_outlier, self._uid, self._ion_areas):
+			if len(column) != n_peaks:
+				raise ValueError("All columns must have the same length as 'rt'")
+
+	@classmethod
+	def from_peak_list(cls, peak_list: Sequence[Peak]) -> "PeakTable":
+		"""
+		Construct a :class:`~.PeakTable` from a list of peaks.
+
+		:param peak_list: The peaks. The mass spectra of all peaks must have the same mass list.
+		"""
+
+		if isinstance(peak_list, PeakTable):
+			return peak_list.copy()
+
+		for peak in peak_list:
+			if not isinstance(peak, Peak):
+				raise TypeError("'peak_list' must be a Sequence of Peak objects")
+
+		if not peak_list:
+			return cls([], [], numpy.empty((0, 0)))
+
+		# Copies of a peak's mass spectrum share its arrays.
+		# Spectra created from the same intensity matrix usually share their mass axis.
+		spectra = [peak.mass_spectrum for peak in peak_list]
+		mass_axis = spectra[0].mass_array
+		for spectrum in spectra:
+			peak_axis = spectrum.mass_array
+			if peak_axis is not mass_axis and not numpy.array_equal(peak_axis, mass_axis):
+				raise ValueError("The mass spectra of all peaks must have the same mass list")
+
+		return cls(
+				mass_axis,
+				[peak.rt for peak in peak_list],
+				[spectrum.intensity_array for spectrum in spectra],
+				area=[numpy.nan if peak.area is None else peak.area for peak in peak_list],
+				bounds=[peak.bounds or (0, 0, 0) for peak in peak_list],
+				has_bounds=[peak.bounds is not None for peak in peak_list],
+				is_outlier=[peak.is_outlier for peak in peak_list],
+				uid=[peak.UID for peak in peak_list],
+				ion_areas=[dict(peak._ion_areas) for peak in peak_list],
+				)
+
+	def to_peak_list(self) -> List[Peak]:
+		"""
+		Returns the peaks as a list of :class:`~pyms.Peak.Class.Peak` objects.
+		"""
+
+		return [self._make_peak(idx) for idx in range(len(self))]
+
+	def _make_peak(self, idx: int) -> Peak:
+		"""
+		Construct a :class:`~pyms.Peak.Class.Peak` from a row of the table.
+
+		:param idx: The index of the peak.
+		"""
+
+		peak = Peak(
+				float(self._rt[idx]),
+				MassSpectrum(self._mass_list, self._intensities[idx]),
+				outlier=bool(self._is_outlier[idx]),
+				)
+
+		if not numpy.isnan(self._area[idx]):
+			# The setter warns about zero areas, which would already have been warned about.
+			peak._area = float(self._area[idx])
+		if self._has_bounds[idx]:
+			peak.bounds = tuple(self._bounds[idx].tolist())
+
+		peak._ion_areas = dict(self._ion_areas[idx])
+		peak._UID = self._uid[idx]
+
+		return peak
+
+	def __len__(self) -> int:
+		"""
+		Returns the number of peaks in the table.
+		"""
+
+		return len(self._rt)
+
+	@overload
+	def __getitem__(self, index: int) -> Peak:
+		...  # pragma: no cover
+
+	@overload
+	def __getitem__(self, index: Union[slice, Sequence[int], numpy.ndarray]) -> "PeakTable":
+		...  # pragma: no cover
+
+	def __getitem__(self, index):
+		"""
+		Returns the peak at the given index, or a new table of the peaks selected by a slice, indices or mask.
+
+		:param index:
+		"""
+
+		if isinstance(index, (bool, numpy.bool_)):
+			raise TypeError("PeakTable indices must be integers, slices, arrays or masks, not bool")
+
+		if isinstance(index, (int, numpy.integer)):
+			if not -len(self) <= index < len(self):
+				raise IndexError("PeakTable index out of range")
+			return self._make_peak(int(index) % len(self))
+
+		if isinstance(index, slice):
+			indices = numpy.arange(len(self))[index]
+		else:
+			indices = numpy.arange(len(self))[numpy.asarray(index)]
+
+		return self.__class__(
+				self._mass_list,
+				self._rt[indices],
+				self._intensities[indices],
+				area=self._area[indices],
+				bounds=self._bounds[indices],
+				has_bounds=self._has_bounds[indices],
+				is_outlier=self._is_outlier[indices],
+				uid=self._uid[indices],
+				ion_areas=[dict(self._ion_areas[idx]) for idx in indices.tolist()],
+				)
+
+	def __iter__(self) -> Iterator[Peak]:
+		for idx in range(len(self)):
+			yield self._make_peak(idx)
+
+	def __eq__(self, other) -> bool:
+		"""
+		Return whether this PeakTable is equal to another object.
+
+		:param other: The other object to test equality with.
+		"""
+
+		if isinstance(other, self.__class__):
+			return (
+					numpy.array_equal(self._mass_list, other._mass_list)
+					and numpy.array_equal(self._rt, other._rt)
+					and numpy.array_equal(self._intensities, other._intensities)
+					and numpy.array_equal(self._area, other._area, equal_nan=True)
+					and numpy.array_equal(self._bounds[self._has_bounds], other._bounds[other._has_bounds])
+					and numpy.array_equal(self._has_bounds, other._has_bounds)
+					and numpy.array_equal(self._is_outlier, other._is_outlier)
+					and list(self._uid) == list(other._uid) and self._ion_areas == other._ion_areas
+					)
+
+		return NotImplemented
+
+	def copy(self) -> "PeakTable":
+		"""
+		Returns a copy of the table.
+		"""
+
+		return self[:]
+
+	__copy__ = copy
+
+	def __deepcopy__(self, memodict: Optional[Dict] = None) -> "PeakTable":
+		return self.copy()
+
+	@property
+	def mass_list(self) -> numpy.ndarray:
+		"""
+		The masses shared by the mass spectra of all peaks, as a read-only array.
+		"""
+
+		return self._mass_list
+
+	@property
+	def rt(self) -> numpy.ndarray:
+		"""
+		The retention time of each peak, in seconds.
+		"""
+
+		return self._rt
+
+	@property
+	def intensities(self) -> numpy.ndarray:
+		"""
+		The mass spectrum intensities, with a row for each peak and a column for each mass.
+
+		If the intensities are changed :meth:`~.PeakTable.make_UIDs` should be called afterwards.
+		"""
+
+		return self._intensities
+
+	@property
+	def area(self) -> numpy.ndarray:
+		"""
+		The area of each peak, or ``NaN`` if not set.
+		"""
+
+		return self._area
+
+	@property
+	def bounds(self) -> numpy.ndarray:
+		"""
+		The left, apex and right bounds of each peak, with a row for each peak.
+		"""
+
+		return self._bounds
+
+	@property
+	def has_bounds(self) -> numpy.ndarray:
+		"""
+		Whether the bounds of each peak are set.
+		"""
+
+		return self._has_bounds
+
+	@property
+	def is_outlier(self) -> numpy.ndarray:
+		"""
+		Whether each peak is an outlier.
+		"""
+
+		return self._is_outlier
+
+	@property
+	def UID(self) -> numpy.ndarray:
+		"""
+		The UID of each peak.
+		"""
+
+		return self._uid
+
+	@property
+	def ion_areas(self) -> List[Dict[float, float]]:
+		"""
+		Mappings of ion to ion area for each peak.
+		"""
+
+		return self._ion_areas
+
+	def make_UIDs(self):
+		"""
+		Recalculate the UID of each peak from its mass spectrum and retention time,
+		as :meth:`pyms.Peak.Class.Peak.make_UID` does.
+		"""  # noqa: D400
+
+		self._uid = _make_uids(self._mass_list, self._intensities, self._rt)
+
+
+def _make_uids(mass_list: numpy.ndarray, intensities: numpy.ndarray, rt: numpy.ndarray) -> numpy.ndarray:
+	"""
+	Create the UID of each peak, as :meth:`pyms.Peak.Class.Peak.make_UID` does.
+
+	:param mass_list:
+	:param intensities:
+	:param rt:
+	"""
+
+	n_peaks = len(rt)
+	uids = numpy.empty(n_peaks, dtype=object)
+
+	if not len(mass_list):
+		for idx, rt_ in enumerate(rt.tolist()):
+			uids[idx] = f"{rt_:.2f}"
+		return uids
+
+	# make_UID takes the last two intensities which exceed all previous (positive) intensities.
+	running_max = numpy.maximum.accumulate(numpy.maximum(intensities, 0), axis=1)
+	previous_max = numpy.zeros_like(running_max)
+	previous_max[:, 1:] = running_max[:, :-1]
+	is_new_max = intensities > previous_max
+
+	for idx in range(n_peaks):
+		new_max = numpy.flatnonzero(is_new_max[idx])
+		best_ii = new_max[-1] if len(new_max) else 0
+		best2_ii = new_max[-2] if len(new_max) > 1 else 0
+		best = float(intensities[idx, best_ii])
+		ratio = int(100 * float(intensities[idx, best2_ii]) / best)
+		uids[idx] = f"{int(mass_list[best_ii]):d}-{int(mass_list[best2_ii]):d}-{ratio:d}-{rt[idx]:.2f}"
+
+	return uids
@@ -223,13 +223,13 @@ def gcms_sim(
 		print('-', end='')
 		index = int((peak.rt - t1) / period)
 
-		height = sum(peak.mass_spectrum.mass_spec)
+		ion_heights = peak.mass_spectrum.mass_spec
+		height = sum(ion_heights)
 		# standard deviation = area/(height * sqrt(2/pi))
 		sigma: float = peak.area / (height * (math.sqrt(2 * math.pi)))  # type: ignore
 		print("width", sigma)
 
-		for i in range(len(peak.mass_spectrum.mass_list)):
-			ion_height = peak.mass_spectrum.mass_spec[i]
+		for i, ion_height in enumerate(ion_heights):
 			ic = chromatogram(n_scan, index, sigma, ion_height)
 			i_array[:, i] += ic
 
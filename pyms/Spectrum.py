@@ -76,15 +76,42 @@ def array_as_numeric(array: Union[Sequence, numpy.ndarray]) -> numpy.ndarray:
 	return array
 
 
+def _readonly_array(array: Union[Sequence, numpy.ndarray]) -> numpy.ndarray:
+	"""
+	Returns a read-only numeric copy of the given array.
+
+	Arrays which are already read-only are returned unchanged,
+	which allows spectra to share a single copy of their mass axis.
+
+	:param array:
+	"""
+
+	if isinstance(array, numpy.ndarray):
+		if not array.flags.writeable:
+			return array
+		array = array.copy()
+
+	array = array_as_numeric(array)
+	array.flags.writeable = False
+
+	return array
+
+
 @prettify_docstrings
 class Scan(pymsBaseClass, MassListMixin):
 	"""
 	Generic object for a single Scan's raw data.
 
+	The masses and intensities are stored as read-only numpy arrays.
+	If ``mass_list`` is already a read-only array it is used without copying,
+	so scans created from the same data can share a single mass axis.
+
 	:param mass_list: A sequence of mass values
 	:param intensity_list: A sequence intensity values
 
 	:authors: Andrew Isaac, Qiao Wang, Vladimir Likic, Dominic Davis-Foster
+
+	.. versionchanged:: 2.4.0  The data are stored as read-only numpy arrays.
 	"""
 
 	def __init__(
@@ -92,20 +119,20 @@ class Scan(pymsBaseClass, MassListMixin):
 			mass_list: Union[Sequence[float], numpy.ndarray],
 			intensity_list: Union[Sequence[float], numpy.ndarray],
 			):
-		mass_list = list(array_as_numeric(mass_list))
-		intensity_list = list(array_as_numeric(intensity_list))
+		mass_array = _readonly_array(mass_list)
+		intensity_array = _readonly_array(intensity_list)
 
-		if len(mass_list) != len(intensity_list):
+		if len(mass_array) != len(intensity_array):
 			raise ValueError("'mass_list' is not the same size as 'intensity_list'")
 
-		sorted_mass_list = sorted(mass_list)
+		mass_steps = numpy.diff(mass_array)
 
-		if sorted_mass_list != mass_list:
+		if (mass_steps < 0).any():
 			# Mass list isn't in ascending order
-			if sorted_mass_list[::-1] == mass_list:
+			if (mass_steps <= 0).all():
 				# Mass list is in descending order
-				mass_list = mass_list[::-1]
-				intensity_list = intensity_list[::-1]
+				mass_array = mass_array[::-1]
+				intensity_array = intensity_array[::-1]
 			else:
 				warnings.warn(
 						"""Unknown sort order for mass list; it doesn't appear to be in either ascending or descending order.
@@ -113,12 +140,18 @@ Please report this at https://github.com/domdfcoding/pymassspec/issues and uploa
 """
 						)
 
-		self._mass_list = mass_list
-		self._intensity_list = intensity_list
+		self._mass_array = mass_array
+		self._intensity_array = intensity_array
+		self._update_min_max_mass()
+
+	def _update_min_max_mass(self):
+		"""
+		Recalculates the minimum and maximum masses from the mass array.
+		"""
 
-		if self:
-			self._min_mass = min(mass_list)
-			self._max_mass = max(mass_list)
+		if len(self._mass_array):
+			self._min_mass = self._mass_array.min().item()
+			self._max_mass = self._mass_array.max().item()
 		else:
 			self._min_mass = None
 			self._max_mass = None
@@ -130,10 +163,10 @@ Please report this at https://github.com/domdfcoding/pymassspec/issues and uploa
 		:authors: Andrew Isaac, Qiao Wang, Vladimir Likic
 		"""
 
-		return len(self._mass_list)
+		return len(self._mass_array)
 
 	def __bool__(self) -> bool:
-		return bool(self._mass_list)
+		return bool(len(self._mass_array))
 
 	def __eq__(self, other: Any) -> bool:
 		"""
@@ -144,8 +177,8 @@ Please report this at https://github.com/domdfcoding/pymassspec/issues and uploa
 
 		if isinstance(other, self.__class__):
 			return (
-					numpy.array_equal(self._intensity_list, other.intensity_list)
-					and numpy.array_equal(self._mass_list, other.mass_list)
+					numpy.array_equal(self._intensity_array, other._intensity_array)
+					and numpy.array_equal(self._mass_array, other._mass_array)
 					)
 
 		return NotImplemented
@@ -153,9 +186,11 @@ Please report this at https://github.com/domdfcoding/pymassspec/issues and uploa
 	def __copy__(self) -> "Scan":
 		"""
 		Returns a copy of the object.
+
+		As the underlying arrays are read-only they are shared with the copy.
 		"""
 
-		return self.__class__(self._mass_list[:], self._intensity_list[:])
+		return self.__class__(self._mass_array, self._intensity_array)
 
 	def __deepcopy__(self, memodict={}) -> "Scan":
 		return self.__copy__()
@@ -183,6 +218,16 @@ Please report this at https://github.com/domdfcoding/pymassspec/issues and uploa
 
 		yield from zip(self.mass_list, self.intensity_list)
 
+	@property
+	def mass_list(self) -> List[float]:
+		"""
+		Returns a list of the masses.
+
+		:authors: Qiao Wang, Andrew Isaac, Vladimir Likic
+		"""
+
+		return self._mass_array.tolist()
+
 	@property
 	def intensity_list(self) -> List:
 		"""
@@ -191,17 +236,46 @@ Please report this at https://github.com/domdfcoding/pymassspec/issues and uploa
 		:authors: Qiao Wang, Andrew Isaac, Vladimir Likic
 		"""
 
-		return self._intensity_list[:]
+		return self._intensity_array.tolist()
 
 	@property
 	def mass_spec(self) -> List:
 		"""
-		Returns the intensity list.
+		Returns a copy of the intensity list.
 
 		:authors: Qiao Wang, Andrew Isaac, Vladimir Likic
+
+		.. versionchanged:: 2.4.0
+
+			Returns a copy of the intensities. Modifying the returned list no longer modifies the scan.
+		"""
+
+		return self._intensity_array.tolist()
+
+	@property
+	def mass_array(self) -> numpy.ndarray:
+		"""
+		Returns the masses as a read-only numpy array.
+
+		The array is not copied, and may be shared with other scans
+		that have the same mass axis.
+
+		.. versionadded:: 2.4.0
+		"""
+
+		return self._mass_array
+
+	@property
+	def intensity_array(self) -> numpy.ndarray:
+		"""
+		Returns the intensities as a read-only numpy array.
+
+		The array is not copied.
+
+		.. versionadded:: 2.4.0
 		"""
 
-		return self._intensity_list
+		return self._intensity_array
 
 	@classmethod
 	def from_dict(cls: Type[_S], dictionary: Mapping) -> _S:
@@ -234,15 +308,13 @@ class MassSpectrum(Scan):
 		:param value: list of intensity value for each mass in ``mass_list``.
 		"""
 
-		value = array_as_numeric(value)
-
 		# if not isinstance(value, _list_types) or not isinstance(value[0], Number):
 		# 	raise TypeError("'intensity_list' must be a list of numbers")
 
 		# if not len(self.mass_list) == len(value):
 		# 	raise ValueError("'mass_list' and 'intensity_list' are not the same size")
 
-		self._intensity_list = list(value)
+		self._intensity_array = _readonly_array(value)
 
 	@Scan.mass_spec.setter  # type: ignore
 	def mass_spec(self, value: List[float]):
@@ -252,17 +324,15 @@ class MassSpectrum(Scan):
 		:param value: list of intensity value for each mass in `mass_list`.
 		"""
 
-		value = array_as_numeric(value)
-
 		# if not isinstance(value, _list_types) or not isinstance(value[0], Number):
 		# 	raise TypeError("'intensity_list' must be a list of numbers")
 
 		# if not len(self.mass_list) == len(value):
 		# 	raise ValueError("'mass_list' and 'intensity_list' are not the same size")
 
-		self._intensity_list = list(value)
+		self._intensity_array = _readonly_array(value)
 
-	@MassListMixin.mass_list.setter  # type: ignore
+	@Scan.mass_list.setter  # type: ignore
 	def mass_list(self, value: List[float]):
 		"""
 		Set the mass values for the spectrum.
@@ -270,22 +340,14 @@ class MassSpectrum(Scan):
 		:param value: list of mass values for the spectrum
 		"""
 
-		value = array_as_numeric(value)
-
 		# if not isinstance(value, _list_types) or not isinstance(value[0], Number):
 		# 	raise TypeError("'mass_list' must be a list of numbers")
 
 		# if not len(self.mass_list) == len(value):
 		# 	raise ValueError("'mass_list' and 'intensity_list' are not the same size")
 
-		self._mass_list = list(value)
-
-		if self:
-			self._min_mass = min(value)
-			self._max_mass = max(value)
-		else:
-			self._min_mass = None
-			self._max_mass = None
+		self._mass_array = _readonly_array(value)
+		self._update_min_max_mass()
 
 	def crop(
 			self: _M,
@@ -371,8 +433,8 @@ class MassSpectrum(Scan):
 		:param mass:
 		"""
 
-		mass_idx = self._mass_list.index(mass)
-		return self._intensity_list[mass_idx]
+		mass_idx = self.mass_list.index(mass)
+		return self._intensity_array[mass_idx].item()
 
 	def get_mass_for_intensity(self, intensity: float) -> float:
 		"""
@@ -382,8 +444,8 @@ class MassSpectrum(Scan):
 		:param intensity:
 		"""
 
-		intensity_idx = self._intensity_list.index(intensity)
-		return self._mass_list[intensity_idx]
+		intensity_idx = self.intensity_list.index(intensity)
+		return self._mass_array[intensity_idx].item()
 
 	@classmethod
 	def from_jcamp(cls: Type[_M], file_name: PathLike) -> _M:
@@ -469,9 +531,7 @@ class MassSpectrum(Scan):
 		return cls(mass_list, intensity_list)
 
 	def __bool__(self) -> bool:
-		if self.mass_list or self.mass_spec:
-			return True
-		return False
+		return bool(len(self._mass_array) or len(self._intensity_array))
 
 
 class CompositeMassSpectrum(MassSpectrum):
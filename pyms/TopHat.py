@@ -25,7 +25,9 @@ Top-hat baseline corrector.
 
 # stdlib
 import copy
-from typing import Optional, Union
+import functools
+from concurrent.futures import Executor
+from typing import Iterator, Optional, Union
 
 # 3rd party
 import numpy  # type: ignore
@@ -77,7 +79,11 @@ def tophat(ic: IonChromatogram, struct: Union[int, str, None] = None):
 	return ic_bc
 
 
-def tophat_im(im: BaseIntensityMatrix, struct: Optional[str] = None):
+def tophat_im(
+		im: BaseIntensityMatrix,
+		struct: Optional[str] = None,
+		executor: Optional[Executor] = None,
+		):
 	"""
 	Top-hat baseline correction on Intensity Matrix.
 
@@ -87,10 +93,13 @@ def tophat_im(im: BaseIntensityMatrix, struct: Optional[str] = None):
 	:param struct: Top-hat structural element as time string.
 		The structural element needs to be larger than the features one
 		wants to retain in the spectrum after the top-hat transform.
+	:param executor: Optional :class:`concurrent.futures.Executor` to correct the ion chromatograms in parallel.
 
 	:return: Top-hat corrected IntensityMatrix Matrix
 
 	:author: Sean O'Callaghan
+
+	.. versionchanged:: 2.4.0  Added the ``executor`` argument.
 	"""
 
 	if not isinstance(im, BaseIntensityMatrix):
@@ -100,9 +109,16 @@ def tophat_im(im: BaseIntensityMatrix, struct: Optional[str] = None):
 
 	im_smooth = copy.deepcopy(im)
 
-	for ii in range(n_mz):
-		ic = im_smooth.get_ic_at_index(ii)
-		ic_smooth = tophat(ic, struct)
+	ics = (im_smooth.get_ic_at_index(ii) for ii in range(n_mz))
+	correct = functools.partial(tophat, struct=struct)
+
+	ics_smooth: Iterator[IonChromatogram]
+	if executor is None:
+		ics_smooth = map(correct, ics)
+	else:
+		ics_smooth = executor.map(correct, ics)
+
+	for ii, ic_smooth in enumerate(ics_smooth):
 		im_smooth.set_ic_at_index(ii, ic_smooth)
 
 	return im_smooth
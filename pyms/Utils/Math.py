@@ -28,10 +28,9 @@ Provides mathematical functions.
 ################################################################################
 
 # stdlib
-import math
 from statistics import mean, median
 from statistics import stdev as std
-from typing import List, Sequence, Union, overload
+from typing import List, Optional, Sequence, Union, overload
 
 # 3rd party
 import numpy  # type: ignore
@@ -62,57 +61,101 @@ def vector_by_step(start: float, stop: float, step: float) -> List[float]:
 	:param step: Step
 
 	:author: Vladimir Likic
+
+	.. versionchanged:: 2.4.0
+
+		The values are now calculated as ``start + i * step`` rather than by repeated addition,
+		and a :exc:`ValueError` is raised if ``step`` is not positive.
 	"""  # noqa: D400
 
 	if not is_number(start) or not is_number(stop) or not is_number(step):
 		raise TypeError("parameters 'start', 'stop', and 'step' must be numbers")
 
-	v = []
+	if step <= 0:
+		raise ValueError("'step' must be greater than zero")
+
+	# numpy.arange can include a value at or past stop due to rounding in the number of values,
+	# so one extra value is calculated and the values which are not less than stop are dropped.
+	n_values = max(int(numpy.ceil((stop - start) / step)) + 1, 0)
+	values = start + numpy.arange(n_values) * step
+
+	return values[values < stop].tolist()
+
+
+@overload
+def MAD(v: Union[Sequence, numpy.ndarray], axis: None = ...) -> float:
+	...
 
-	p = start
-	while p < stop:
-		v.append(p)
-		p = p + step
 
-	return v
+@overload
+def MAD(v: Union[Sequence, numpy.ndarray], axis: int) -> numpy.ndarray:
+	...
 
 
-def MAD(v: Union[Sequence, numpy.ndarray]) -> float:
+def MAD(v: Union[Sequence, numpy.ndarray], axis: Optional[int] = None) -> Union[float, numpy.ndarray]:
 	"""
 	Median absolute deviation.
 
 	:param v: List of values to calculate the median absolute deviation of.
+	:param axis: The axis of ``v`` along which to calculate the median absolute deviation.
+		If :py:obj:`None` the median absolute deviation of all values is returned.
 
 	:return: median absolute deviation
 
 	:author: Vladimir Likic
+
+	.. versionchanged:: 2.4.0  Added the ``axis`` argument.
 	"""
 
 	if not is_sequence(v):
 		raise TypeError("'v' must be a Sequence")
 
-	m = median(v)
-	m_list = []
-
-	for xi in v:
-		d = math.fabs(xi - m)
-		m_list.append(d)
+	v = numpy.asarray(v, dtype=float)
 
-	mad = median(m_list) / 0.6745
+	m = numpy.median(v, axis=axis, keepdims=True)
+	mad = numpy.median(numpy.abs(v - m), axis=axis) / 0.6745
 
+	if axis is None:
+		return float(mad)
 	return mad
 
 
-def rmsd(list1: Union[Sequence, numpy.ndarray], list2: Union[Sequence, numpy.ndarray]) -> float:
+@overload
+def rmsd(
+		list1: Union[Sequence, numpy.ndarray],
+		list2: Union[Sequence, numpy.ndarray],
+		axis: None = ...,
+		) -> float:
+	...
+
+
+@overload
+def rmsd(
+		list1: Union[Sequence, numpy.ndarray],
+		list2: Union[Sequence, numpy.ndarray],
+		axis: int,
+		) -> numpy.ndarray:
+	...
+
+
+def rmsd(
+		list1: Union[Sequence, numpy.ndarray],
+		list2: Union[Sequence, numpy.ndarray],
+		axis: Optional[int] = None,
+		) -> Union[float, numpy.ndarray]:
 	"""
 	Calculates RMSD for the 2 lists.
 
 	:param list1: First data set
 	:param list2: Second data set
+	:param axis: The axis along which to calculate the RMSD.
+		If :py:obj:`None` the RMSD over all values is returned.
 
 	:return: RMSD value
 
 	:authors: Qiao Wang, Andrew Isaac, Vladimir Likic
+
+	.. versionchanged:: 2.4.0  Added the ``axis`` argument.
 	"""
 
 	if not is_sequence(list1):
@@ -121,23 +164,44 @@ def rmsd(list1: Union[Sequence, numpy.ndarray], list2: Union[Sequence, numpy.nda
 	if not is_sequence(list2):
 		raise TypeError("'list2' must be a Sequence")
 
-	total = 0.0
-	for i in range(len(list1)):
-		total = total + (list1[i] - list2[i])**2
-	_rmsd = math.sqrt(total / len(list1))
+	diff = numpy.asarray(list1, dtype=float) - numpy.asarray(list2, dtype=float)
+	_rmsd = numpy.sqrt(numpy.mean(diff**2, axis=axis))
+
+	if axis is None:
+		return float(_rmsd)
 	return _rmsd
 
 
-def mad_based_outlier(data, thresh: float = 3.5):
+def mad_based_outlier(data, thresh: float = 3.5, axis: Optional[int] = None):
 	"""
 
 	:param data:
 	:param thresh:
+	:param axis: The axis along which to calculate the median and median absolute deviation.
+		If :py:obj:`None` the rows of a 2D ``data`` are treated as points,
+		and their distances from the median of all values are used.
 
 	:author: David Kainer
 	:url: http://stackoverflow.com/questions/22354094/pythonic-way-of-detecting-outliers-in-one-dimensional-observation-data
+
+	.. versionchanged:: 2.4.0
+
+		Added the ``axis`` argument. With an ``axis``, an array of :py:obj:`False` is returned
+		for slices whose median absolute deviation is zero.
 	"""
 
+	if axis is not None:
+		data = numpy.asarray(data, dtype=float)
+		diff = numpy.abs(data - numpy.nanmedian(data, axis=axis, keepdims=True))
+		med_abs_deviation = numpy.nanmedian(diff, axis=axis, keepdims=True)
+		modified_z_score = numpy.divide(
+				0.6745 * diff,
+				med_abs_deviation,
+				out=numpy.zeros_like(diff),
+				where=med_abs_deviation != 0,
+				)
+		return modified_z_score > thresh
+
 	data = numpy.array(data)
 	if len(data.shape) == 1:
 		data = data[:, None]
@@ -151,41 +215,51 @@ def mad_based_outlier(data, thresh: float = 3.5):
 	return modified_z_score > thresh
 
 
-def percentile_based_outlier(data, threshold: int = 95):
+def percentile_based_outlier(data, threshold: int = 95, axis: Optional[int] = None):
 	"""
 
 	:param data:
 	:param threshold:
+	:param axis: The axis along which to calculate the percentiles.
+		If :py:obj:`None` the percentiles of all values are used.
 
 	:author: David Kainer
 	:url: http://stackoverflow.com/questions/22354094/pythonic-way-of-detecting-outliers-in-one-dimensional-observation-data
+
+	.. versionchanged:: 2.4.0
+
+		Added the ``axis`` argument. ``NaN`` values are now correctly excluded when calculating the percentiles.
 	"""
 
-	data = numpy.array(data)
+	data = numpy.asarray(data, dtype=float)
 	diff = (100 - threshold) / 2.0
-	# nanpercentile only works in numpy 1.9 and up
-	# minval, maxval = numpy.nanpercentile(data, [diff, 100 - diff])
-	data = numpy.array(data)
-	minval, maxval = numpy.percentile(numpy.compress(numpy.isnan(data) is False, data), (diff, 100 - diff))
+	minval, maxval = numpy.nanpercentile(data, (diff, 100 - diff), axis=axis, keepdims=True)
 	return (data < minval) | (data > maxval)
 
 
-def median_outliers(data, m: float = 2.5):
+def median_outliers(data, m: float = 2.5, axis: Optional[int] = None):
 	"""
 
 	:param data:
 	:param m:
+	:param axis: The axis along which to calculate the median.
+		If :py:obj:`None` the median of all values is used.
 
 	:author: David Kainer
 	:author: eumiro (https://stackoverflow.com/users/449449/eumiro)
 	:author: Benjamin Bannier (https://stackoverflow.com/users/176922/benjamin-bannier)
 	:url: http://stackoverflow.com/questions/11686720/is-there-a-numpy-builtin-to-reject-outliers-from-a-list
+
+	.. versionchanged:: 2.4.0
+
+		Added the ``axis`` argument. An array of :py:obj:`False` is now returned
+		when the median deviation is zero, rather than a single :py:obj:`False`.
 	"""
 
-	data = numpy.array(data)
-	d = numpy.abs(data - numpy.nanmedian(data))
-	mdev = numpy.nanmedian(d)
-	s = d / mdev if mdev else 0.
+	data = numpy.asarray(data, dtype=float)
+	d = numpy.abs(data - numpy.nanmedian(data, axis=axis, keepdims=True))
+	mdev = numpy.nanmedian(d, axis=axis, keepdims=True)
+	s = numpy.divide(d, mdev, out=numpy.zeros_like(d), where=mdev != 0)
 	return s > m
 
 
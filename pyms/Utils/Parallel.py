@@ -0,0 +1,367 @@
+"""
+Executors for running PyMassSpec calculations in parallel.
+
+Functions which can run in parallel take an optional ``executor`` argument,
+which may be any :class:`concurrent.futures.Executor`.
+This module provides a serial executor, an executor which distributes work to worker processes
+connected over sockets (which may be on other machines), and :func:`~.get_executor`
+to create an executor by name.
+
+.. versionadded:: 2.4.0
+"""
+
+################################################################################
+#                                                                              #
+#    PyMassSpec software for processing of mass-spectrometry data              #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                              #
+#                                                                              #
+#    This program is free software; you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License version 2 as         #
+#    published by the Free Software Foundation.                                #
+#                                                                              #
+#    This program is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of            #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the             #
+#    GNU General Public License for more details.                              #
+#                                                                              #
+#    You should have received a copy of the GNU General Public License         #
+#    along with this program; if not, write to the Free Software               #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.                 #
+#                                                                              #
+################################################################################
+
+# stdlib
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, List, Optional, Tuple
+
+__all__ = ["SerialExecutor", "SocketExecutor", "run_worker", "get_executor"]
+
+Address = Tuple[str, int]
+
+
+class SerialExecutor(Executor):
+	"""
+	An executor which runs each call in the calling thread as soon as it is submitted.
+
+	Passing this executor gives the same results as passing no executor, and is useful
+	for selecting the serial backend with :func:`~.get_executor`.
+	"""
+
+	def submit(self, fn: Callable, *args, **kwargs) -> Future:  # type: ignore
+		"""
+		Calls ``fn(*args, **kwargs)`` and returns a completed :class:`~concurrent.futures.Future`.
+
+		:param fn:
+		"""
+
+		future: Future = Future()
+		future.set_running_or_notify_cancel()
+
+		try:
+			future.set_result(fn(*args, **kwargs))
+		except BaseException as e:
+			future.set_exception(e)
+
+		return future
+
+
+class SocketExecutor(Executor):
+	"""
+	An executor which sends calls to worker processes connected over sockets.
+
+	The executor listens on ``address``, and workers connect to it by calling :func:`~.run_worker`
+	with the executor's :attr:`~.SocketExecutor.address` and :attr:`~.SocketExecutor.authkey`.
+	The workers may be on other machines, provided ``address`` is reachable from them.
+	The functions and their arguments are pickled, so must be importable by the workers.
+
+	:param address: The host and port to listen on. With a port of ``0`` a free port is chosen.
+	:param authkey: The key the workers must use to connect. If :py:obj:`None` a random key is generated.
+	:param local_workers: The number of worker processes to start on this machine.
+	"""
+
+	#: The host and port the executor is listening on.
+	address: Address
+
+	#: The key the workers must use to connect.
+	authkey: bytes
+
+	def __init__(
+			self,
+			address: Address = ("localhost", 0),
+			authkey: Optional[bytes] = None,
+			local_workers: int = 0,
+			):
+
+		if authkey is None:
+			authkey = os.urandom(32)
+
+		self.authkey = authkey
+		self._listener = Listener(address, authkey=authkey)
+		self.address = self._listener.address
+
+		self._tasks: queue.Queue = queue.Queue()
+		self._shutdown = False
+		self._closing = False
+		self._shutdown_lock = threading.Lock()
+		self._threads: List[threading.Thread] = []
+		self._workers_lock = threading.Lock()
+		self._connected_workers = 0
+
+		self._accept_thread = threading.Thread(target=self._accept_workers, daemon=True)
+		self._accept_thread.start()
+
+		self._local_workers = []
+		for _ in range(local_workers):
+			process = multiprocessing.Process(target=run_worker, args=(self.address, self.authkey), daemon=True)
+			process.start()
+			self._local_workers.append(process)
+
+	def _accept_workers(self) -> None:
+		"""
+		Accepts connections from workers until the executor is shut down.
+		"""
+
+		while True:
+			try:
+				connection = self._listener.accept()
+			except (multiprocessing.AuthenticationError, EOFError, ConnectionError):
+				# The worker failed to authenticate, or disconnected during the handshake.
+				continue
+			except OSError:
+				# The listener was closed
+				return
+
+			if self._closing:
+				connection.close()
+				return
+
+			thread = threading.Thread(target=self._serve_worker, args=(connection, ), daemon=True)
+			thread.start()
+			self._threads.append(thread)
+
+	def _serve_worker(self, connection: Connection) -> None:
+		"""
+		Sends tasks to a worker, one at a time, until the executor is shut down or the worker disconnects.
+
+		If the last connected worker disconnects the calls which have not yet started are failed,
+		as there is no worker left to run them.
+
+		:param connection: The connection to the worker.
+		"""
+
+		with self._workers_lock:
+			self._connected_workers += 1
+
+		try:
+			with connection:
+				self._send_tasks(connection)
+		finally:
+			with self._workers_lock:
+				self._connected_workers -= 1
+				if not self._connected_workers:
+					self._fail_pending(ConnectionError("All workers have disconnected"))
+
+	def _send_tasks(self, connection: Connection) -> None:
+		"""
+		Sends tasks to a worker, one at a time, until the executor is shut down or the worker disconnects.
+
+		:param connection: The connection to the worker.
+		"""
+
+		while True:
+			task = self._tasks.get()
+
+			if task is None:
+				# Pass the sentinel on to the other workers
+				self._tasks.put(None)
+				try:
+					connection.send(None)
+				except OSError:
+					pass
+				return
+
+			future, fn, args, kwargs = task
+
+			if not future.set_running_or_notify_cancel():
+				continue
+
+			try:
+				connection.send((fn, args, kwargs))
+			except OSError as e:
+				future.set_exception(ConnectionError(f"Lost connection to worker: {e}"))
+				return
+			except Exception as e:
+				# The call could not be pickled. Nothing was sent, so the worker can take the next task.
+				future.set_exception(e)
+				continue
+
+			try:
+				success, result = connection.recv()
+			except (OSError, EOFError) as e:
+				future.set_exception(ConnectionError(f"Lost connection to worker: {e}"))
+				return
+			except Exception as e:
+				# The result could not be unpickled. The whole message was read, so the worker can continue.
+				future.set_exception(e)
+				continue
+
+			if success:
+				future.set_result(result)
+			else:
+				future.set_exception(result)
+
+	def _fail_pending(self, exception: BaseException) -> None:
+		"""
+		Sets ``exception`` on the calls which are waiting for a worker.
+
+		:param exception:
+		"""
+
+		shutdown = False
+
+		while True:
+			try:
+				task = self._tasks.get_nowait()
+			except queue.Empty:
+				break
+
+			if task is None:
+				shutdown = True
+				continue
+
+			future = task[0]
+			if future.set_running_or_notify_cancel():
+				future.set_exception(exception)
+
+		if shutdown:
+			self._tasks.put(None)
+
+	def submit(self, fn: Callable, *args, **kwargs) -> Future:  # type: ignore
+		"""
+		Schedules ``fn(*args, **kwargs)`` to be run by the next available worker.
+
+		:param fn:
+		"""
+
+		with self._shutdown_lock:
+			if self._shutdown:
+				raise RuntimeError("cannot schedule new futures after shutdown")
+
+			future: Future = Future()
+			self._tasks.put((future, fn, args, kwargs))
+
+			return future
+
+	def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+		"""
+		Stops the workers once the submitted calls have finished, and stops listening for new workers.
+
+		:param wait: Whether to wait for the submitted calls to finish.
+		:param cancel_futures: Whether to cancel the calls which have not been sent to a worker yet.
+		"""
+
+		with self._shutdown_lock:
+			if self._shutdown:
+				return
+
+			self._shutdown = True
+
+			if cancel_futures:
+				while True:
+					try:
+						task = self._tasks.get_nowait()
+					except queue.Empty:
+						break
+
+					if task is not None:
+						task[0].cancel()
+
+			self._tasks.put(None)
+
+		if wait:
+			for process in self._local_workers:
+				process.join()
+
+			for thread in list(self._threads):
+				thread.join()
+
+		# Wake the thread waiting for new workers, then stop listening.
+		self._closing = True
+		try:
+			Client(self.address, authkey=self.authkey).close()
+		except OSError:
+			pass
+
+		self._accept_thread.join()
+		self._listener.close()
+
+
+def run_worker(address: Address, authkey: bytes) -> None:
+	"""
+	Connects to a :class:`~.SocketExecutor` and runs the calls it sends until it is shut down.
+
+	To add a worker on another machine, run:
+
+	.. code-block:: python
+
+		from pyms.Utils.Parallel import run_worker
+		run_worker((host, port), authkey)
+
+	:param address: The executor's :attr:`~.SocketExecutor.address`.
+	:param authkey: The executor's :attr:`~.SocketExecutor.authkey`.
+	"""
+
+	with Client(address, authkey=authkey) as connection:
+		while True:
+			try:
+				task = connection.recv()
+			except EOFError:
+				return
+
+			if task is None:
+				return
+
+			fn, args, kwargs = task
+
+			try:
+				result: Any = (True, fn(*args, **kwargs))
+			except Exception as e:
+				result = (False, e)
+
+			try:
+				connection.send(result)
+			except Exception as e:
+				# The result or exception could not be pickled.
+				connection.send((False, RuntimeError(f"Could not return the result from the worker: {e!r}")))
+
+
+def get_executor(backend: str = "serial", max_workers: Optional[int] = None) -> Executor:
+	"""
+	Returns an executor for the given backend.
+
+	:param backend: One of ``'serial'``, ``'threads'``, ``'processes'`` or ``'sockets'``.
+		The ``'sockets'`` backend returns a :class:`~.SocketExecutor` with ``max_workers`` local workers,
+		to which workers on other machines may also connect.
+	:param max_workers: The number of workers. If :py:obj:`None` the number of CPUs is used.
+	"""
+
+	if not isinstance(backend, str):
+		raise TypeError("'backend' must be a string")
+
+	if backend == "serial":
+		return SerialExecutor()
+	elif backend == "threads":
+		return ThreadPoolExecutor(max_workers)
+	elif backend == "processes":
+		return ProcessPoolExecutor(max_workers)
+	elif backend == "sockets":
+		if max_workers is None:
+			max_workers = os.cpu_count() or 1
+		return SocketExecutor(local_workers=max_workers)
+	else:
+		raise ValueError(f"Unknown backend {backend!r}")
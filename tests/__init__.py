@@ -24,15 +24,12 @@
 
 # TODO: GCMS.info(), GCMS.write(), GCMS.write_intensities_stream()
 
-# With mpi4py installed
-
 # diff
 
 # TODO: sum_maxima, get_maxima_indices, get_maxima_list, get_maxima_list_reduced
 # TODO: tophat with struct=None
 
 # Test permutations:
-# 	with and without mpi4py
 # 	with pycluster
 #   with biopython
 #   neither pycluster or biopython
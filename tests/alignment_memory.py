@@ -0,0 +1,101 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+"""
+Compares the memory used to create alignments from experiments and merge them
+with :func:`~pyms.DPA.PairwiseAlignment.align_with_tree` when the peaks are shared,
+with copying the peaks as before version 2.4.0, where each alignment copied
+the experiment's peaks and :func:`~pyms.DPA.PairwiseAlignment.align_with_tree`
+copied the alignments again.
+"""  # noqa: D400
+
+# stdlib
+import contextlib
+import copy
+import io
+import os
+import tracemalloc
+
+# 3rd party
+import numpy  # type: ignore
+
+# this package
+from pyms.BillerBiemann import BillerBiemann, num_ions_threshold, rel_threshold
+from pyms.DPA.Alignment import exprl2alignment
+from pyms.DPA.PairwiseAlignment import PairwiseAlignment, align_with_tree
+from pyms.Experiment import Experiment
+from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import build_intensity_matrix_i
+from pyms.Peak.Class import Peak
+from pyms.Spectrum import MassSpectrum
+
+N_EXPERIMENTS = 20
+
+data = JCAMP_reader(os.path.join("data", "ELEY_1_SUBTRACT.JDX"))
+im_i = build_intensity_matrix_i(data)
+peak_list = num_ions_threshold(rel_threshold(BillerBiemann(im_i, points=9, scans=2), 2), 3, 3000)
+
+for peak in peak_list:
+	peak.crop_mass(50, 400)
+
+# Experiments with the same peaks, with some variation in retention time and intensity
+rng = numpy.random.default_rng(0)
+expr_list = []
+
+for expr_idx in range(N_EXPERIMENTS):
+	peaks = []
+
+	for peak in peak_list:
+		ms = peak.mass_spectrum
+		intensities = ms.intensity_array * rng.uniform(0.8, 1.2)
+		peaks.append(Peak(peak.rt + rng.normal(scale=1.0), MassSpectrum(ms.mass_list, intensities)))
+
+	expr_list.append(Experiment(f"expr_{expr_idx}", peaks))
+
+
+def measure(copy_peaks: bool):
+	tracemalloc.start()
+
+	alignments = exprl2alignment(expr_list, copy_peaks=copy_peaks)
+	alignments_size, _ = tracemalloc.get_traced_memory()
+
+	with contextlib.redirect_stdout(io.StringIO()):
+		T = PairwiseAlignment(alignments, 2.5, 0.3)
+
+		if copy_peaks:
+			# align_with_tree() copied the alignments
+			T.alignments = copy.deepcopy(T.alignments)
+
+		final = align_with_tree(T)
+
+	final_size, peak_size = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	label = "copying" if copy_peaks else "sharing"
+	print(
+			f"{label:>10}: alignments {alignments_size / 2**20:.1f} MiB, "
+			f"after align_with_tree {final_size / 2**20:.1f} MiB, peak {peak_size / 2**20:.1f} MiB"
+			)
+
+	del final
+
+
+print(f"{N_EXPERIMENTS} experiments of {len(peak_list)} peaks")
+measure(copy_peaks=True)
+measure(copy_peaks=False)
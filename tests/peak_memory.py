@@ -0,0 +1,75 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+"""
+Compares the memory use and construction time of :class:`~pyms.Peak.Class.Peak`
+with a peak using the instance layout from before version 2.4.0,
+where the attributes were stored in an instance dictionary and
+the UID was calculated on construction.
+"""  # noqa: D400
+
+# stdlib
+import os
+import tracemalloc
+from timeit import timeit
+
+# this package
+from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import build_intensity_matrix_i
+from pyms.Peak.Class import Peak
+
+N_PEAKS = 100_000
+
+data = JCAMP_reader(os.path.join("data", "ELEY_1_SUBTRACT.JDX"))
+im_i = build_intensity_matrix_i(data)
+scan_i = im_i.get_index_at_time(31.17 * 60.0)
+ms = im_i.get_ms_at_index(scan_i)
+
+
+class DictPeak:
+	"""
+	A peak with the same attributes as :class:`~pyms.Peak.Class.Peak`, stored in an instance dictionary.
+	"""
+
+	def __init__(self, rt: float, ms, outlier: bool = False):
+		self._mass_spectrum = ms
+		self.is_outlier = outlier
+		self._rt = float(rt)
+		self._pt_bounds = None
+		self._area = None
+		self._ion_areas = {}
+
+		# The UID was calculated on construction
+		Peak.make_UID(self)  # type: ignore
+
+
+def measure(peak_class):
+	tracemalloc.start()
+	peaks = [peak_class(float(rt), ms) for rt in range(N_PEAKS)]
+	size, _ = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	del peaks
+
+	seconds = timeit(lambda: peak_class(12.34, ms), number=N_PEAKS)
+
+	print(f"{peak_class.__name__:>10}: {size / N_PEAKS:.0f} bytes/peak, {1e6 * seconds / N_PEAKS:.2f} µs/peak")
+
+
+measure(DictPeak)
+measure(Peak)
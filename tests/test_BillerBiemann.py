@@ -20,27 +20,36 @@
 
 # stdlib
 import copy
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # 3rd party
 import numpy  # type: ignore
 import pytest
 
 # this package
+import pyms.BillerBiemann
 from pyms.BillerBiemann import (
 		BillerBiemann,
 		get_maxima_indices,
 		get_maxima_list,
 		get_maxima_list_reduced,
+		get_maxima_mask,
+		StreamingBillerBiemann,
 		get_maxima_matrix,
+		iter_scan_blocks,
 		num_ions_threshold,
 		rel_threshold,
 		sum_maxima
 		)
+from pyms.IntensityMatrix import IntensityMatrix
 from pyms.IonChromatogram import IonChromatogram
 from pyms.Noise.Analysis import window_analyzer
-from pyms.Noise.SavitzkyGolay import savitzky_golay
+from pyms.Noise.SavitzkyGolay import savitzky_golay, savitzky_golay_im
+from pyms.Noise.Streaming import StreamingPipeline, StreamingSavitzkyGolay, StreamingTopHat
 from pyms.Peak.Class import Peak
-from pyms.TopHat import tophat
+from pyms.Peak.List.Table import PeakTable
+from pyms.Spectrum import MassSpectrum
+from pyms.TopHat import tophat, tophat_im
 from tests.constants import *
 
 
@@ -74,6 +83,25 @@ class TestBillerBiemann:
 
 		assert len(peak_list2) <= len(peak_list)
 
+	@pytest.mark.parametrize("executor_cls", [ThreadPoolExecutor, ProcessPoolExecutor])
+	def test_parallel(self, im_i, executor_cls, monkeypatch):
+		# Ensure the run is split into several segments
+		monkeypatch.setattr(pyms.BillerBiemann, "_SEGMENT_SIZE", 64)
+
+		with executor_cls(max_workers=2) as executor:
+			for points, scans in [(3, 1), (9, 2), (5, 3)]:
+				expected = get_maxima_matrix(im_i, points, scans)
+				result = get_maxima_matrix(im_i, points, scans, executor=executor)
+				assert numpy.array_equal(result, expected)
+
+			peak_list = BillerBiemann(im_i, points=9, scans=2, executor=executor)
+
+		expected_peak_list = BillerBiemann(im_i, points=9, scans=2)
+		assert len(peak_list) == len(expected_peak_list)
+		for peak, expected_peak in zip(peak_list, expected_peak_list):
+			assert peak.rt == expected_peak.rt
+			assert peak.mass_spectrum == expected_peak.mass_spectrum
+
 	@pytest.mark.parametrize("obj", [test_string, *test_numbers, *test_sequences, test_dict])
 	def test_im_errors(self, obj):
 		with pytest.raises(TypeError):
@@ -90,6 +118,143 @@ class TestBillerBiemann:
 			BillerBiemann(im_i, points=obj)
 
 
+def _assert_same_peaks(peak_list, expected_peak_list):
+	assert len(peak_list) == len(expected_peak_list)
+	for peak, expected_peak in zip(peak_list, expected_peak_list):
+		assert peak.rt == expected_peak.rt
+		assert peak.bounds == expected_peak.bounds
+		assert peak.mass_spectrum == expected_peak.mass_spectrum
+
+
+@pytest.fixture(scope="module")
+def im_bc(im_i):
+	return tophat_im(savitzky_golay_im(im_i), struct="1.5m")
+
+
+class TestStreamingBillerBiemann:
+
+	@pytest.mark.parametrize("points, scans", [(3, 1), (9, 2), (5, 3)])
+	@pytest.mark.parametrize("block_size", [1, 17, 256])
+	def test_streaming(self, im_bc, points, scans, block_size):
+		detector = StreamingBillerBiemann(im_bc.mass_list, points, scans)
+		peak_list = detector.process(iter_scan_blocks(im_bc.intensity_array, im_bc.time_list, block_size))
+
+		_assert_same_peaks(peak_list, BillerBiemann(im_bc, points, scans))
+
+	def test_preprocess(self, im_i, im_bc):
+		time_step = im_i.get_ic_at_index(0).time_step
+		pipeline = StreamingPipeline(StreamingSavitzkyGolay(), StreamingTopHat("1.5m", time_step=time_step))
+		detector = StreamingBillerBiemann(im_i.mass_list, points=9, scans=2, preprocess=pipeline)
+
+		peak_list = []
+		for time_list, scans in iter_scan_blocks(im_i.intensity_array, im_i.time_list, 100):
+			peak_list.extend(detector.push(time_list, scans))
+		# Peaks are returned as soon as they are complete
+		assert len(peak_list) > 750
+		peak_list.extend(detector.flush())
+
+		assert len(peak_list) == 805
+		_assert_same_peaks(peak_list, BillerBiemann(im_bc, points=9, scans=2))
+
+	def test_memmap(self, im_i, tmp_path):
+		numpy.save(tmp_path / "intensities.npy", im_i.intensity_array)
+		intensity_array = numpy.load(tmp_path / "intensities.npy", mmap_mode='r')
+
+		detector = StreamingBillerBiemann(im_i.mass_list, points=9, scans=2)
+		peak_list = detector.process(iter_scan_blocks(intensity_array, im_i.time_list))
+
+		_assert_same_peaks(peak_list, BillerBiemann(im_i, points=9, scans=2))
+
+	@staticmethod
+	def _plateau_run():
+		n_scans = 3000
+		time_list = [float(scan) for scan in range(n_scans)]
+		mass_list = [50.0, 51.0, 52.0]
+
+		rows = numpy.arange(n_scans)
+		intensities = numpy.zeros((n_scans, 3))
+		for centre in range(50, n_scans, 100):
+			intensities[:, 0] += 100 * numpy.exp(-0.5 * ((rows - centre) / 3)**2)
+		# An ion which stays at the same intensity for most of the run
+		intensities[200:2600, 1] = 50
+		intensities[:, 2] = numpy.random.default_rng(0).integers(0, 5, n_scans)
+
+		return time_list, mass_list, intensities
+
+	@staticmethod
+	def _push_blocks(detector, time_list, intensities):
+		# Returns the peaks, and the largest number of scans between
+		# the last scan pushed and the last peak returned.
+		peak_list = []
+		max_lag = 0
+		for time_list_block, scans in iter_scan_blocks(intensities, time_list, 100):
+			peak_list.extend(detector.push(time_list_block, scans))
+			max_lag = max(max_lag, time_list_block[-1] - peak_list[-1].rt)
+		peak_list.extend(detector.flush())
+
+		return peak_list, max_lag
+
+	def test_long_plateau(self):
+		time_list, mass_list, intensities = self._plateau_run()
+
+		detector = StreamingBillerBiemann(mass_list, points=9, scans=2, max_plateau=100)
+		peak_list, max_lag = self._push_blocks(detector, time_list, intensities)
+
+		# Peaks are returned while the plateau is open
+		assert max_lag <= 100 + 100 + 100 + 9
+
+		# The plateau is not an apex, but the other peaks are unchanged
+		without_plateau = intensities.copy()
+		without_plateau[:, 1] = 0
+		im = IntensityMatrix(time_list, mass_list, without_plateau)
+		_assert_same_peaks(peak_list, BillerBiemann(im, points=9, scans=2))
+
+	def test_unlimited_plateau(self):
+		time_list, mass_list, intensities = self._plateau_run()
+
+		detector = StreamingBillerBiemann(mass_list, points=9, scans=2, max_plateau=None)
+		peak_list, max_lag = self._push_blocks(detector, time_list, intensities)
+
+		# No peaks after the start of the plateau are returned until it ends
+		assert max_lag >= 2600 - 200
+
+		im = IntensityMatrix(time_list, mass_list, intensities)
+		_assert_same_peaks(peak_list, BillerBiemann(im, points=9, scans=2))
+
+	def test_errors(self, im_i):
+		with pytest.raises(TypeError):
+			StreamingBillerBiemann(test_string)
+
+		with pytest.raises(TypeError):
+			StreamingBillerBiemann(im_i.mass_list, points=test_float)
+
+		with pytest.raises(TypeError):
+			StreamingBillerBiemann(im_i.mass_list, scans=test_string)
+
+		with pytest.raises(TypeError):
+			StreamingBillerBiemann(im_i.mass_list, preprocess=test_dict)
+
+		with pytest.raises(ValueError):
+			StreamingBillerBiemann(im_i.mass_list, points=1)
+
+		with pytest.raises(TypeError):
+			StreamingBillerBiemann(im_i.mass_list, max_plateau=test_float)
+
+		with pytest.raises(ValueError):
+			StreamingBillerBiemann(im_i.mass_list, max_plateau=0)
+
+		detector = StreamingBillerBiemann(im_i.mass_list)
+
+		with pytest.raises(ValueError):
+			detector.push([1.0, 2.0], im_i.intensity_array[:1])
+
+		with pytest.raises(ValueError):
+			detector.push([1.0], im_i.intensity_array[:1, :10])
+
+		with pytest.raises(ValueError):
+			next(iter_scan_blocks(im_i.intensity_array, im_i.time_list[:10]))
+
+
 class Test_rel_threshold:
 
 	def test_rel_threshold(self, peak_list):
@@ -107,6 +272,29 @@ class Test_rel_threshold:
 		with pytest.raises(ValueError):
 			rel_threshold(peak_list, percent=0)
 
+	def test_values(self):
+		peak_a = Peak(10.0, MassSpectrum([50, 51, 52], [100, 1, 50]))
+		peak_b = Peak(20.0, MassSpectrum([50, 51], [4, 20]))
+		peak_a.set_ion_area(50, 1000)
+
+		pl = rel_threshold([peak_a, peak_b], 25)
+		assert pl[0].mass_spectrum.intensity_list == [100, 0, 50]
+		assert pl[1].mass_spectrum.intensity_list == [0, 20]
+		assert pl[0].rt == 10.0
+		assert pl[0].get_ion_area(50) == 1000
+
+		# The original peaks are unchanged
+		assert pl[0] is not peak_a
+		assert peak_a.mass_spectrum.intensity_list == [100, 1, 50]
+		pl[0].set_ion_area(51, 10)
+		assert peak_a.get_ion_area(51) is None
+
+		pl = rel_threshold([peak_a, peak_b], 25, copy_peaks=False)
+		assert pl[0] is peak_a
+		assert peak_a.mass_spectrum.intensity_list == [100, 0, 50]
+
+		assert rel_threshold([]) == []
+
 	@pytest.mark.parametrize("obj", [test_string, *test_sequences, test_dict, test_int])
 	def test_peak_list_errors(self, obj):
 		with pytest.raises(TypeError):
@@ -156,6 +344,49 @@ class Test_num_ions_threshold:
 		assert len(peak_list) in (87, 88)
 		assert len(peak_list) <= len(peak_list)
 
+	def test_values(self):
+		peak_a = Peak(10.0, MassSpectrum([50, 51, 52], [100, 1, 50]))
+		peak_b = Peak(20.0, MassSpectrum([50, 51], [4, 20]))
+
+		pl = num_ions_threshold([peak_a, peak_b], 2, 20)
+		assert pl == [peak_a]
+		assert pl[0] is not peak_a
+
+		pl = num_ions_threshold([peak_a, peak_b], 1, 20, copy_peaks=False)
+		assert pl[0] is peak_a
+		assert pl[1] is peak_b
+
+		assert num_ions_threshold([peak_a, peak_b], 3, 0) == [peak_a]
+
+	def test_copies(self):
+		peak_a = Peak(10.0, MassSpectrum([50, 51, 52], [100, 1, 50]))
+		peak_a.set_ion_area(50, 1000)
+
+		copied = num_ions_threshold([peak_a], 2, 20)[0]
+		assert copied == peak_a
+		assert copied.get_ion_area(50) == 1000
+
+		# Changing the copy does not change the original peak
+		copied.set_ion_area(51, 10)
+		copied.null_mass(50)
+		with pytest.warns(Warning, match="peak mass spectrum contains < 10 points"):
+			copied.crop_mass(51, 52)
+		assert peak_a.get_ion_area(51) is None
+		assert peak_a.mass_spectrum.mass_list == [50, 51, 52]
+		assert peak_a.mass_spectrum.intensity_list == [100, 1, 50]
+
+	def test_return_mask(self, peak_list):
+		pl = rel_threshold(peak_list, 2)
+		mask = num_ions_threshold(pl, 3, 10000, return_mask=True)
+
+		assert isinstance(mask, numpy.ndarray)
+		assert mask.dtype == bool
+		assert mask.sum() == 215
+		assert [peak for peak, keep in zip(pl, mask) if keep] == num_ions_threshold(pl, 3, 10000)
+
+		table = PeakTable.from_peak_list(pl)
+		assert numpy.array_equal(num_ions_threshold(table, 3, 10000, return_mask=True), mask)
+
 	@pytest.mark.parametrize("obj", [test_string, *test_numbers, *test_sequences, test_dict])
 	def test_peak_list_errors(self, obj):
 		with pytest.raises(TypeError):
@@ -197,10 +428,23 @@ class Test_sum_maxima:
 
 class Test_get_maxima_indices:
 
-	@pytest.mark.skip(reason="TODO")
 	def test_get_maxima_indices(self):
-		# TODO: main test
-		pass
+		# A trivial set of data with two clear peaks
+		data = [1, 2, 3, 4, 5, 4, 3, 2, 1, 2, 3, 4, 5, 6, 5, 4, 3, 2, 1]
+		assert get_maxima_indices(data) == [4, 13]
+		assert get_maxima_indices(numpy.array(data)) == [4, 13]
+		assert get_maxima_indices(data, points=10) == [13]
+
+		# plateaus
+		assert get_maxima_indices([0, 1, 3, 3, 3, 3, 1, 0]) == [3]
+		assert get_maxima_indices([0, 3, 3, 1, 0]) == [1]
+		assert get_maxima_indices([3, 3, 3, 1, 0]) == []
+		assert get_maxima_indices([0, 1, 3, 3, 4, 1, 0]) == [4]
+
+		assert get_maxima_indices([1, 2]) == []
+
+		with pytest.raises(ValueError):
+			get_maxima_indices(data, points=1)
 
 	@pytest.mark.parametrize("obj", [test_string, *test_numbers, test_list_strs, test_dict])
 	def test_ion_intensities_errors(self, obj):
@@ -213,6 +457,27 @@ class Test_get_maxima_indices:
 			get_maxima_indices(test_list_ints, points=obj)
 
 
+class Test_get_maxima_mask:
+
+	def test_get_maxima_mask(self, im):
+		intensity_array = im.intensity_array
+		for points in [3, 4, 9]:
+			maxima_mask = get_maxima_mask(intensity_array, points)
+			assert maxima_mask.shape == intensity_array.shape
+			assert maxima_mask.dtype == bool
+
+			for col in [0, 5, 50, 100]:
+				expected = get_maxima_indices(intensity_array[:, col], points)
+				assert numpy.flatnonzero(maxima_mask[:, col]).tolist() == expected
+
+	def test_errors(self, im):
+		with pytest.raises(ValueError):
+			get_maxima_mask(numpy.arange(10))
+
+		with pytest.raises(TypeError):
+			get_maxima_mask(im.intensity_array, points=test_float)  # type: ignore
+
+
 class Test_get_maxima_list:
 
 	def test_get_maxima_list(self, tic):
@@ -274,6 +539,26 @@ class Test_get_maxima_matrix:
 		assert isinstance(maxima_matrix, numpy.ndarray)
 		# TODO: value check
 
+	def test_consolidation(self):
+		im = IntensityMatrix(
+				list(range(10)),
+				[50, 51],
+				[[0, 0], [1, 0], [5, 1], [1, 6], [0, 1], [0, 0], [0, 0], [0, 0], [0, 0], [0, 0]],
+				)
+
+		expected = numpy.zeros((10, 2))
+		expected[2, 0] = 5
+		expected[3, 1] = 6
+		assert numpy.array_equal(get_maxima_matrix(im), expected)
+
+		# The data in scan 2 is moved into scan 3, which has the higher TIC
+		expected = numpy.zeros((10, 2))
+		expected[3] = [5, 6]
+		assert numpy.array_equal(get_maxima_matrix(im, scans=2), expected)
+		assert numpy.array_equal(get_maxima_matrix(im, scans=3), expected)
+
+		assert sum_maxima(im, scans=3).intensity_array.tolist() == [0, 5, 11, 11, 6, 0, 0, 0, 0, 0]
+
 	@pytest.mark.parametrize("obj", [test_string, *test_numbers, *test_sequences, test_dict])
 	def test_im_errors(self, obj):
 		with pytest.raises(TypeError):
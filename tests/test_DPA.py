@@ -19,11 +19,13 @@
 #############################################################################
 
 # stdlib
+import copy
 import csv
 import math
 import operator
 import pathlib
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # 3rd party
 import numpy  # type: ignore
@@ -32,16 +34,28 @@ from pytest_regressions.file_regression import FileRegressionFixture
 
 # this package
 from pyms.BillerBiemann import BillerBiemann, num_ions_threshold, rel_threshold
-from pyms.DPA.Alignment import Alignment, exprl2alignment
-from pyms.DPA.PairwiseAlignment import PairwiseAlignment, align_with_tree
+from pyms.DPA.Alignment import Alignment, PositionAggregates, exprl2alignment
+from pyms.DPA.PairwiseAlignment import (
+		PairwiseAlignment,
+		add_experiments,
+		align,
+		align_with_tree,
+		dp,
+		position_similarity,
+		score_matrix
+		)
+from pyms.DPA.StarAlignment import align_to_reference, build_reference
 from pyms.Experiment import Experiment, load_expr
 from pyms.GCMS.IO.JCAMP import JCAMP_reader
 from pyms.IntensityMatrix import build_intensity_matrix_i
 from pyms.Noise.SavitzkyGolay import savitzky_golay
+from pyms.Peak.Class import Peak
 from pyms.Peak.Function import peak_sum_area, peak_top_ion_areas
 from pyms.Peak.List.Function import composite_peak
 from pyms.Peak.List.IO import store_peaks
+from pyms.Spectrum import MassSpectrum
 from pyms.TopHat import tophat
+from pyms.Utils.Parallel import SocketExecutor
 from pyms.Utils.Utils import is_number
 
 # this package
@@ -148,6 +162,194 @@ def T1(F1):
 	return T1
 
 
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_parallel_sim_matrix(F1, T1, executor_class):
+	progress = []
+
+	with executor_class(max_workers=2) as executor:
+		T2 = PairwiseAlignment(F1, Dw, Gw, executor=executor, progress=lambda *args: progress.append(args))
+
+	assert (T2.sim_matrix == T1.sim_matrix).all()
+	assert [(node.left, node.right) for node in T2.tree[:]] == [(node.left, node.right) for node in T1.tree[:]]
+
+	total_n = len(F1) * (len(F1) - 1) // 2
+	assert progress[-1] == (total_n, total_n)
+	assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+
+
+def test_sim_matrix_progress(F1, T1):
+	progress = []
+	T2 = PairwiseAlignment(F1[:3], Dw, Gw, progress=lambda *args: progress.append(args))
+
+	assert progress == [(1, 3), (2, 3), (3, 3)]
+	assert (T2.sim_matrix == T1.sim_matrix[:3, :3]).all()
+
+
+def test_cached_sim_matrix(F1, T1):
+	progress = []
+	T2 = PairwiseAlignment(F1, Dw, Gw, progress=lambda *args: progress.append(args), sim_matrix=T1.sim_matrix[:3, :3])
+
+	# Only the pairs including the last two alignments are aligned
+	assert progress[-1] == (7, 7)
+	assert (T2.sim_matrix == T1.sim_matrix).all()
+	assert [(node.left, node.right) for node in T2.tree[:]] == [(node.left, node.right) for node in T1.tree[:]]
+
+	with pytest.raises(ValueError):
+		PairwiseAlignment(F1, Dw, Gw, sim_matrix=T1.sim_matrix[:3, :2])
+	with pytest.raises(ValueError):
+		PairwiseAlignment(F1[:3], Dw, Gw, sim_matrix=T1.sim_matrix)
+
+
+def test_alignment_shares_peaks(expr_list):
+	alignment = Alignment(expr_list[0])
+	assert all(a is b for a, b in zip(alignment.peak_lists[0], expr_list[0].peak_list))
+	assert alignment.peak_lists[0] is not expr_list[0].peak_list
+
+	alignment = Alignment(expr_list[0], copy_peaks=True)
+	assert len(alignment) == len(expr_list[0].peak_list)
+	assert not any(a is b for a, b in zip(alignment.peak_lists[0], expr_list[0].peak_list))
+
+
+def test_align_with_tree_leaves_alignments(F1, T1):
+	lengths = [len(alignment) for alignment in T1.alignments]
+
+	final = align_with_tree(T1, min_peaks=5)
+
+	assert [len(alignment) for alignment in T1.alignments] == lengths
+	# The merged alignment shares the peak lists of the alignments
+	input_lists = [alignment.peak_lists[0] for alignment in T1.alignments]
+	assert all(any(peaks is other for other in input_lists) for peaks in final.peak_lists)
+
+
+@pytest.fixture(scope="module")
+def jittered_exprs():
+	# Experiments with the same compounds at slightly different retention times
+	rng = numpy.random.default_rng(2)
+	mass_list = list(range(50, 100))
+	base_rts = numpy.sort(rng.uniform(400.0, 1200.0, 40))
+	base_spectra = rng.uniform(0.0, 1000.0, (40, len(mass_list)))
+
+	exprs = []
+	for expr_idx in range(9):
+		peaks = [
+				Peak(float(rt), MassSpectrum(mass_list, spectrum * rng.uniform(0.5, 2.0)))
+				for rt, spectrum, keep in zip(base_rts + rng.normal(0.0, 1.0, 40), base_spectra, rng.random(40))
+				if keep > 0.2
+				]
+		exprs.append(Experiment(f"expr_{expr_idx}", peaks))
+
+	return exprs
+
+
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+@pytest.mark.parametrize("jittered", [False, True])
+def test_align_with_tree_executor(T1, jittered_exprs, executor_class, jittered):
+	if jittered:
+		T1 = PairwiseAlignment(exprl2alignment(jittered_exprs), Dw, Gw)
+
+	serial = align_with_tree(T1, min_peaks=2)
+
+	with executor_class(max_workers=2) as executor:
+		parallel = align_with_tree(T1, min_peaks=2, executor=executor)
+
+	# The merges give identical results however they are run
+	assert parallel.expr_code == serial.expr_code
+	assert numpy.array_equal(parallel.index, serial.index)
+	assert parallel.similarity == serial.similarity
+
+	for field in PositionAggregates._fields:
+		assert numpy.array_equal(getattr(parallel.aggregates, field), getattr(serial.aggregates, field))
+
+
+def test_align_to_reference(expr_list):
+	reference = build_reference(expr_list, Dw, Gw, n_experiments=3)
+	assert sorted(reference.expr_code) == [expr_list[0].expr_code, expr_list[2].expr_code, expr_list[4].expr_code]
+
+	alignment = align_to_reference(expr_list, Dw, Gw, reference=reference)
+	assert alignment.expr_code == [expr.expr_code for expr in expr_list]
+
+	# Each peak of each experiment is in exactly one position
+	for expr_idx, expr in enumerate(expr_list):
+		peak_idx = alignment.index[:, expr_idx]
+		assert sorted(peak_idx[peak_idx >= 0]) == list(range(len(expr.peak_list)))
+
+	assert (numpy.diff(alignment.aggregates.rt_mean) >= 0).all()
+
+	with ThreadPoolExecutor(max_workers=2) as executor:
+		parallel = align_to_reference(expr_list, Dw, Gw, reference=reference, executor=executor)
+
+	assert numpy.array_equal(parallel.index, alignment.index)
+
+	filtered = align_to_reference(expr_list, Dw, Gw, reference=reference, min_peaks=5)
+	assert 0 < len(filtered) < len(alignment)
+	assert ((filtered.index >= 0).sum(axis=1) == 5).all()
+
+
+@pytest.mark.parametrize("obj", [test_string, test_int, *test_sequences, test_dict])
+def test_align_to_reference_errors(expr_list, obj):
+	with pytest.raises(TypeError):
+		align_to_reference(obj, Dw, Gw, reference=Alignment(expr_list[0]))
+	with pytest.raises(TypeError):
+		align_to_reference(expr_list, obj, Gw, reference=Alignment(expr_list[0]))
+	with pytest.raises(TypeError):
+		align_to_reference(expr_list, Dw, obj, reference=Alignment(expr_list[0]))
+	with pytest.raises(TypeError):
+		align_to_reference(expr_list, Dw, Gw, reference=obj)
+	with pytest.raises(TypeError):
+		build_reference(obj, Dw, Gw)
+	with pytest.raises(TypeError):
+		build_reference(expr_list, obj, Gw, n_experiments=1)
+	with pytest.raises(TypeError):
+		build_reference(expr_list, Dw, obj, n_experiments=1)
+
+
+@pytest.mark.parametrize("n_experiments", [0, -1])
+def test_build_reference_n_experiments(expr_list, n_experiments):
+	with pytest.raises(ValueError, match="'n_experiments' must be at least 1"):
+		build_reference(expr_list, Dw, Gw, n_experiments=n_experiments)
+
+	with pytest.raises(TypeError, match="'n_experiments' must be an integer"):
+		build_reference(expr_list, Dw, Gw, n_experiments=test_float)  # type: ignore
+
+
+def test_add_experiments(expr_list):
+	existing = align_with_tree(PairwiseAlignment(exprl2alignment(expr_list[:3]), Dw, Gw))
+	index = existing.index.copy()
+
+	alignment = add_experiments(existing, expr_list[3:], Dw, Gw)
+	assert alignment.expr_code[:3] == existing.expr_code
+	assert sorted(alignment.expr_code[3:]) == sorted(expr.expr_code for expr in expr_list[3:])
+	assert numpy.array_equal(existing.index, index)
+
+	# The positions of the existing alignment are kept, although they may be reordered
+	existing_index = alignment.index[:, :3]
+	existing_index = existing_index[(existing_index >= 0).any(axis=1)]
+	assert sorted(map(tuple, existing_index)) == sorted(map(tuple, index))
+
+	# Each peak of each new experiment is in exactly one position
+	for expr_idx, peak_list in enumerate(alignment.peak_lists[3:], start=3):
+		peak_idx = alignment.index[:, expr_idx]
+		assert sorted(peak_idx[peak_idx >= 0]) == list(range(len(peak_list)))
+
+	single = add_experiments(existing, expr_list[3:4], Dw, Gw, min_peaks=4)
+	assert single.expr_code == existing.expr_code + [expr_list[3].expr_code]
+	assert ((single.index >= 0).sum(axis=1) == 4).all()
+
+
+@pytest.mark.parametrize("obj", [test_string, test_int, *test_sequences, test_dict])
+def test_add_experiments_errors(expr_list, obj):
+	existing = Alignment(expr_list[0])
+
+	with pytest.raises(TypeError):
+		add_experiments(obj, expr_list[1:], Dw, Gw)
+	with pytest.raises(TypeError):
+		add_experiments(existing, obj, Dw, Gw)
+	with pytest.raises(TypeError):
+		add_experiments(existing, expr_list[1:], obj, Gw)
+	with pytest.raises(TypeError):
+		add_experiments(existing, expr_list[1:], Dw, obj)
+
+
 @pytest.fixture(scope="module")
 def A1(T1):
 	A1 = align_with_tree(T1, min_peaks=2)
@@ -161,6 +363,171 @@ def A1(T1):
 	return A1
 
 
+def test_score_matrix(F1):
+	# An alignment with gaps, compared with one without
+	a1 = align(F1[0], F1[1], Dw, Gw)
+	a2 = F1[2]
+
+	scores = score_matrix(a1, a2, Dw)
+	assert scores.shape == (len(a1), len(a2))
+
+	for i, pos1 in enumerate(a1.peakalgt):
+		for j, pos2 in enumerate(a2.peakalgt):
+			assert scores[i, j] == pytest.approx(position_similarity(pos1, pos2, Dw))
+
+	assert (score_matrix(a1, Alignment(None), Dw) == numpy.ones((len(a1), 0))).all()
+
+
+def test_score_matrix_executor(F1, monkeypatch):
+	a1 = align(F1[0], F1[1], Dw, Gw)
+	scores = score_matrix(a1, F1[2], Dw)
+
+	# Calculate the score matrix in several blocks
+	monkeypatch.setattr("pyms.DPA.PairwiseAlignment._SCORE_BLOCK_SIZE", 10 * len(F1[2]))
+
+	blocked_scores = score_matrix(a1, F1[2], Dw)
+	assert blocked_scores == pytest.approx(scores)
+
+	with SocketExecutor(local_workers=2) as executor:
+		assert (score_matrix(a1, F1[2], Dw, executor=executor) == blocked_scores).all()
+
+
+def test_dp():
+	S = numpy.array([
+			[0.1, 1.0, 1.0, 1.0],
+			[1.0, 1.0, 0.2, 1.0],
+			[1.0, 1.0, 1.0, 0.1],
+			])
+
+	for banded in (False, True):
+		result = dp(S, 0.3, banded=banded)
+		assert result["trace"] == [0, 2, 0, 0]
+		assert result["matches"] == [[0, 0], [1, 2], [2, 3]]
+		# The banded cost matrix only stores the cells in the band, so the last cell is the bottom right.
+		cost = result['D'][-1] if banded else result['D'][-1, -1]
+		assert cost == pytest.approx(0.7)
+		assert result["phi"].dtype == numpy.int8
+
+	with pytest.raises(IndexError, match="Zero length alignment found"):
+		dp(numpy.zeros((2, 0)), 0.3)
+
+
+@pytest.mark.parametrize("gap", [Gw, 0.5])
+def test_dp_banded(F1, gap):
+	a1 = align(F1[0], F1[1], Dw, gap)
+	S = score_matrix(a1, F1[2], Dw)
+
+	full = dp(S, gap)
+	banded = dp(S, gap, banded=True)
+
+	assert banded["matches"] == full["matches"]
+	assert banded["trace"] == full["trace"]
+	assert banded['p'] == full['p']
+	assert banded['q'] == full['q']
+	assert banded['D'][-1] == pytest.approx(full['D'][-1, -1])
+
+	# Where gaps tie the trace follows the full cost matrix: match, then up, then left.
+	S = numpy.array([[0.07, 0.91], [0.57, 1.0]])
+	assert dp(S, 0.3, banded=True)["trace"] == dp(S, 0.3)["trace"] == [0, 2, 1]
+
+	# Ties before the first match
+	S = numpy.ones((7, 5))
+	S[6, 4] = 0.0
+	for gap_penalty in (0.25, 0.3, 0.35, 0.4):
+		assert dp(S, gap_penalty, banded=True)["trace"] == dp(S, gap_penalty)["trace"]
+
+	# Only the cells in the band are stored
+	lo, hi = banded["band"]
+	assert len(banded['D']) == len(banded["phi"]) == (hi - lo + 1).sum()
+	if gap < 0.5:
+		assert len(banded['D']) < full['D'].size
+
+	# Matches scoring exactly twice the gap penalty are as good as two gaps
+	S = numpy.ones((2, 2))
+	assert dp(S, 0.5, banded=True)["matches"] == dp(S, 0.5)["matches"] == [[0, 0], [1, 1]]
+
+
+def test_alignment_index(A1):
+	index = A1.index
+	assert index.shape == (len(A1), len(A1.expr_code))
+	assert not index.flags.writeable
+
+	for position, row in zip(A1.peakalgt, index):
+		for expr_idx, (peak, peak_idx) in enumerate(zip(position, row)):
+			if peak_idx < 0:
+				assert peak is None
+			else:
+				assert peak is A1.peak_lists[expr_idx][peak_idx]
+
+	# Positions are sorted by mean retention time
+	mean_rts = [numpy.mean([peak.rt for peak in position if peak is not None]) for position in A1.peakalgt]
+	assert mean_rts == sorted(mean_rts)
+
+	# Assigning the peaks gives the same alignment
+	alignment = Alignment(None)
+	alignment.expr_code = A1.expr_code
+	alignment.peakpos = A1.peakpos
+	assert alignment.peakalgt == A1.peakalgt
+	assert numpy.array_equal(alignment.index >= 0, index >= 0)
+
+
+def test_alignment_aggregates(A1):
+	aggregates = A1.aggregates
+	aligned_peaks = A1.aligned_peaks()
+
+	# The aggregates are updated when merging; check them against the peaks
+	for position, compo_peak, count, rt_sum, rt_min, rt_max, spectrum_norm in zip(
+		A1.peakalgt,
+		aligned_peaks,
+		aggregates.counts,
+		aggregates.rt_sums,
+		aggregates.rt_min,
+		aggregates.rt_max,
+		aggregates.spectrum_norms,
+		):
+		peaks = [peak for peak in position if peak is not None]
+		rts = [peak.rt for peak in peaks]
+		expected = composite_peak(peaks)
+
+		assert count == len(peaks)
+		assert rt_sum == pytest.approx(sum(rts))
+		assert rt_min == min(rts)
+		assert rt_max == max(rts)
+		assert compo_peak.rt == pytest.approx(expected.rt)
+		assert compo_peak.UID == expected.UID
+		assert compo_peak.mass_spectrum.mass_list == expected.mass_spectrum.mass_list
+		assert numpy.allclose(compo_peak.mass_spectrum.intensity_array, expected.mass_spectrum.intensity_array)
+		assert spectrum_norm == pytest.approx(numpy.linalg.norm(count * expected.mass_spectrum.intensity_array))
+
+
+def test_alignment_changed_peaks(expr_list):
+	exprs = [Experiment(expr.expr_code, copy.deepcopy(expr.peak_list)) for expr in expr_list[:2]]
+	alignment = align(Alignment(exprs[0]), Alignment(exprs[1]), Dw, Gw)
+
+	# Fill the caches before changing the peaks
+	pos_idx = int(numpy.flatnonzero(alignment.aggregates.counts == 2)[0])
+	compo_peak = alignment.aligned_peaks()[pos_idx]
+	ion = compo_peak.mass_spectrum.mass_list[int(numpy.argmax(compo_peak.mass_spectrum.intensity_array))]
+	assert compo_peak.get_int_of_ion(ion) > 0
+
+	peaks = alignment.peakalgt[pos_idx]
+	for peak in peaks:
+		peak.null_mass(ion)
+
+	compo_peak = alignment.aligned_peaks()[pos_idx]
+	expected = composite_peak(peaks)
+	assert compo_peak.get_int_of_ion(ion) == 0
+	assert numpy.allclose(compo_peak.mass_spectrum.intensity_array, expected.mass_spectrum.intensity_array)
+
+	# Alignments merged from the alignment use the changed peaks
+	merged = align(alignment, Alignment(expr_list[2]), Dw, Gw)
+	merged_pos = [position for position in merged.peakalgt if position[0] is peaks[0]][0]
+	merged_idx = merged.peakalgt.index(merged_pos)
+	assert merged.aligned_peaks()[merged_idx].get_int_of_ion(ion) == pytest.approx(
+			composite_peak([peak for peak in merged_pos if peak is not None]).get_int_of_ion(ion)
+			)
+
+
 class Test_alignment_Errors:
 
 	@pytest.mark.parametrize("obj", [test_string, test_int, *test_sequences, test_dict])
@@ -18,12 +18,17 @@
 #                                                                           #
 #############################################################################
 
+# stdlib
+from concurrent.futures import ThreadPoolExecutor
+
 # 3rd party
 import pytest
 
 # this package
 from pyms.Experiment import Experiment, load_expr, read_expr_list
 from pyms.Peak.Class import Peak
+from pyms.Peak.List.IO import store_peak_table
+from pyms.Peak.List.Table import PeakTable
 from pyms.Utils.Utils import is_sequence_of
 
 # this package
@@ -146,3 +151,75 @@ def test_read_expr_list(filtered_peak_list, pyms_datadir, expr_filename, tmp_pat
 		read_expr_list("not-an-experiment.expr")
 	with pytest.raises(IOError):
 		read_expr_list("__init__.py")
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_store(expr, filtered_peak_list, tmp_pathplus, compress):
+	filename = tmp_pathplus / "ELEY_1_SUBTRACT.expr"
+	expr.store(filename, compress=compress)
+
+	loaded_expr = load_expr(filename)
+	assert isinstance(loaded_expr, Experiment)
+	assert loaded_expr.expr_code == "ELEY_1_SUBTRACT"
+	assert len(loaded_expr) == len(filtered_peak_list)
+	assert isinstance(loaded_expr.peak_table, PeakTable)
+	assert loaded_expr.peak_list == filtered_peak_list
+	assert loaded_expr == expr
+
+	# Errors
+	for obj in [*test_numbers, test_dict, *test_lists]:
+		with pytest.raises(TypeError):
+			expr.store(obj)
+
+	# A peak list is not an experiment
+	store_peak_table(filtered_peak_list[:5], tmp_pathplus / "peaks.bin")
+	with pytest.raises(IOError, match="not an experiment file"):
+		load_expr(tmp_pathplus / "peaks.bin")
+
+
+def test_load_expr_lazy(expr, filtered_peak_list, tmp_pathplus):
+	filename = tmp_pathplus / "ELEY_1_SUBTRACT.expr"
+	expr.store(filename)
+
+	lazy_expr = load_expr(filename, lazy=True)
+	assert lazy_expr.expr_code == "ELEY_1_SUBTRACT"
+	assert lazy_expr._peak_table is None
+	assert lazy_expr._peak_list is None
+
+	# Selecting peaks doesn't create Peak objects
+	lazy_expr.sele_rt_range(["6.5m", "21m"])
+	assert lazy_expr._peak_list is None
+
+	expected = [peak for peak in filtered_peak_list if 6.5 * 60 <= peak.rt <= 21 * 60]
+	assert len(lazy_expr) == len(expected)
+	assert lazy_expr.peak_list == expected
+
+
+def test_peak_loader(filtered_peak_list):
+	calls = []
+
+	def loader():
+		calls.append(True)
+		return PeakTable.from_peak_list(filtered_peak_list)
+
+	expr = Experiment("ELEY_1_SUBTRACT", loader)
+	assert expr.expr_code == "ELEY_1_SUBTRACT"
+	assert not calls
+
+	assert len(expr) == len(filtered_peak_list)
+	assert expr.peak_list == filtered_peak_list
+	assert len(calls) == 1
+
+
+def test_read_expr_list_concurrent(expr, filtered_peak_list, tmp_pathplus):
+	filename = tmp_pathplus / "ELEY_1_SUBTRACT.expr"
+	expr.store(filename)
+	(tmp_pathplus / "read_expr_list.txt").write_lines([str(filename)] * 5)
+
+	with ThreadPoolExecutor(2) as executor:
+		expr_list = read_expr_list(tmp_pathplus / "read_expr_list.txt", lazy=True, executor=executor)
+
+	assert len(expr_list) == 5
+	assert all(expr._peak_list is None for expr in expr_list)
+	assert expr_list[0].peak_list == filtered_peak_list
+	assert expr_list[4] == expr
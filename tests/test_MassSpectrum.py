@@ -23,6 +23,7 @@ import copy
 import pathlib
 
 # 3rd party
+import numpy  # type: ignore
 import pytest
 import requests
 
@@ -76,8 +77,9 @@ def test_mass_spec(ms):
 	assert ms.mass_spec[50] == 3459.0
 	assert ms.mass_spec[100] == 0.0
 
+	# The returned list is a copy
 	ms.mass_spec[0] = 123
-	assert ms.mass_spec[0] == 123
+	assert ms.mass_spec[0] == 0.0
 
 	assert ms.mass_spec == ms.intensity_list
 
@@ -131,6 +133,55 @@ def test_mass_list_errors(ms, obj, expects):
 		ms.mass_list = obj
 
 
+def test_arrays(ms):
+	assert isinstance(ms.mass_array, numpy.ndarray)
+	assert isinstance(ms.intensity_array, numpy.ndarray)
+	assert ms.mass_array.tolist() == ms.mass_list
+	assert ms.intensity_array.tolist() == ms.intensity_list
+
+	# The arrays are read-only, and are not copied
+	with pytest.raises(ValueError):
+		ms.intensity_array[0] = 123
+	assert ms.intensity_array is ms.intensity_array
+
+	ms = copy.copy(ms)
+	ms.mass_spec = list(range(len(ms)))
+	assert ms.intensity_array.tolist() == list(range(len(ms)))
+	assert not ms.intensity_array.flags.writeable
+
+
+def test_shared_mass_axis(im):
+	ms1 = im.get_ms_at_index(0)
+	ms2 = im.get_ms_at_index(1234)
+	assert ms1.mass_array is ms2.mass_array
+	assert ms1.mass_list == im.mass_list
+
+	# The intensities are copied from the intensity matrix
+	assert ms1.intensity_list == im.get_scan_at_index(0)
+	assert not numpy.shares_memory(ms1.intensity_array, im._intensity_array)
+	assert copy.copy(ms1).mass_array is ms1.mass_array
+
+
+def test_sort_order():
+	ms = MassSpectrum([52, 51, 50], [3, 2, 1])
+	assert ms.mass_list == [50, 51, 52]
+	assert ms.intensity_list == [1, 2, 3]
+	assert ms.min_mass == 50
+	assert ms.max_mass == 52
+
+	with pytest.warns(UserWarning, match="Unknown sort order for mass list"):
+		MassSpectrum([50, 52, 51], [1, 2, 3])
+
+
+def test_get_intensity_for_mass():
+	ms = MassSpectrum([50, 51, 52], [10.0, 20.0, 20.0])
+	assert ms.get_intensity_for_mass(51) == 20.0
+	assert ms.get_mass_for_intensity(20.0) == 51
+
+	with pytest.raises(ValueError):
+		ms.get_intensity_for_mass(53)
+
+
 def test_from_jcamp():
 	nist_data_dir = pathlib.Path("nist_jdx_files")
 
@@ -25,6 +25,7 @@ import pytest
 from pyms.IntensityMatrix import IntensityMatrix
 from pyms.IonChromatogram import IonChromatogram
 from pyms.TopHat import tophat, tophat_im
+from pyms.Utils.Parallel import get_executor
 
 # this package
 from .constants import *
@@ -58,6 +59,15 @@ def test_tophat_im(im):
 	assert isinstance(ic_base_corr, IonChromatogram)
 
 
+def test_tophat_im_executor(im):
+	im_base_corr = tophat_im(im, struct="1.5m")
+
+	with get_executor("processes", 2) as executor:
+		im_parallel = tophat_im(im, struct="1.5m", executor=executor)
+
+	assert (im_parallel.intensity_array == im_base_corr.intensity_array).all()
+
+
 class TestErrors:
 
 	@pytest.mark.parametrize("obj", [test_string, *test_numbers, *test_sequences])
@@ -7,6 +7,7 @@ from fractions import Fraction
 from typing import List
 
 # 3rd party
+import numpy  # type: ignore
 import pytest
 
 # this package
@@ -237,3 +238,92 @@ class TestStdev:
 		assert Math.std(data) == exact
 		assert statistics.stdev(data) == Math.std(data)
 		assert isinstance(statistics.stdev(data), Decimal)
+
+
+def test_vector_by_step():
+	assert Math.vector_by_step(0, 5, 1) == [0, 1, 2, 3, 4]
+	assert Math.vector_by_step(1, 2, 0.25) == [1.0, 1.25, 1.5, 1.75]
+	assert Math.vector_by_step(5, 0, 1) == []
+
+	# The values are less than stop despite rounding errors
+	assert Math.vector_by_step(1, 1.3, 0.1) == pytest.approx([1.0, 1.1, 1.2])
+	assert all(value < 1.3 for value in Math.vector_by_step(1, 1.3, 0.1))
+
+	with pytest.raises(ValueError):
+		Math.vector_by_step(0, 5, 0)
+
+	with pytest.raises(TypeError):
+		Math.vector_by_step("0", 5, 1)  # type: ignore
+
+
+def test_MAD():
+	data = [1, 1, 2, 2, 4, 6, 9]
+	assert Math.MAD(data) == pytest.approx(1 / 0.6745)
+	assert isinstance(Math.MAD(data), float)
+	assert Math.MAD(numpy.array(data)) == Math.MAD(data)
+
+	array = numpy.array([data, [x * 2 for x in data], [0] * len(data)])
+	assert numpy.allclose(Math.MAD(array, axis=1), [1 / 0.6745, 2 / 0.6745, 0])
+	assert numpy.allclose(Math.MAD(array.T, axis=0), Math.MAD(array, axis=1))
+
+	with pytest.raises(TypeError):
+		Math.MAD(1)  # type: ignore
+
+
+def test_rmsd():
+	assert Math.rmsd([1, 2, 3], [1, 2, 3]) == 0
+	assert Math.rmsd([0, 0, 0, 0], [1, -1, 1, -1]) == 1
+	assert isinstance(Math.rmsd([1, 2, 3], [3, 2, 1]), float)
+
+	a = numpy.array([[0, 0], [1, 1], [2, 2]])
+	b = numpy.array([[3, 4], [1, 1], [0, 0]])
+	assert numpy.allclose(Math.rmsd(a, b, axis=1), [math.sqrt(12.5), 0, 2])
+
+	with pytest.raises(TypeError):
+		Math.rmsd(1, [1])  # type: ignore
+	with pytest.raises(TypeError):
+		Math.rmsd([1], 1)  # type: ignore
+
+
+def test_median_outliers():
+	data = [10, 11, 10, 9, 10, 50]
+	assert Math.median_outliers(data).tolist() == [False, False, False, False, False, True]
+
+	assert Math.median_outliers([5, 5, 5]).tolist() == [False, False, False]
+
+	array = numpy.array([data, [5, 5, 5, 5, 5, 5], [1, 2, 100, 1, 2, 1]])
+	assert Math.median_outliers(array, axis=1).tolist() == [
+			[False, False, False, False, False, True],
+			[False, False, False, False, False, False],
+			[False, False, True, False, False, False],
+			]
+
+
+def test_mad_based_outlier():
+	data = [10, 11, 10, 9, 10, 50]
+	assert Math.mad_based_outlier(data).tolist() == [False, False, False, False, False, True]
+	assert Math.mad_based_outlier(data, axis=0).tolist() == Math.mad_based_outlier(data).tolist()
+
+	array = numpy.array([data, [5, 5, 5, 5, 5, 5], [1, 2, 100, 1, 2, 1]])
+	assert Math.mad_based_outlier(array, axis=1).tolist() == [
+			[False, False, False, False, False, True],
+			[False, False, False, False, False, False],
+			[False, False, True, False, False, False],
+			]
+	assert numpy.array_equal(Math.mad_based_outlier(array.T, axis=0), Math.mad_based_outlier(array, axis=1).T)
+
+
+def test_percentile_based_outlier():
+	data = numpy.arange(100, dtype=float)
+	mask = Math.percentile_based_outlier(data, threshold=90)
+	assert mask.sum() == 10
+	assert mask[0] and mask[-1] and not mask[50]
+
+	data[50] = numpy.nan
+	assert Math.percentile_based_outlier(data, threshold=90).sum() == 10
+
+	array = numpy.stack([numpy.arange(100), numpy.arange(100) * 2])
+	assert numpy.array_equal(
+			Math.percentile_based_outlier(array, threshold=90, axis=1),
+			numpy.stack([Math.percentile_based_outlier(row, threshold=90) for row in array]),
+			)
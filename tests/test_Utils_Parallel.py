@@ -0,0 +1,112 @@
+# stdlib
+import multiprocessing
+import operator
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+# 3rd party
+import pytest
+
+# this package
+from pyms.Utils.Parallel import SerialExecutor, SocketExecutor, get_executor, run_worker
+
+
+def test_serial_executor():
+	with SerialExecutor() as executor:
+		future = executor.submit(operator.add, 1, 2)
+		assert future.done()
+		assert future.result() == 3
+
+		assert list(executor.map(operator.mul, range(5), range(5))) == [0, 1, 4, 9, 16]
+
+		with pytest.raises(ZeroDivisionError):
+			executor.submit(operator.truediv, 1, 0).result()
+
+
+class TestSocketExecutor:
+
+	def test_local_workers(self):
+		with SocketExecutor(local_workers=3) as executor:
+			assert list(executor.map(operator.mul, range(20), range(20))) == [x * x for x in range(20)]
+
+			with pytest.raises(ZeroDivisionError):
+				executor.submit(operator.truediv, 1, 0).result()
+
+		with pytest.raises(RuntimeError, match="cannot schedule new futures after shutdown"):
+			executor.submit(operator.add, 1, 2)
+
+	def test_remote_worker(self):
+		# A worker started separately, as it would be on another machine.
+		executor = SocketExecutor()
+		future = executor.submit(operator.add, 1, 2)
+
+		worker = multiprocessing.Process(target=run_worker, args=(executor.address, executor.authkey))
+		worker.start()
+
+		assert future.result(timeout=30) == 3
+
+		executor.shutdown()
+		worker.join(timeout=30)
+		assert worker.exitcode == 0
+
+	def test_unpicklable(self):
+		with SocketExecutor(local_workers=1) as executor:
+			with pytest.raises(Exception, match="pickle"):
+				executor.submit(lambda: 1).result(timeout=30)
+
+			# The worker is still available for the next call
+			assert executor.submit(abs, -3).result(timeout=30) == 3
+
+	def test_worker_disconnects(self):
+		executor = SocketExecutor()
+		lost = executor.submit(os._exit, 1)
+		pending = executor.submit(operator.add, 1, 2)
+
+		worker = multiprocessing.Process(target=run_worker, args=(executor.address, executor.authkey))
+		worker.start()
+
+		with pytest.raises(ConnectionError, match="Lost connection to worker"):
+			lost.result(timeout=30)
+
+		with pytest.raises(ConnectionError, match="All workers have disconnected"):
+			pending.result(timeout=30)
+
+		executor.shutdown()
+		worker.join(timeout=30)
+
+	def test_cancel_futures(self):
+		# No workers are connected, so the call is never sent.
+		executor = SocketExecutor()
+		future = executor.submit(operator.add, 1, 2)
+
+		executor.shutdown(cancel_futures=True)
+		assert future.cancelled()
+
+	def test_wrong_authkey(self):
+		with SocketExecutor(authkey=b"secret") as executor:
+			with pytest.raises(multiprocessing.AuthenticationError):
+				run_worker(executor.address, b"wrong")
+
+
+@pytest.mark.parametrize(
+		"backend, expected",
+		[
+				("serial", SerialExecutor),
+				("threads", ThreadPoolExecutor),
+				("processes", ProcessPoolExecutor),
+				("sockets", SocketExecutor),
+				],
+		)
+def test_get_executor(backend, expected):
+	with get_executor(backend, max_workers=2) as executor:
+		assert isinstance(executor, Executor)
+		assert isinstance(executor, expected)
+		assert list(executor.map(operator.add, range(5), range(5))) == [0, 2, 4, 6, 8]
+
+
+def test_get_executor_errors():
+	with pytest.raises(ValueError, match="Unknown backend 'mpi'"):
+		get_executor("mpi")
+
+	with pytest.raises(TypeError):
+		get_executor(123)  # type: ignore
@@ -19,10 +19,11 @@
 #############################################################################
 
 # 3rd party
+import numpy  # type: ignore
 import pytest
 
 # this package
-from pyms.Noise.Analysis import window_analyzer
+from pyms.Noise.Analysis import window_analyzer, window_analyzer_im
 from tests.constants import *
 
 
@@ -48,3 +49,30 @@ def test_window_anlyzer(tic):
 	for obj in [test_string, test_float, *test_lists, test_dict]:
 		with pytest.raises(TypeError):
 			window_analyzer(tic, n_windows=obj)  # type: ignore
+
+
+def test_window_analyzer_im(im):
+	noise_levels = window_analyzer_im(im, rand_seed=test_int)
+	assert isinstance(noise_levels, numpy.ndarray)
+	assert noise_levels.shape == (im.size[1], )
+
+	for ii in [0, 10, 50, 100]:
+		ic = im.get_ic_at_index(ii)
+		assert noise_levels[ii] == window_analyzer(ic, rand_seed=test_int)
+
+	assert numpy.array_equal(noise_levels, window_analyzer_im(im, rand_seed=test_int))
+
+	sampled = window_analyzer_im(im, window=64, rand_seed=test_int)
+	exhaustive = window_analyzer_im(im, window=64, exhaustive=True)
+	assert numpy.all(exhaustive <= sampled)
+
+	for obj in [test_string, *test_numbers, *test_lists, test_dict]:
+		with pytest.raises(TypeError):
+			window_analyzer_im(obj)  # type: ignore
+
+	for obj in [test_float, *test_lists, test_dict]:
+		with pytest.raises(TypeError):
+			window_analyzer_im(im, window=obj)  # type: ignore
+	for obj in [test_string, test_float, *test_lists, test_dict]:
+		with pytest.raises(TypeError):
+			window_analyzer_im(im, n_windows=obj)  # type: ignore
@@ -0,0 +1,168 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+# stdlib
+import copy
+
+# 3rd party
+import numpy  # type: ignore
+import pytest
+
+# this package
+from pyms.Noise.SavitzkyGolay import savitzky_golay_im
+from pyms.Noise.Streaming import (
+		StreamingFilter,
+		StreamingPipeline,
+		StreamingProcessor,
+		StreamingSavitzkyGolay,
+		StreamingTopHat,
+		StreamingWindowSmooth
+		)
+from pyms.Noise.Window import window_smooth_im
+from pyms.TopHat import tophat_im
+from tests.constants import *
+
+
+@pytest.fixture(scope="module")
+def small_im(im_i):
+	im = copy.deepcopy(im_i)
+	im.crop_mass(60, 80)
+	return im
+
+
+def stream(streaming_filter, intensity_array, block_sizes=(1, 7, 50, 3, 200)):
+	output = []
+	start = 0
+	idx = 0
+
+	while start < len(intensity_array):
+		block_size = block_sizes[idx % len(block_sizes)]
+		block = intensity_array[start:start + block_size]
+		finalised = streaming_filter.push(block)
+		assert len(finalised) <= len(block) + streaming_filter.latency
+		output.append(finalised)
+		start += block_size
+		idx += 1
+
+	output.append(streaming_filter.flush())
+	return numpy.concatenate(output)
+
+
+def test_savitzky_golay(small_im):
+	expected = savitzky_golay_im(small_im).intensity_array
+	streaming_filter = StreamingSavitzkyGolay()
+	assert streaming_filter.latency == 3
+
+	result = stream(streaming_filter, small_im.intensity_array)
+	assert result.shape == expected.shape
+	assert numpy.allclose(result, expected, rtol=1e-12, atol=1e-9)
+
+	time_step = small_im.get_ic_at_index(0).time_step
+	assert StreamingSavitzkyGolay("5s", time_step=time_step).latency == 2
+
+	with pytest.raises(ValueError, match="'time_step' must be given"):
+		StreamingSavitzkyGolay("5s")
+	with pytest.raises(TypeError):
+		StreamingSavitzkyGolay(test_float)  # type: ignore
+	with pytest.raises(TypeError):
+		StreamingSavitzkyGolay(degree=test_string)  # type: ignore
+
+
+@pytest.mark.parametrize("use_median", [True, False])
+def test_window_smooth(small_im, use_median):
+	expected = window_smooth_im(small_im, window=5, use_median=use_median).intensity_array
+	result = stream(StreamingWindowSmooth(5, use_median=use_median), small_im.intensity_array)
+	assert numpy.array_equal(result, expected)
+
+	with pytest.raises(TypeError):
+		StreamingWindowSmooth(use_median=test_string)  # type: ignore
+
+
+def test_tophat(small_im):
+	expected = tophat_im(small_im, struct="1.5m").intensity_array
+	time_step = small_im.get_ic_at_index(0).time_step
+
+	result = stream(StreamingTopHat("1.5m", time_step=time_step), small_im.intensity_array)
+	assert numpy.array_equal(result, expected)
+
+
+def test_pipeline(small_im):
+	expected = tophat_im(savitzky_golay_im(small_im), struct="1.5m").intensity_array
+	time_step = small_im.get_ic_at_index(0).time_step
+
+	filters = (StreamingSavitzkyGolay(), StreamingTopHat("1.5m", time_step=time_step))
+	pipeline = StreamingPipeline(*filters)
+	assert pipeline.latency == sum(filter_.latency for filter_ in filters)
+	assert not isinstance(pipeline, StreamingFilter)
+	assert isinstance(pipeline, StreamingProcessor)
+
+	result = stream(pipeline, small_im.intensity_array)
+	assert numpy.allclose(result, expected, rtol=1e-12, atol=1e-9)
+
+	assert pipeline.n_scans_in == 0
+	assert pipeline.n_scans_out == 0
+
+	with pytest.raises(TypeError):
+		StreamingPipeline(test_string)  # type: ignore
+
+	# The filters are reset with the pipeline
+	pipeline.push(small_im.intensity_array[:50])
+	assert pipeline.n_scans_in == 50
+	pipeline.reset()
+	assert pipeline.n_scans_in == 0
+	assert [filter_.n_scans_in for filter_ in filters] == [0, 0]
+
+	# Applying the pipeline to the whole matrix at once gives the same result
+	assert numpy.allclose(pipeline.apply(small_im.intensity_array), expected, rtol=1e-12, atol=1e-9)
+
+	# Pipelines can be nested
+	nested = StreamingPipeline(StreamingPipeline(filters[0]), filters[1])
+	assert numpy.allclose(stream(nested, small_im.intensity_array), expected, rtol=1e-12, atol=1e-9)
+
+
+def test_apply(small_im):
+	expected = savitzky_golay_im(small_im).intensity_array
+	streaming_filter = StreamingSavitzkyGolay()
+	streaming_filter.push(small_im.intensity_array[:20])
+
+	assert numpy.allclose(streaming_filter.apply(small_im.intensity_array), expected, rtol=1e-12, atol=1e-9)
+
+	# Buffered scans are unaffected
+	assert streaming_filter.n_scans_in == 20
+
+	with pytest.raises(ValueError, match="'intensities' must be a two-dimensional array"):
+		streaming_filter.apply(numpy.zeros((2, 2, 2)))
+
+
+def test_abstract_filter():
+	with pytest.raises(TypeError):
+		StreamingFilter(1, 1)  # type: ignore
+	with pytest.raises(TypeError):
+		StreamingProcessor()  # type: ignore
+
+
+def test_push_errors():
+	streaming_filter = StreamingWindowSmooth(3)
+	streaming_filter.push([[1, 2, 3], [4, 5, 6]])
+	assert streaming_filter.n_scans_in == 2
+	assert streaming_filter.n_scans_out == 1
+
+	with pytest.raises(ValueError, match="Expected scans with 3 intensities, got 2"):
+		streaming_filter.push([1, 2])
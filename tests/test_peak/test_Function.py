@@ -18,12 +18,18 @@
 #                                                                           #
 #############################################################################
 
+# stdlib
+from concurrent.futures import ThreadPoolExecutor
+
 # 3rd party
 import deprecation  # type: ignore
+import numpy  # type: ignore
 import pytest
 
 # this package
 from pyms.Peak.Function import (
+		batch_ion_areas,
+		batch_peak_areas,
 		half_area,
 		ion_area,
 		median_bounds,
@@ -66,6 +72,58 @@ class Test_peak_sum_area:
 			peak_sum_area(im_i, peak, max_bound=obj)
 
 
+class Test_batch_peak_areas:
+
+	def test_main(self, peak, filtered_peak_list, im_i):
+		peak_list = [peak, *filtered_peak_list[:20]]
+		result = batch_peak_areas(im_i, peak_list, max_bound=5)
+
+		assert isinstance(result.area, numpy.ndarray)
+		assert result.area[0] == 10025814.0
+		assert result.ion_areas[0][51] == 3299.0
+
+		for idx, peak_ in enumerate(peak_list):
+			area_sum, area_dict = peak_sum_area(im_i, peak_, single_ion=True, max_bound=5)
+			assert result.area[idx] == area_sum
+			assert result.ion_areas[idx] == area_dict
+			assert result.top_ion_areas[idx] == peak_top_ion_areas(im_i, peak_, max_bound=5)
+
+		result = batch_peak_areas(im_i, peak_list, n_top_ions=3)
+		for idx, peak_ in enumerate(peak_list):
+			assert tuple(result.pt_bounds[idx]) == peak_pt_bounds(im_i, peak_)
+			assert tuple(result.median_bounds[idx]) == median_bounds(im_i, peak_)
+			assert result.top_ion_areas[idx] == peak_top_ion_areas(im_i, peak_, n_top_ions=3)
+
+		with ThreadPoolExecutor(max_workers=2) as executor:
+			parallel_result = batch_peak_areas(im_i, peak_list, n_top_ions=3, executor=executor)
+
+		assert numpy.array_equal(parallel_result.area, result.area)
+		assert parallel_result.ion_areas == result.ion_areas
+		assert parallel_result.top_ion_areas == result.top_ion_areas
+
+		assert len(batch_peak_areas(im_i, []).area) == 0
+
+	@pytest.mark.parametrize("obj", [*test_numbers, test_string, test_dict, *test_sequences])
+	def test_im_errors(self, peak, obj):
+		with pytest.raises(TypeError):
+			batch_peak_areas(obj, [peak])
+
+	@pytest.mark.parametrize("obj", [*test_numbers, test_string, test_dict, test_list_ints, test_list_strs])
+	def test_peak_list_errors(self, im_i, obj):
+		with pytest.raises(TypeError):
+			batch_peak_areas(im_i, obj)
+
+	@pytest.mark.parametrize("obj", [test_float, test_string, test_dict, *test_sequences])
+	def test_n_top_ions_errors(self, im_i, peak, obj):
+		with pytest.raises(TypeError):
+			batch_peak_areas(im_i, [peak], n_top_ions=obj)
+
+	@pytest.mark.parametrize("obj", [test_float, test_string, test_dict, *test_sequences])
+	def test_max_bound_errors(self, im_i, peak, obj):
+		with pytest.raises(TypeError):
+			batch_peak_areas(im_i, [peak], max_bound=obj)
+
+
 class Test_peak_pt_bounds:
 
 	def test_main(self, peak, im_i):
@@ -163,6 +221,55 @@ class Test_ion_area:
 			ion_area(list(range(100)), 20, tol=obj)
 
 
+class Test_batch_ion_areas:
+
+	def test_main(self, peak, im_i):
+		apex = im_i.get_index_at_time(peak.rt)
+		ions = [0, 5, 23, 23, 100]
+		apexes = [apex, apex, apex, 10, 100]
+
+		for max_bound in [0, 5]:
+			result = batch_ion_areas(im_i.intensity_array, ions, apexes, max_bound)
+			for idx, (ion, apex_) in enumerate(zip(ions, apexes)):
+				ia = im_i.get_ic_at_index(ion).intensity_array.tolist()
+				assert tuple(r[idx] for r in result) == ion_area(ia, apex_, max_bound)
+
+	@pytest.mark.parametrize("max_bound", [0, 1, 3])
+	@pytest.mark.parametrize("tol", [0.5, 50.0])
+	def test_random(self, max_bound, tol):
+		rng = numpy.random.default_rng(1234)
+		intensity_array = numpy.column_stack([
+				rng.random(30) * 100,
+				rng.integers(0, 3, 30).astype(float),
+				numpy.exp(-(numpy.arange(30) - 15)**2 / 8) * 1000,
+				])
+
+		ions = numpy.repeat(numpy.arange(3), 30)
+		apexes = numpy.tile(numpy.arange(30), 3)
+		result = batch_ion_areas(intensity_array, ions, apexes, max_bound, tol)
+
+		for idx, (ion, apex) in enumerate(zip(ions, apexes)):
+			ia = intensity_array[:, ion].tolist()
+			assert tuple(r[idx] for r in result) == ion_area(ia, int(apex), max_bound, tol)
+
+	@pytest.mark.parametrize("obj", [*test_numbers, test_string, test_dict, *test_sequences])
+	def test_intensity_array_errors(self, obj):
+		with pytest.raises(TypeError):
+			batch_ion_areas(obj, [0], [0])
+
+	def test_errors(self, im_i):
+		with pytest.raises(TypeError):
+			batch_ion_areas(im_i.intensity_array, test_int, [0])
+		with pytest.raises(TypeError):
+			batch_ion_areas(im_i.intensity_array, [0], test_string)
+		with pytest.raises(TypeError):
+			batch_ion_areas(im_i.intensity_array, [0], [0], max_bound=test_float)
+		with pytest.raises(TypeError):
+			batch_ion_areas(im_i.intensity_array, [0], [0], tol=test_int)
+		with pytest.raises(ValueError):
+			batch_ion_areas(im_i.intensity_array, [0, 1], [0])
+
+
 class Test_half_area:
 
 	def test_main(self, peak, im_i):
@@ -18,13 +18,26 @@
 #                                                                           #
 #############################################################################
 
+# stdlib
+import copy
+
 # 3rd party
+import numpy  # type: ignore
 import pytest
 
 # this package
 from pyms.Peak.Class import Peak
 from pyms.Peak.List import composite_peak, fill_peaks, is_peak_list, sele_peaks_by_rt
-from pyms.Peak.List.IO import load_peaks, store_peaks
+from pyms.Peak.List.IO import (
+		is_binary_peak_list,
+		load_peak_attributes,
+		load_peak_columns,
+		load_peak_table,
+		load_peaks,
+		store_peak_table,
+		store_peaks
+		)
+from pyms.Peak.List.Table import PeakTable
 from pyms.Spectrum import MassSpectrum
 from tests.constants import *
 
@@ -182,6 +195,31 @@ class TestStoreLoadPeaks:
 
 		assert loaded_peak_list == filtered_peak_list
 
+	@pytest.mark.parametrize("protocol", [1, 3])
+	def test_load_peaks_pickle(self, filtered_peak_list, tmp_pathplus, protocol):
+		filename = tmp_pathplus / "filtered_peak_list.pickle"
+		store_peaks(filtered_peak_list, filename, protocol=protocol)
+
+		assert load_peaks(filename) == filtered_peak_list
+
+	def test_store_peaks_mixed_mass_lists(self, tmp_pathplus):
+		peak_list = [
+				Peak(10.0, MassSpectrum([50, 51, 52], [1.0, 2.0, 3.0])),
+				Peak(20.0, MassSpectrum([50, 51], [4.0, 5.0])),
+				]
+		peak_list[0].set_ion_area(50, 10.0)
+
+		filename = tmp_pathplus / "mixed_peak_list.dat"
+		store_peaks(peak_list, filename)
+
+		loaded_peak_list = load_peaks(filename)
+		assert loaded_peak_list == peak_list
+		assert list(loaded_peak_list[0].ion_areas) == [50]
+		assert isinstance(next(iter(loaded_peak_list[0].ion_areas)), int)
+
+		with pytest.raises(ValueError, match="same mass list"):
+			store_peaks(peak_list, filename, binary=True)
+
 	@pytest.mark.parametrize("filename", [test_dict, *test_sequences, *test_numbers])
 	def test_load_filename_errors_1(self, filename):
 		with pytest.raises(TypeError):
@@ -199,3 +237,100 @@ class TestStoreLoadPeaks:
 	def test_load_filename_errors_2(self, filename, expects, pyms_datadir):
 		with pytest.raises(expects):
 			load_peaks(pyms_datadir / filename)
+
+
+class TestPeakTableStore:
+
+	@pytest.fixture()
+	def peak_list(self, filtered_peak_list):
+		peak_list = copy.deepcopy(filtered_peak_list[:20])
+		peak_list[0].area = 1234.5
+		peak_list[0].set_ion_area(73, 123.0)
+		peak_list[0].set_ion_area(147, 456.0)
+		peak_list[2].bounds = (1, 2, 3)
+		peak_list[3].is_outlier = True
+		return peak_list
+
+	@pytest.mark.parametrize("compress", [True, False])
+	def test_store_load(self, peak_list, tmp_pathplus, compress):
+		filename = tmp_pathplus / "peaks.bin"
+		store_peak_table(peak_list, filename, compress=compress)
+
+		table = load_peak_table(filename)
+		assert isinstance(table, PeakTable)
+		assert table == PeakTable.from_peak_list(peak_list)
+
+		loaded_peak_list = table.to_peak_list()
+		assert loaded_peak_list == peak_list
+		assert loaded_peak_list[0].ion_areas == peak_list[0].ion_areas
+		assert loaded_peak_list[0].get_ion_area(147) == 456.0
+		assert all(isinstance(ion, int) for ion in loaded_peak_list[0].ion_areas)
+		assert loaded_peak_list[3].is_outlier
+
+		# load_peaks detects the format
+		assert load_peaks(filename) == peak_list
+
+		store_peaks(peak_list, filename, binary=True, compress=compress)
+		assert load_peaks(filename) == peak_list
+
+	def test_columns(self, peak_list, tmp_pathplus):
+		filename = tmp_pathplus / "peaks.bin"
+		store_peak_table(PeakTable.from_peak_list(peak_list), filename)
+
+		columns = load_peak_columns(filename, ["rt", "UID"])
+		assert set(columns) == {"rt", "UID"}
+		assert columns["rt"].tolist() == [peak.rt for peak in peak_list]
+		assert columns["UID"].tolist() == [peak.UID for peak in peak_list]
+
+		with pytest.raises(ValueError, match="Unknown column 'foo'"):
+			load_peak_columns(filename, ["rt", "foo"])
+
+	@pytest.mark.parametrize("compress", [True, False])
+	def test_rt_range(self, peak_list, tmp_pathplus, compress):
+		filename = tmp_pathplus / "peaks.bin"
+		store_peak_table(peak_list, filename, compress=compress)
+
+		rt_range = (peak_list[0].rt, peak_list[5].rt)
+		expected = [peak for peak in peak_list if rt_range[0] <= peak.rt <= rt_range[1]]
+
+		assert load_peak_table(filename, rt_range=rt_range).to_peak_list() == expected
+
+		columns = load_peak_columns(filename, ["ion_areas", "intensities"], rt_range=rt_range)
+		assert columns["ion_areas"] == [peak._ion_areas for peak in expected]
+		assert columns["intensities"].shape == (len(expected), len(peak_list[0].mass_spectrum))
+		assert type(columns["intensities"]) is numpy.ndarray
+
+		# No peaks in the range
+		assert len(load_peak_table(filename, rt_range=(0, 1))) == 0
+
+	def test_attributes(self, peak_list, tmp_pathplus):
+		filename = tmp_pathplus / "peaks.bin"
+		store_peak_table(peak_list, filename, attributes={"sample": "ELEY_1", "operator": "abc"})
+
+		assert is_binary_peak_list(filename)
+		assert load_peak_attributes(filename) == {"sample": "ELEY_1", "operator": "abc"}
+		assert load_peak_table(filename) == PeakTable.from_peak_list(peak_list)
+
+		store_peak_table(peak_list, filename)
+		assert load_peak_attributes(filename) == {}
+
+		store_peaks(peak_list, filename)
+		assert not is_binary_peak_list(filename)
+
+		with pytest.raises(ValueError, match="'rt' cannot be used as an attribute name"):
+			store_peak_table(peak_list, filename, attributes={"rt": "abc"})
+
+		with pytest.raises(TypeError):
+			store_peak_table(peak_list, filename, attributes={"sample": 1})  # type: ignore
+
+	def test_errors(self, peak_list, tmp_pathplus, pyms_datadir):
+		with pytest.raises(TypeError):
+			store_peak_table(test_list_ints, tmp_pathplus / "peaks.bin")  # type: ignore
+
+		with pytest.raises(OSError, match="not a binary peak list"):
+			load_peak_table(pyms_datadir / "test_list_ints.dat")
+
+		cropped_peak = copy.deepcopy(peak_list[1])
+		cropped_peak.crop_mass(100, 200)
+		with pytest.raises(ValueError, match="same mass list"):
+			store_peak_table([peak_list[0], cropped_peak], tmp_pathplus / "peaks.bin")
@@ -367,6 +367,63 @@ def test_top_ions(peak):
 			peak.top_ions(obj)
 
 
+def test_slots(peak):
+	for obj in [peak, ICPeak(12.34, 73)]:
+		assert not hasattr(obj, "__dict__")
+
+		with pytest.raises(AttributeError):
+			obj.foo = "bar"
+
+
+def test_lazy_UID(peak):
+	new_peak = Peak(peak.rt, peak.mass_spectrum)
+	assert new_peak._UID is None
+	assert new_peak.UID == peak.UID
+
+	# The UID is recalculated after the mass spectrum changes
+	new_peak.null_mass(131)
+	assert new_peak._UID is None
+	assert new_peak.UID != peak.UID
+
+
+@pytest.mark.parametrize("protocol", range(pickle.HIGHEST_PROTOCOL + 1))
+def test_pickle(peak, protocol):
+	new_peak = copy.deepcopy(peak)
+	new_peak.area = 1234.0
+	new_peak.bounds = (1, 2, 3)
+	new_peak.set_ion_area(131, 10.0)
+
+	loaded_peak = pickle.loads(pickle.dumps(new_peak, protocol=protocol))
+	assert loaded_peak == new_peak
+	assert loaded_peak.ion_areas == {131: 10.0}
+	assert loaded_peak.is_outlier is False
+
+	ic_peak = ICPeak(12.34, 73, outlier=True)
+	loaded_ic_peak = pickle.loads(pickle.dumps(ic_peak, protocol=protocol))
+	assert loaded_ic_peak == ic_peak
+	assert loaded_ic_peak.is_outlier is True
+
+
+def test_setstate_legacy(peak):
+	# Peaks pickled by earlier versions stored their instance dictionary
+	state = {
+			"_mass_spectrum": peak.mass_spectrum,
+			"is_outlier": False,
+			"_rt": 12.34,
+			"_pt_bounds": (1, 2, 3),
+			"_area": None,
+			"_ion_areas": {},
+			"_UID": peak.UID,
+			"_ic_mass": None,
+			}
+
+	new_peak = Peak.__new__(Peak)
+	new_peak.__setstate__(state)
+	assert new_peak.UID == peak.UID
+	assert new_peak.bounds == (1, 2, 3)
+	assert new_peak.mass_spectrum == peak.mass_spectrum
+
+
 # Inherited Methods from pymsBaseClass
 
 
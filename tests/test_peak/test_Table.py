@@ -0,0 +1,159 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+
+# stdlib
+import copy
+import pickle
+
+# 3rd party
+import numpy  # type: ignore
+import pytest
+
+# this package
+from pyms.BillerBiemann import num_ions_threshold, rel_threshold
+from pyms.Experiment import Experiment
+from pyms.Peak.Class import Peak
+from pyms.Peak.List import composite_peak, is_peak_list, sele_peaks_by_rt
+from pyms.Peak.List.Table import PeakTable
+from pyms.Spectrum import MassSpectrum
+from tests.constants import *
+
+
+def assert_same_peaks(peak_list, expected_peak_list):
+	assert len(peak_list) == len(expected_peak_list)
+	for peak, expected_peak in zip(peak_list, expected_peak_list):
+		assert peak == expected_peak
+		assert peak.mass_spectrum == expected_peak.mass_spectrum
+		assert peak.is_outlier == expected_peak.is_outlier
+		assert peak._ion_areas == expected_peak._ion_areas
+
+
+def test_round_trip(filtered_peak_list):
+	filtered_peak_list[2].is_outlier = True
+	table = PeakTable.from_peak_list(filtered_peak_list)
+
+	assert len(table) == len(filtered_peak_list)
+	assert is_peak_list(table)
+	assert table.intensities.shape == (len(filtered_peak_list), len(filtered_peak_list[0].mass_spectrum))
+	assert list(table.UID) == [peak.UID for peak in filtered_peak_list]
+	assert table.area[0] == filtered_peak_list[0].area
+
+	assert_same_peaks(table.to_peak_list(), filtered_peak_list)
+	assert_same_peaks(list(table), filtered_peak_list)
+	assert table[-1] == filtered_peak_list[-1]
+
+	# UIDs are calculated in the same way as Peak.make_UID
+	assert list(PeakTable(table.mass_list, table.rt, table.intensities).UID) == list(table.UID)
+
+
+def test_indexing(filtered_peak_list):
+	table = PeakTable.from_peak_list(filtered_peak_list)
+
+	assert isinstance(table[1:5], PeakTable)
+	assert_same_peaks(table[1:5], filtered_peak_list[1:5])
+	assert_same_peaks(table[[0, 3]], [filtered_peak_list[0], filtered_peak_list[3]])
+	assert_same_peaks(table[table.rt > 1000], [peak for peak in filtered_peak_list if peak.rt > 1000])
+
+	with pytest.raises(IndexError):
+		table[len(table)]
+
+	with pytest.raises(TypeError, match="not bool"):
+		table[True]  # type: ignore
+
+
+def test_peaks_are_copies(filtered_peak_list):
+	table = PeakTable.from_peak_list(filtered_peak_list[:10])
+
+	# Each access creates a new peak, so changes to it are not reflected in the table
+	assert table[0] is not table[0]
+	table[0].is_outlier = True
+	for peak in table:
+		peak.null_mass(peak.mass_spectrum.mass_list[0])
+	assert not table.is_outlier.any()
+	assert table == PeakTable.from_peak_list(filtered_peak_list[:10])
+
+	# Functions which mark the peaks refuse tables
+	assert composite_peak(table) == composite_peak(table.to_peak_list())
+	with pytest.raises(TypeError, match="to_peak_list"):
+		composite_peak(table, ignore_outliers=True)
+
+
+def test_copy(filtered_peak_list):
+	table = PeakTable.from_peak_list(filtered_peak_list)
+
+	for other in [copy.copy(table), copy.deepcopy(table), pickle.loads(pickle.dumps(table))]:
+		assert other == table
+
+	other = table.copy()
+	other.intensities[0] = 0
+	assert other != table
+
+
+def test_filters(peak_list):
+	table = PeakTable.from_peak_list(peak_list)
+
+	thresholded = rel_threshold(table, 2)
+	assert isinstance(thresholded, PeakTable)
+	assert thresholded == PeakTable.from_peak_list(rel_threshold(peak_list, 2))
+	assert table == PeakTable.from_peak_list(peak_list)
+
+	filtered = num_ions_threshold(thresholded, 3, 10000)
+	assert isinstance(filtered, PeakTable)
+	assert len(filtered) == 215
+	assert filtered == PeakTable.from_peak_list(num_ions_threshold(rel_threshold(peak_list, 2), 3, 10000))
+
+	selected = sele_peaks_by_rt(filtered, ["12m", "13m"])
+	assert isinstance(selected, PeakTable)
+	assert_same_peaks(selected, sele_peaks_by_rt(list(filtered), ["12m", "13m"]))
+
+	rel_threshold(table, 2, copy_peaks=False)
+	assert table == thresholded
+
+
+def test_experiment(filtered_peak_list):
+	table = PeakTable.from_peak_list(filtered_peak_list)
+	expr = Experiment("table", table)
+
+	assert len(expr) == len(filtered_peak_list)
+	assert_same_peaks(expr.peak_list, filtered_peak_list)
+
+
+def test_empty():
+	table = PeakTable.from_peak_list([])
+	assert len(table) == 0
+	assert table.to_peak_list() == []
+
+
+def test_errors():
+	peak_a = Peak(10.0, MassSpectrum([50, 51], [1, 2]))
+	peak_b = Peak(20.0, MassSpectrum([50, 52], [1, 2]))
+
+	with pytest.raises(ValueError):
+		PeakTable.from_peak_list([peak_a, peak_b])
+
+	with pytest.raises(TypeError):
+		PeakTable.from_peak_list([peak_a, test_string])
+
+	with pytest.raises(ValueError):
+		PeakTable([50, 51, 52], [1.0], numpy.ones((1, 2)))
+
+	with pytest.raises(ValueError):
+		PeakTable([50, 51], [1.0, 2.0], numpy.ones((2, 2)), area=[1.0])